@@ -8,7 +8,26 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from io import StringIO
+import colorsys
+import hashlib
 import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from leveler.bidbook import BidBook
+from leveler.cache import GapCache
+from leveler.coverage import LineCoverage
+from leveler.engine import CODE_GAP, CODE_PARTIAL, STATUS_LABELS, TradeResult, divergence_matrix, level_trade, sub_labels
+from leveler.ingest import ScopeSchemaError, read_scope_csv
+from leveler.persist import ProjectDB, ProjectNotFound
+from leveler.plugs import PlugTableError, plug_series, plug_table, read_plug_table
+from leveler.profiling import Profiler, activate, stage
+from leveler.scenarios import ScenarioModel
+from leveler.scope import ScopeStore, TradePartition
+from leveler.similarity import DEFAULT_THRESHOLD
+from leveler.trades import DEFAULT_TRADES, TradeConfigError, load_trades, resolve_trades
 
 # ── Page Config ────────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -210,70 +229,475 @@ COLORS = {
     "border": "#334155",
 }
 
-TRADES = ["Drywall", "MEP", "Interiors", "Site Work"]
+# Per-chart layout skeletons: the dark template merged with each chart's fixed
+# settings once, so a figure build only supplies traces and a title.
+def chart_layout(**overrides) -> dict:
+    return {**PLOTLY_TEMPLATE["layout"], **overrides}
+
+CHART_SKELETONS = {
+    "trade_bar": chart_layout(
+        barmode="group", showlegend=True, height=420, yaxis=dict(
+            PLOTLY_TEMPLATE["layout"]["yaxis"], tickprefix="$", tickformat=","),
+    ),
+    "heatmap": chart_layout(
+        height=360,
+        xaxis=dict(side="bottom", tickfont=dict(color="#94A3B8", size=12)),
+        yaxis=dict(tickfont=dict(color="#94A3B8", size=12)),
+    ),
+    "cross_trade": chart_layout(
+        barmode="group", height=420, yaxis=dict(
+            PLOTLY_TEMPLATE["layout"]["yaxis"], tickprefix="$", tickformat=","),
+    ),
+    "tornado": chart_layout(
+        barmode="overlay", showlegend=True, height=380, xaxis=dict(
+            PLOTLY_TEMPLATE["layout"]["xaxis"], tickprefix="$", tickformat=","),
+        yaxis=dict(PLOTLY_TEMPLATE["layout"]["yaxis"], autorange="reversed"),
+    ),
+}
+
+HEATMAP_COLORSCALE = [
+    [0.0, "#34D399"],    # tight — green
+    [0.4, "#FBBF24"],    # moderate — amber
+    [0.7, "#FB923C"],    # elevated — orange
+    [1.0, "#FB7185"],    # divergent — red
+]
+
+RISK_BADGES = {
+    "LOW": ("🟢 LOW", "#34D399"),
+    "MEDIUM": ("🟡 MEDIUM", "#FBBF24"),
+    "HIGH": ("🔴 HIGH", "#FB7185"),
+    "NO DATA": ("⚪ NO DATA", "#475569"),
+}
+
+try:
+    CONFIGURED_TRADES = load_trades()
+except TradeConfigError as e:
+    st.error(f"Trade config ignored — {e}")
+    CONFIGURED_TRADES = list(DEFAULT_TRADES)
+
+ANALYTICS_VIEW = "📈 Analytics"
+MAX_INLINE_VIEWS = 8
+COVERAGE_PAGE_ROWS = 500
+MATCH_SUBSTRING, MATCH_SIMILARITY = "Substring", "Similarity"
+STATUS_DTYPE = pd.CategoricalDtype(STATUS_LABELS)
+STATUS_STYLES = dict(zip(STATUS_LABELS, [  # coverage matrix cell CSS, by status label
+    "color: #94A3B8;", "color: #FB7185; font-weight: bold;", "color: #F97316;", "color: #34D399;", "color: #FACC15;",
+]))
 
 # ── Session State Init ──────────────────────────────────────────────────────────
 def init_session_state():
-    if "master_scope" not in st.session_state:
-        st.session_state.master_scope = pd.DataFrame(
-            columns=["Trade", "Item", "Unit", "Quantity", "Unit_Cost", "Budget_Total", "Description"]
-        )
-    if "subs" not in st.session_state:
-        st.session_state.subs = {}
-        for trade in TRADES:
-            st.session_state.subs[trade] = {
-                "A": {"name": "", "total": 0.0, "inclusions": [], "exclusions": []},
-                "B": {"name": "", "total": 0.0, "inclusions": [], "exclusions": []},
-                "C": {"name": "", "total": 0.0, "inclusions": [], "exclusions": []},
-            }
+    if "scope_store" not in st.session_state:
+        st.session_state.scope_store = ScopeStore()
+    if "bids" not in st.session_state:
+        st.session_state.bids = BidBook(CONFIGURED_TRADES)
     if "plug_rates" not in st.session_state:
-        st.session_state.plug_rates = {}
+        st.session_state.plug_rates = pd.Series(dtype=float)  # scope row label → plug override
+    if "gap_cache" not in st.session_state:
+        st.session_state.gap_cache = GapCache(maxsize=256)
+    if "plug_revisions" not in st.session_state:
+        st.session_state.plug_revisions = {}
+    if "trade_summaries" not in st.session_state:
+        st.session_state.trade_summaries = {}
+    if "line_coverage" not in st.session_state:
+        st.session_state.line_coverage = {}
+    if "line_diffs" not in st.session_state:
+        st.session_state.line_diffs = {}
+    if "figures" not in st.session_state:
+        st.session_state.figures = {}
+    if "profile_runs" not in st.session_state:
+        st.session_state.profile_runs = []  # per profiled rerun, its stage records
+    if "scope_upload_generation" not in st.session_state:
+        st.session_state.scope_upload_generation = 0  # bumped to hand the scope uploader a fresh, empty key
 
 init_session_state()
 
+# ── Profiling ───────────────────────────────────────────────────────────────────
+# Opt-in from the Diagnostics toggle. Off, every stage() is a shared no-op.
+PROFILE_HISTORY = 50
+
+def start_profiler() -> Profiler | None:
+    """This rerun's profiler, or None; allocation tracing is started and stopped by the session that asked for it."""
+    profiler = None
+    if st.session_state.get("profiling"):
+        profiler = Profiler(trace_memory=st.session_state.get("profile_memory", False))
+    wants_tracing = profiler is not None and profiler.trace_memory
+    if wants_tracing and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        st.session_state.tracing = True
+    elif not wants_tracing and st.session_state.get("tracing"):
+        tracemalloc.stop()
+        st.session_state.tracing = False
+    activate(profiler)
+    return profiler
+
+profiler = start_profiler()
+run_start = time.perf_counter()
+
 # ── Helper Functions ────────────────────────────────────────────────────────────
-def get_trade_scope(trade: str) -> pd.DataFrame:
-    df = st.session_state.master_scope
-    if df.empty:
-        return pd.DataFrame()
-    return df[df["Trade"] == trade].copy()
-
-def detect_gaps(trade: str, sub_key: str) -> dict:
-    """Returns dict with 'missing_items' list and 'gap_cost' float."""
-    scope_df = get_trade_scope(trade)
-    if scope_df.empty:
-        return {"missing_items": [], "gap_cost": 0.0}
-    sub = st.session_state.subs[trade][sub_key]
-    inclusions = [i.strip().lower() for i in sub["inclusions"] if i.strip()]
-    missing = []
-    gap_cost = 0.0
-    for _, row in scope_df.iterrows():
-        item_name = str(row["Item"]).lower()
-        is_included = any(item_name in inc or inc in item_name for inc in inclusions) if inclusions else False
-        if not is_included:
-            plug = st.session_state.plug_rates.get(
-                f"{trade}::{row['Item']}", float(row.get("Budget_Total", 0))
-            )
-            missing.append({
-                "item": row["Item"],
-                "budget": float(row.get("Budget_Total", 0)),
-                "plug": plug,
-            })
-            gap_cost += plug
-    return {"missing_items": missing, "gap_cost": gap_cost}
+def get_trades() -> list[str]:
+    """Configured trades plus any the scope or bids introduce; a trade new to the bid book gets the default bidders."""
+    book = st.session_state.bids
+    trades = resolve_trades(CONFIGURED_TRADES, st.session_state.scope_store.trades, book.trades)
+    for trade in trades:
+        if trade not in book.trades:
+            book.ensure(trade)
+    return trades
+
+def get_trade_partition(trade: str) -> TradePartition:
+    return st.session_state.scope_store.get(trade)
+
+def apply_scope_edit(touched: set[str]):
+    """Drop cached gap results for the trades a scope edit touched."""
+    for trade in touched:
+        st.session_state.gap_cache.invalidate(trade)
+        drop_line_coverage(trade)
+
+def line_tracker(trade: str, sub_key: str, field: str) -> LineCoverage | None:
+    """The sub's live coverage for `field`, rebuilt if the trade's scope changed; None without scope."""
+    if trade not in st.session_state.scope_store:
+        return None
+    index = st.session_state.scope_store.index(trade)
+    tracker = st.session_state.line_coverage.get((trade, sub_key, field))
+    if tracker is None or tracker.corpus is not index:
+        tracker = LineCoverage(index, st.session_state.bids.bid(trade, sub_key)[field])
+        st.session_state.line_coverage[(trade, sub_key, field)] = tracker
+    return tracker
+
+def known_coverage(trade: str, bids: dict, index) -> dict:
+    """(included, excluded) masks for subs whose live coverage is current — they skip the scan."""
+    trackers = st.session_state.line_coverage
+    coverage = {}
+    for key, bid in bids.items():
+        inc, exc = trackers.get((trade, key, "inclusions")), trackers.get((trade, key, "exclusions"))
+        if (inc is not None and exc is not None and inc.corpus is index and exc.corpus is index
+                and inc.matches(bid["inclusions"]) and exc.matches(bid["exclusions"])):
+            coverage[key] = (inc.mask, exc.mask)
+    return coverage
+
+def match_threshold() -> float | None:
+    """The similarity threshold when similarity matching is on; None for the substring rule."""
+    if st.session_state.get("match_mode") != MATCH_SIMILARITY:
+        return None
+    return st.session_state.get("match_threshold", DEFAULT_THRESHOLD)
+
+def match_quantities() -> bool:
+    """Whether quoted quantities make a covered item partial."""
+    return st.session_state.get("match_quantities", False)
+
+def level_trade_state(trade: str, scope_df: pd.DataFrame) -> TradeResult:
+    """Level every sub for `trade` from the current session state — one gap scan per sub."""
+    bids = st.session_state.bids.trade_bids(trade)
+    threshold = match_threshold()
+    quantities = match_quantities()
+    if threshold is not None:
+        vectors = get_trade_partition(trade).vectors() if not scope_df.empty else None
+        return level_trade(
+            scope_df, bids, st.session_state.plug_rates, trade=trade, cache=st.session_state.gap_cache,
+            similarity=threshold, vectors=vectors, quantities=quantities,
+        )
+    index = st.session_state.scope_store.index(trade) if not scope_df.empty else None
+    return level_trade(
+        scope_df, bids, st.session_state.plug_rates, trade=trade, cache=st.session_state.gap_cache,
+        index=index, coverage=known_coverage(trade, bids, index) if index is not None and not quantities else None,
+        quantities=quantities,
+    )
 
-def get_adjusted_total(trade: str, sub_key: str) -> float:
-    sub = st.session_state.subs[trade][sub_key]
-    gaps = detect_gaps(trade, sub_key)
-    return sub["total"] + gaps["gap_cost"]
+def trade_stamp(trade: str) -> tuple:
+    """Changes whenever anything `trade`'s leveling reads does — scope rows, bids or plugs."""
+    part = st.session_state.scope_store.parts.get(trade)
+    return (
+        part.revision if part is not None else 0,
+        st.session_state.bids.revision(trade),
+        st.session_state.plug_revisions.get(trade, 0),
+    )
+
+def leveling_stamp(trade: str) -> tuple:
+    """``trade_stamp`` plus the matching settings: everything a trade summary was computed from."""
+    return (*trade_stamp(trade), match_threshold(), match_quantities())
+
+def summarize(result: TradeResult) -> dict:
+    winner = result.winner()
+    return {
+        "budget": result.budget,
+        "bidders": len(result.active),
+        "winner": winner.name if winner else None,
+        "lowest": winner.adjusted_total if winner else None,
+        "risk": result.risk().level,
+    }
+
+trade_results: dict[str, TradeResult] = {}
+
+def get_leveling(trade: str) -> TradeResult:
+    """Level `trade` on first use in this rerun; views that never ask never compute."""
+    if trade not in trade_results:
+        with stage(f"level {trade}"):
+            trade_results[trade] = level_trade_state(trade, get_trade_partition(trade).frame)
+        st.session_state.trade_summaries[trade] = {"stamp": leveling_stamp(trade), **summarize(trade_results[trade])}
+    return trade_results[trade]
 
 def fmt_currency(val: float) -> str:
     return f"${val:,.0f}"
 
-def pct_delta(val: float, ref: float) -> float:
-    if ref == 0:
-        return 0.0
-    return ((val - ref) / ref) * 100
+def bidder_colors(n: int) -> list[str]:
+    """One color per bidder: the three brand sub colors, then evenly spread hues."""
+    base = [COLORS["sub_a"], COLORS["sub_b"], COLORS["sub_c"]]
+    extra = [
+        "#%02X%02X%02X" % tuple(round(c * 255) for c in colorsys.hls_to_rgb((0.58 + i * 0.381966) % 1.0, 0.68, 0.75))
+        for i in range(max(0, n - len(base)))
+    ]
+    return (base + extra)[:n]
+
+def parse_lines(raw: str) -> list[str]:
+    return [l.strip() for l in raw.split("\n") if l.strip()]
+
+def commit_bid_lines(trade: str, sub_key: str):
+    """
+    Bid form submit: store the edited inclusion/exclusion lines and move the
+    sub's live coverage by the line diff, so only rows the changed lines match
+    are revisited.
+    """
+    book = st.session_state.bids
+    bid = book.bid(trade, sub_key)
+    added = removed = flipped = 0
+    for field, prefix in (("inclusions", "inc"), ("exclusions", "exc")):
+        lines = parse_lines(st.session_state[f"{prefix}_{trade}_{sub_key}"])
+        tracker = line_tracker(trade, sub_key, field)
+        if tracker is not None:
+            a, r, f = tracker.update(lines)
+            added, removed, flipped = added + len(a), removed + len(r), flipped + len(f)
+        if lines != bid[field]:
+            book.update(trade, sub_key, **{field: lines})
+    st.session_state.line_diffs[trade] = (sub_key, added, removed, flipped)
+
+def drop_line_coverage(trade: str, sub_key: str | None = None):
+    for key in [k for k in st.session_state.line_coverage if k[0] == trade and sub_key in (None, k[1])]:
+        del st.session_state.line_coverage[key]
+
+def set_plugs(plugs: pd.Series, trades: pd.Series) -> int:
+    """
+    Store plug overrides for the scope rows in `plugs`' index (NaN puts a row
+    back on its budget); the rows' `trades` are marked changed. Returns the
+    number of rows whose plug actually changed.
+    """
+    current = st.session_state.plug_rates
+    old = current.reindex(plugs.index).to_numpy(dtype=float, na_value=np.nan)
+    new = plugs.to_numpy(dtype=float, na_value=np.nan)
+    changed = ~((old == new) | (np.isnan(old) & np.isnan(new)))
+    if not changed.any():
+        return 0
+    labels = plugs.index[changed]
+    current = current.reindex(current.index.union(labels))
+    current[labels] = new[changed]
+    st.session_state.plug_rates = current.dropna()
+    for trade in set(trades.to_numpy()[changed].tolist()):
+        st.session_state.plug_revisions[trade] = st.session_state.plug_revisions.get(trade, 0) + 1
+    return int(changed.sum())
+
+def carry_plugs(old: ScopeStore, new: ScopeStore) -> pd.Series:
+    """Overrides from `old` moved onto the rows of `new` with the same trade and item."""
+    plugs = st.session_state.plug_rates
+    if plugs.empty or old.empty or new.empty:
+        return pd.Series(dtype=float)
+    table = plug_table(old.frame, plugs).loc[plugs.index.intersection(old.frame.index)]
+    rates = dict(zip(table["Trade"] + "::" + table["Item"], table["Plug"]))
+    return plug_series(new.frame, rates).dropna()
+
+def chart_title(text: str) -> dict:
+    return dict(PLOTLY_TEMPLATE["layout"]["title"], text=text)
+
+def data_fingerprint(*parts) -> str:
+    """Digest of the numbers and labels a chart is drawn from."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(np.ascontiguousarray(part).tobytes() if isinstance(part, np.ndarray) else repr(part).encode())
+        h.update(b"\x00")
+    return h.hexdigest()
+
+def cached_figure(slot: str, fingerprint: str, build) -> go.Figure:
+    """The figure in `slot`, rebuilt by `build()` only when its data fingerprint changes."""
+    entry = st.session_state.figures.get(slot)
+    if entry is None or entry[0] != fingerprint:
+        with stage(f"chart build {slot}"):
+            entry = st.session_state.figures[slot] = (fingerprint, build())
+    return entry[1]
+
+def show_figure(fig: go.Figure):
+    """
+    Emit `fig`. Only its build is cached: Streamlit drops any element a rerun
+    does not emit, so even an unchanged figure is serialized again here on
+    every rerun (timed as its own stage). Streamlit's message cache then sends
+    a large figure the browser already holds as a hash reference, not in full.
+    """
+    with stage("plotly serialize"):
+        st.plotly_chart(fig, use_container_width=True)
+
+# ── Plug Cost Editor ────────────────────────────────────────────────────────────
+def gap_rows(trade: str) -> np.ndarray:
+    """Mask of the trade's scope rows that at least one bidder is missing."""
+    active = list(get_leveling(trade).active.values())
+    if not active:
+        return np.zeros(get_trade_partition(trade).count, dtype=bool)
+    return ~np.logical_and.reduce([sub.included for sub in active])
+
+@st.dialog("🧮 Plug Costs", width="large")
+def plug_editor():
+    # Runs only while open, and reruns on its own as it is edited; one grid
+    # replaces a number input per scope row.
+    store = st.session_state.scope_store
+    trade_col, search_col = st.columns([1, 2])
+    trade = trade_col.selectbox("Trade", ["All trades"] + store.trades, key="plug_trade")
+    search = search_col.text_input("Search items", key="plug_search", placeholder="e.g. insulation")
+    gaps_only = st.toggle("Only items some bidder is missing", value=True, key="plug_gaps_only")
+
+    trades = store.trades if trade == "All trades" else [trade]
+    frames = []
+    for t in trades:
+        frame = store.get(t).frame
+        frames.append(frame[gap_rows(t)] if gaps_only else frame)
+    table = plug_table(pd.concat(frames) if frames else store.frame, st.session_state.plug_rates)
+    if search:
+        table = table[table["Item"].str.contains(search.strip(), case=False, regex=False)]
+
+    st.caption(f"{len(table):,} item(s) shown · {len(st.session_state.plug_rates):,} override(s) in this project")
+    edited = st.data_editor(
+        table,
+        key=f"plug_grid_{trade}_{search}_{gaps_only}_{st.session_state.get('plug_grid_version', 0)}",
+        disabled=["Trade", "Item", "Budget"],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "Budget": st.column_config.NumberColumn(format="dollar", step=1),
+            "Plug": st.column_config.NumberColumn("Plug ($)", min_value=0.0, step=500.0, format="dollar"),
+        },
+    )
+    if st.button("💾 Save Plug Costs", type="primary", disabled=table.empty):
+        plugs = edited["Plug"].astype(float).where(edited["Plug"] != edited["Budget"])
+        set_plugs(plugs, edited["Trade"])
+        st.session_state.plug_grid_version = st.session_state.get("plug_grid_version", 0) + 1
+        st.rerun()
+
+    st.markdown("<hr style='border-color:#334155; margin:12px 0;'>", unsafe_allow_html=True)
+    export_col, import_col = st.columns(2)
+    with export_col:
+        st.download_button(
+            "⬇ Export Plug Table",
+            plug_table(store.frame, st.session_state.plug_rates).to_csv(index=False),
+            file_name="plug_costs.csv",
+            mime="text/csv",
+            use_container_width=True,
+        )
+    with import_col:
+        imported = st.file_uploader("Import plug table (Trade, Item, Plug)", type=["csv"], key="plug_import")
+        if imported is not None and st.button("Apply Import", use_container_width=True):
+            try:
+                rates = read_plug_table(imported)
+            except PlugTableError as e:
+                st.error(f"❌ {e}")
+            else:
+                scope = store.frame
+                plugs = plug_series(scope, rates).dropna()
+                plugs = plugs.where(plugs != scope.loc[plugs.index, "Budget_Total"])
+                changed = set_plugs(plugs, scope.loc[plugs.index, "Trade"].astype(str))
+                st.session_state.plug_grid_version = st.session_state.get("plug_grid_version", 0) + 1
+                st.success(f"✅ {len(plugs):,} row(s) matched, {changed:,} plug(s) changed.")
+
+# ── Project Store ───────────────────────────────────────────────────────────────
+# Scope, bids and plugs of the open project live in a SQLite file on the
+# server; each rerun writes back only the trades whose stamp moved.
+PROJECT_WIDGET_PREFIXES = ("roster_", "inc_", "exc_", "scope_sub_", "gaps_only_", "coverage_page_", "edit_")
+
+@st.cache_resource
+def project_db() -> ProjectDB:
+    return ProjectDB()
+
+def reset_session_data():
+    """
+    Drop everything derived from the previous project's data, including its
+    widget state. The scope uploader gets a new key so a file uploaded before
+    the switch is not ingested again into the project just opened.
+    """
+    st.session_state.gap_cache.invalidate()
+    st.session_state.scope_upload_generation += 1
+    st.session_state.scope_upload_id = None
+    for name in ("line_coverage", "line_diffs", "figures", "trade_summaries", "plug_revisions"):
+        st.session_state[name].clear()
+    for key in [k for k in st.session_state if str(k).startswith(PROJECT_WIDGET_PREFIXES)]:
+        del st.session_state[key]
+
+def open_project(project: str):
+    """Load `project` into the session; raises ProjectNotFound, touching nothing, if it is gone."""
+    db = project_db()
+    db.project(project)
+    st.session_state.scope_store = ScopeStore(db.load_scope(project))
+    st.session_state.bids = BidBook.from_package(db.load_bids(project))
+    st.session_state.plug_rates = db.load_plugs(project)
+    reset_session_data()
+    st.session_state.project = st.session_state.project_choice = project
+    st.session_state.saved_stamps = {trade: trade_stamp(trade) for trade in get_trades()}
+    st.query_params["project"] = project
+
+def switch_project():
+    """Project selector callback: open the chosen project, or keep the data unsaved."""
+    choice = st.session_state.project_choice
+    if choice is None:
+        st.session_state.project = None
+        st.query_params.pop("project", None)
+    else:
+        try:
+            open_project(choice)
+        except ProjectNotFound:
+            st.warning("That project no longer exists — it may have been deleted in another session.")
+            st.session_state.project_choice = st.session_state.project
+
+def create_project():
+    """Save the current session as a new project; the next sync writes every trade."""
+    name = st.session_state.new_project_name.strip()
+    if not name:
+        return
+    project = project_db().create_project(name)
+    st.session_state.project = st.session_state.project_choice = project
+    st.session_state.saved_stamps = {}
+    st.session_state.new_project_name = ""
+    st.query_params["project"] = project
+
+def delete_project():
+    project_db().delete_project(st.session_state.project)
+    st.session_state.project = st.session_state.project_choice = None
+    st.query_params.pop("project", None)
+
+def sync_project() -> int:
+    """Write the trades changed since the last save to the open project; returns how many were written."""
+    project = st.session_state.project
+    if project is None:
+        return 0
+    db, store, book = project_db(), st.session_state.scope_store, st.session_state.bids
+    saved = st.session_state.saved_stamps
+    trades = list(dict.fromkeys(store.trades + book.trades))
+    gone = [trade for trade in saved if trade not in trades]
+    db.drop_trades(project, gone)
+    for trade in gone:
+        del saved[trade]
+    written = 0
+    for trade in trades:
+        stamp = trade_stamp(trade)
+        if saved.get(trade) == stamp:
+            continue
+        frame = store.get(trade).frame
+        plugs = st.session_state.plug_rates
+        db.save_trade(project, trade, frame, book.trade_bids(trade), plugs[plugs.index.isin(frame.index)])
+        saved[trade] = stamp
+        written += 1
+    return written
+
+if "project" not in st.session_state:
+    st.session_state.project = st.session_state.project_choice = None
+    st.session_state.saved_stamps = {}
+    if "project" in st.query_params:
+        try:
+            open_project(st.query_params["project"])
+        except ProjectNotFound:
+            st.warning(f"Project `{st.query_params['project']}` was not found — it may have been deleted.")
+            st.query_params.pop("project", None)
 
 # ── Sidebar — Master Scope Config ──────────────────────────────────────────────
 with st.sidebar:
@@ -285,29 +709,60 @@ with st.sidebar:
     <hr style='border-color:#1E293B; margin: 8px 0 16px 0;'>
     """, unsafe_allow_html=True)
 
+    st.markdown("### 💾 Project")
+    project_names = {p["id"]: p["name"] for p in project_db().list_projects()}
+    if st.session_state.project_choice not in project_names:
+        st.session_state.project = st.session_state.project_choice = None
+    st.selectbox(
+        "Project", [None, *project_names], key="project_choice", on_change=switch_project,
+        format_func=lambda p: "Unsaved session" if p is None else project_names[p], label_visibility="collapsed",
+    )
+    if st.session_state.project is None:
+        new_col, create_col = st.columns([3, 2])
+        new_col.text_input("Project name", key="new_project_name", placeholder="New project name",
+                           label_visibility="collapsed")
+        create_col.button("💾 Save as", on_click=create_project, use_container_width=True)
+    else:
+        st.button("🗑 Delete Project", on_click=delete_project)
+
+    st.markdown("<hr style='border-color:#334155; margin:16px 0;'>", unsafe_allow_html=True)
     st.markdown("### 🗂 Master Scope Configuration")
 
     upload_tab, manual_tab = st.tabs(["📤 Upload CSV", "✏️ Manual Entry"])
 
     with upload_tab:
         st.markdown("<p style='font-size:0.82rem;'>Upload a CSV matching the sample format.</p>", unsafe_allow_html=True)
-        uploaded = st.file_uploader("Master Scope CSV", type=["csv"], label_visibility="collapsed")
-        if uploaded:
+        uploaded = st.file_uploader("Master Scope CSV", type=["csv"], label_visibility="collapsed",
+                                    key=f"scope_upload_{st.session_state.scope_upload_generation}")
+        if uploaded and st.session_state.get("scope_upload_id") != uploaded.file_id:
             try:
-                df = pd.read_csv(uploaded)
-                required = {"Trade", "Item", "Budget_Total"}
-                if required.issubset(set(df.columns)):
-                    st.session_state.master_scope = df
-                    st.success(f"✅ Loaded {len(df)} scope items.")
-                else:
-                    st.error(f"Missing columns: {required - set(df.columns)}")
+                with stage("ingest"):
+                    df, bad_rows = read_scope_csv(uploaded)
+                with stage("partition"):
+                    new_store = ScopeStore(df)
+                st.session_state.plug_rates = carry_plugs(st.session_state.scope_store, new_store)
+                st.session_state.scope_store = new_store
+                st.session_state.scope_upload_id = uploaded.file_id
+                st.session_state.gap_cache.invalidate()
+                st.session_state.line_coverage.clear()
+                st.success(f"✅ Loaded {len(df)} scope items.")
+                if bad_rows:
+                    st.warning(f"Skipped {len(bad_rows)} unusable row(s).")
+                    with st.expander("Skipped rows", expanded=False):
+                        for bad in bad_rows[:200]:
+                            st.markdown(f"<p style='font-size:0.78rem;'>Line {bad.line}: {bad.reason}</p>", unsafe_allow_html=True)
+                        if len(bad_rows) > 200:
+                            st.markdown(f"<p style='font-size:0.78rem;'>… and {len(bad_rows) - 200} more</p>", unsafe_allow_html=True)
+            except ScopeSchemaError as e:
+                st.error(str(e))
             except Exception as e:
                 st.error(f"Parse error: {e}")
 
     with manual_tab:
         st.markdown("<p style='font-size:0.82rem;'>Add individual scope line items.</p>", unsafe_allow_html=True)
         with st.form("manual_scope_form", clear_on_submit=True):
-            m_trade = st.selectbox("Trade", TRADES)
+            m_trade = st.selectbox("Trade", get_trades())
+            m_new_trade = st.text_input("…or a new trade", placeholder="Concrete")
             m_item = st.text_input("Item Description", placeholder="5/8\" Type X GWB")
             m_unit = st.selectbox("Unit", ["SF", "LF", "EA", "CY", "LB", "LS", "HR"])
             m_qty = st.number_input("Quantity", min_value=0.0, value=1000.0, step=100.0)
@@ -315,50 +770,91 @@ with st.sidebar:
             m_desc = st.text_input("Notes (optional)")
             if st.form_submit_button("➕ Add to Scope"):
                 if m_item:
-                    new_row = pd.DataFrame([{
-                        "Trade": m_trade, "Item": m_item, "Unit": m_unit,
+                    _, touched = st.session_state.scope_store.add({
+                        "Trade": m_new_trade.strip() or m_trade, "Item": m_item, "Unit": m_unit,
                         "Quantity": m_qty, "Unit_Cost": m_unit_cost,
                         "Budget_Total": round(m_qty * m_unit_cost, 2),
                         "Description": m_desc,
-                    }])
-                    st.session_state.master_scope = pd.concat(
-                        [st.session_state.master_scope, new_row], ignore_index=True
-                    )
+                    })
+                    apply_scope_edit(touched)
                     st.success(f"Added: {m_item}")
                 else:
                     st.warning("Item description is required.")
 
+        store = st.session_state.scope_store
+        if not store.empty:
+            with st.expander("Edit / Remove Line Items", expanded=False):
+                e_trade = st.selectbox("Trade", store.trades, key="edit_trade")
+                e_frame = store.get(e_trade).frame
+                e_label = st.selectbox(
+                    "Line Item", e_frame.index.tolist(), key="edit_label",
+                    format_func=lambda label: str(e_frame.at[label, "Item"]),
+                )
+                if e_label is not None and e_label in e_frame.index:
+                    e_row = {k: (0.0 if pd.isna(v) else v) for k, v in store.row(e_label).items()}
+                    with st.form(f"edit_scope_form_{e_label}"):
+                        e_item = st.text_input("Item Description", value=str(e_row["Item"]))
+                        e_qty = st.number_input("Quantity", min_value=0.0, value=float(e_row["Quantity"]), step=100.0)
+                        e_unit_cost = st.number_input(
+                            "Unit Cost ($)", min_value=0.0, value=float(e_row["Unit_Cost"]), step=0.05, format="%.2f"
+                        )
+                        e_budget = st.number_input(
+                            "Budget Total ($)", min_value=0.0, value=float(e_row["Budget_Total"]), step=500.0
+                        )
+                        save_col, remove_col = st.columns(2)
+                        with save_col:
+                            save = st.form_submit_button("💾 Save")
+                        with remove_col:
+                            remove = st.form_submit_button("🗑 Remove")
+                    if save and e_item:
+                        apply_scope_edit(store.update(e_label, {
+                            "Item": e_item, "Quantity": e_qty, "Unit_Cost": e_unit_cost, "Budget_Total": e_budget,
+                        }))
+                        st.rerun()
+                    elif remove:
+                        apply_scope_edit(store.remove(e_label))
+                        st.session_state.plug_rates = st.session_state.plug_rates.drop(e_label, errors="ignore")
+                        st.rerun()
+
     # Scope Summary
-    if not st.session_state.master_scope.empty:
+    store = st.session_state.scope_store
+    if not store.empty:
         st.markdown("<hr style='border-color:#334155; margin:16px 0;'>", unsafe_allow_html=True)
         st.markdown("### 📊 Scope Summary")
-        df = st.session_state.master_scope
-        total_budget = df["Budget_Total"].astype(float).sum()
-        st.metric("Total Budget", fmt_currency(total_budget))
-        st.metric("Line Items", len(df))
-        st.metric("Trades Covered", df["Trade"].nunique())
+        st.metric("Total Budget", fmt_currency(store.budget))
+        st.metric("Line Items", len(store))
+        st.metric("Trades Covered", len(store.trades))
 
         if st.button("🗑 Clear Master Scope"):
-            st.session_state.master_scope = pd.DataFrame(
-                columns=["Trade", "Item", "Unit", "Quantity", "Unit_Cost", "Budget_Total", "Description"]
-            )
+            st.session_state.scope_store = ScopeStore()
+            st.session_state.plug_rates = pd.Series(dtype=float)
+            st.session_state.gap_cache.invalidate()
+            st.session_state.line_coverage.clear()
             st.rerun()
 
     st.markdown("<hr style='border-color:#334155; margin:16px 0;'>", unsafe_allow_html=True)
     st.markdown("### ⚙️ Gap Detection Settings")
     st.markdown("<p style='font-size:0.79rem; color:#94A3B8;'>Plug costs override budget values for missing items.</p>", unsafe_allow_html=True)
 
-    scope_df = st.session_state.master_scope
-    if not scope_df.empty:
-        with st.expander("Set Plug Costs", expanded=False):
-            for _, row in scope_df.iterrows():
-                key = f"{row['Trade']}::{row['Item']}"
-                current = st.session_state.plug_rates.get(key, float(row.get("Budget_Total", 0)))
-                new_val = st.number_input(
-                    f"{row['Item'][:30]}", value=current, min_value=0.0,
-                    step=500.0, key=f"plug_{key}", label_visibility="visible"
-                )
-                st.session_state.plug_rates[key] = new_val
+    st.radio(
+        "Item matching", [MATCH_SUBSTRING, MATCH_SIMILARITY], key="match_mode", horizontal=True,
+        help="Substring: a line covers items it contains or is contained in. "
+             "Similarity: a line covers items whose wording scores at or above the threshold "
+             "(character trigram TF-IDF; tolerant of rewording and abbreviations like GWB).",
+    )
+    if st.session_state.match_mode == MATCH_SIMILARITY:
+        st.slider("Similarity threshold", 0.3, 0.95, DEFAULT_THRESHOLD, 0.05, key="match_threshold")
+    st.checkbox(
+        "Quantity-aware partial gaps", key="match_quantities",
+        help='A line quoting a quantity ("GWB 6,000 SF") covers only that much of an item; '
+             "the rest of the item's Quantity is plugged at its plug cost per unit.",
+    )
+
+    if not st.session_state.scope_store.empty:
+        if st.button("🧮 Edit Plug Costs", use_container_width=True):
+            with stage("plug editor"):
+                plug_editor()
+        st.caption(f"{len(st.session_state.plug_rates):,} plug override(s) set")
 
 # ── Main Header ─────────────────────────────────────────────────────────────────
 st.markdown("""
@@ -377,7 +873,7 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Scope load prompt
-if st.session_state.master_scope.empty:
+if st.session_state.scope_store.empty:
     st.markdown("""
     <div class='card' style='border-left:3px solid #38BDF8; text-align:center; padding:40px;'>
         <div style='font-size:2.5rem; margin-bottom:12px;'>📋</div>
@@ -389,293 +885,320 @@ if st.session_state.master_scope.empty:
     </div>
     """, unsafe_allow_html=True)
 
-# ── Trade Tabs ──────────────────────────────────────────────────────────────────
-tab_objects = st.tabs([f"🔧 {t}" for t in TRADES] + ["📈 Analytics"])
-
-for tab_idx, trade in enumerate(TRADES):
-    with tab_objects[tab_idx]:
-        trade_scope = get_trade_scope(trade)
-        trade_budget = trade_scope["Budget_Total"].astype(float).sum() if not trade_scope.empty else 0
-
-        st.markdown(f"""
-        <div class='trade-header'>
-            <h3>{trade} — Subcontractor Bid Leveling</h3>
-            <p>Trade Budget: <strong style='color:#F8FAFC;'>{fmt_currency(trade_budget)}</strong>
-               &nbsp;·&nbsp; {len(trade_scope)} scope items</p>
-        </div>
-        """, unsafe_allow_html=True)
+# ── Trade View ──────────────────────────────────────────────────────────────────
+def render_trade(trade: str):
+    trade_part = get_trade_partition(trade)
+    trade_scope = trade_part.frame
+    trade_budget = trade_part.budget
 
-        # ── Subcontractor Input ──
-        st.markdown("#### 📥 Subcontractor Bids")
-        sub_cols = st.columns(3)
-        sub_colors = {"A": "#38BDF8", "B": "#A78BFA", "C": "#34D399"}
-        sub_labels = {"A": "Sub A", "B": "Sub B", "C": "Sub C"}
-
-        for sub_key, col in zip(["A", "B", "C"], sub_cols):
-            with col:
-                color = sub_colors[sub_key]
-                st.markdown(f"""
-                <div style='border-top:2px solid {color}; background:#1E293B; border-radius:0 0 8px 8px;
-                            padding:16px; border:1px solid #334155; border-top:3px solid {color}; border-radius:8px;'>
-                    <div style='color:{color}; font-weight:700; font-size:0.85rem; letter-spacing:0.08em;
-                                text-transform:uppercase; margin-bottom:12px;'>● Subcontractor {sub_key}</div>
-                """, unsafe_allow_html=True)
+    st.markdown(f"""
+    <div class='trade-header'>
+        <h3>{trade} — Subcontractor Bid Leveling</h3>
+        <p>Trade Budget: <strong style='color:#F8FAFC;'>{fmt_currency(trade_budget)}</strong>
+           &nbsp;·&nbsp; {trade_part.count} scope items</p>
+    </div>
+    """, unsafe_allow_html=True)
 
-                name = st.text_input(
-                    "Company Name", key=f"name_{trade}_{sub_key}",
-                    value=st.session_state.subs[trade][sub_key]["name"],
-                    placeholder=f"Company {sub_key}"
-                )
-                total = st.number_input(
-                    "Bid Total ($)", key=f"total_{trade}_{sub_key}",
-                    value=st.session_state.subs[trade][sub_key]["total"],
-                    min_value=0.0, step=1000.0, format="%.0f"
-                )
+    # ── Subcontractor Input ──
+    # One roster table plus one inclusions/exclusions editor for the selected
+    # bidder, so the widget count stays fixed however many subs bid.
+    st.markdown("#### 📥 Subcontractor Bids")
+    book = st.session_state.bids
+    roster_col, scope_col = st.columns([3, 2])
+
+    with roster_col:
+        roster = st.data_editor(
+            book.roster(trade),
+            key=f"roster_{trade}_{book.version(trade)}",
+            use_container_width=True,
+            column_config={
+                "Name": st.column_config.TextColumn("Company Name"),
+                "Bid Total": st.column_config.NumberColumn("Bid Total ($)", min_value=0.0, step=1000.0, format="$%.0f"),
+            },
+        )
+        book.set_roster(trade, roster)
+        if st.button("➕ Add Bidder", key=f"add_sub_{trade}"):
+            book.add(trade)
+            st.rerun()
 
-                inclusions_raw = st.text_area(
+    with scope_col:
+        sub_keys = book.subs(trade)
+        sub_key = st.selectbox(
+            "Bidder Scope", sub_keys, key=f"scope_sub_{trade}",
+            format_func=lambda k: f"{k} · {book.display_name(trade, k)}",
+        )
+        if sub_key is not None:
+            bid = book.bid(trade, sub_key)
+            # Typing stays in the browser; lines are committed (and re-leveled) on Apply.
+            with st.form(f"bid_lines_{trade}_{sub_key}", border=False):
+                st.text_area(
                     "✅ Inclusions (one per line)",
                     key=f"inc_{trade}_{sub_key}",
-                    value="\n".join(st.session_state.subs[trade][sub_key]["inclusions"]),
+                    value="\n".join(bid["inclusions"]),
                     height=100,
-                    placeholder="5/8 Type X GWB\nMetal Stud Framing\nTape & Finish..."
+                    placeholder="5/8 Type X GWB\nMetal Stud Framing\nTape & Finish...",
                 )
-                exclusions_raw = st.text_area(
+                st.text_area(
                     "❌ Exclusions (one per line)",
                     key=f"exc_{trade}_{sub_key}",
-                    value="\n".join(st.session_state.subs[trade][sub_key]["exclusions"]),
+                    value="\n".join(bid["exclusions"]),
                     height=70,
-                    placeholder="Acoustical work\nPainting..."
+                    placeholder="Acoustical work\nPainting...",
+                )
+                st.form_submit_button("Apply Scope Lines", on_click=commit_bid_lines, args=(trade, sub_key))
+            diff = st.session_state.line_diffs.get(trade)
+            if diff is not None and diff[0] == sub_key and match_threshold() is None and not match_quantities():
+                st.caption(f"Last apply: +{diff[1]} / −{diff[2]} line(s) · coverage changed on {diff[3]} item(s)")
+            if len(sub_keys) > 1 and st.button("🗑 Remove Bidder", key=f"remove_sub_{trade}"):
+                book.remove(trade, sub_key)
+                drop_line_coverage(trade, sub_key)
+                st.rerun()
+
+    # ── Gap Detection + Adjusted Totals ──
+    result = get_leveling(trade)
+
+    st.markdown("<hr style='border-color:#334155; margin:20px 0;'>", unsafe_allow_html=True)
+    st.markdown("#### 🔍 Gap Detection & Adjusted Bid Analysis")
+
+    if trade_scope.empty:
+        st.markdown("""
+        <div class='card' style='text-align:center; padding:24px;'>
+            <p style='color:#94A3B8;'>No scope items for this trade. Add items via the sidebar.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        # Summary metrics, four per row
+        subs = list(result.subs.values())
+        metric_cols = []
+        for _ in range(len(subs) // 4 + 1):
+            metric_cols += st.columns(4)
+        for idx, sub in enumerate(subs):
+            adj = sub.adjusted_total
+            n_gaps = len(sub.missing_items)
+
+            with metric_cols[idx]:
+                delta_pct = result.delta_pct(sub)
+                delta_str = f"{delta_pct:+.1f}% vs Budget"
+                st.metric(
+                    label=sub.name,
+                    value=fmt_currency(adj) if adj > 0 else "—",
+                    delta=f"{n_gaps} gap(s) · {delta_str}" if adj > 0 else None,
+                    delta_color="inverse" if delta_pct > 5 else "normal"
                 )
 
-                # Persist to session state
-                st.session_state.subs[trade][sub_key]["name"] = name
-                st.session_state.subs[trade][sub_key]["total"] = total
-                st.session_state.subs[trade][sub_key]["inclusions"] = [
-                    l.strip() for l in inclusions_raw.split("\n") if l.strip()
-                ]
-                st.session_state.subs[trade][sub_key]["exclusions"] = [
-                    l.strip() for l in exclusions_raw.split("\n") if l.strip()
-                ]
-
-                st.markdown("</div>", unsafe_allow_html=True)
-
-        # ── Gap Detection + Adjusted Totals ──
-        st.markdown("<hr style='border-color:#334155; margin:20px 0;'>", unsafe_allow_html=True)
-        st.markdown("#### 🔍 Gap Detection & Adjusted Bid Analysis")
-
-        if trade_scope.empty:
-            st.markdown("""
-            <div class='card' style='text-align:center; padding:24px;'>
-                <p style='color:#94A3B8;'>No scope items for this trade. Add items via the sidebar.</p>
+        with metric_cols[len(subs)]:
+            st.metric("Trade Budget", fmt_currency(trade_budget), delta="Baseline")
+
+        # Lowest adjusted bid highlight
+        winner = result.winner()
+        if winner:
+            st.markdown(f"""
+            <div style='background:rgba(56,189,248,0.07); border:1px solid #38BDF8; border-radius:8px;
+                        padding:10px 18px; margin:12px 0; display:inline-flex; align-items:center; gap:10px;'>
+                <span style='color:#38BDF8; font-weight:700;'>⚡ Lowest Adjusted Bid</span>
+                <span class='winner-badge'>{winner.name}</span>
+                <span style='color:#F8FAFC; font-weight:700;'>{fmt_currency(winner.adjusted_total)}</span>
             </div>
             """, unsafe_allow_html=True)
-        else:
-            # Build comparison table
-            any_bid = any(st.session_state.subs[trade][k]["total"] > 0 for k in ["A", "B", "C"])
-
-            # Summary metrics row
-            metric_cols = st.columns(4)
-            adjusted_totals = {}
-            for idx, sub_key in enumerate(["A", "B", "C"]):
-                sub = st.session_state.subs[trade][sub_key]
-                adj = get_adjusted_total(trade, sub_key)
-                adjusted_totals[sub_key] = adj
-                name = sub["name"] or f"Sub {sub_key}"
-                gaps = detect_gaps(trade, sub_key)
-                n_gaps = len(gaps["missing_items"])
-
-                with metric_cols[idx]:
-                    delta_pct = pct_delta(adj, trade_budget) if trade_budget else 0
-                    delta_str = f"{delta_pct:+.1f}% vs Budget"
-                    st.metric(
-                        label=name if name else f"Subcontractor {sub_key}",
-                        value=fmt_currency(adj) if adj > 0 else "—",
-                        delta=f"{n_gaps} gap(s) · {delta_str}" if adj > 0 else None,
-                        delta_color="inverse" if delta_pct > 5 else "normal"
-                    )
-
-            with metric_cols[3]:
-                st.metric("Trade Budget", fmt_currency(trade_budget), delta="Baseline")
-
-            # Lowest adjusted bid highlight
-            active_subs = {k: v for k, v in adjusted_totals.items()
-                           if st.session_state.subs[trade][k]["total"] > 0}
-            if active_subs:
-                winner = min(active_subs, key=active_subs.get)
-                winner_name = st.session_state.subs[trade][winner]["name"] or f"Sub {winner}"
-                st.markdown(f"""
-                <div style='background:rgba(56,189,248,0.07); border:1px solid #38BDF8; border-radius:8px;
-                            padding:10px 18px; margin:12px 0; display:inline-flex; align-items:center; gap:10px;'>
-                    <span style='color:#38BDF8; font-weight:700;'>⚡ Lowest Adjusted Bid</span>
-                    <span class='winner-badge'>{winner_name}</span>
-                    <span style='color:#F8FAFC; font-weight:700;'>{fmt_currency(adjusted_totals[winner])}</span>
-                </div>
-                """, unsafe_allow_html=True)
 
-            # Scope item gap table
-            st.markdown("##### 📋 Scope Item Coverage Matrix")
-
-            table_rows = []
-            for _, row in trade_scope.iterrows():
-                item = row["Item"]
-                budget = float(row.get("Budget_Total", 0))
-                r = {"Scope Item": item, "Budget": fmt_currency(budget)}
-
-                for sub_key in ["A", "B", "C"]:
-                    sub = st.session_state.subs[trade][sub_key]
-                    name = sub["name"] or f"Sub {sub_key}"
-                    inclusions = [i.strip().lower() for i in sub["inclusions"]]
-                    excluded = [e.strip().lower() for e in sub["exclusions"]]
-
-                    item_lower = item.lower()
-                    is_excluded = any(item_lower in ex or ex in item_lower for ex in excluded)
-                    is_included = any(item_lower in inc or inc in item_lower for inc in inclusions) if inclusions else False
-
-                    if is_excluded:
-                        status = "❌ EXCLUDED"
-                    elif is_included:
-                        status = "✅ Included"
-                    elif sub["total"] == 0:
-                        status = "—"
-                    else:
-                        status = "⚠️ GAP"
-
-                    r[name] = status
-                table_rows.append(r)
-
-            if table_rows:
-                gap_df = pd.DataFrame(table_rows)
-
-                def color_status(val):
-                    if "GAP" in str(val):
-                        return "color: #FB7185; font-weight: bold;"
-                    elif "✅" in str(val):
-                        return "color: #34D399;"
-                    elif "❌" in str(val):
-                        return "color: #F97316;"
-                    return "color: #94A3B8;"
-
-                styled = gap_df.style.map(color_status, subset=[
-                    c for c in gap_df.columns if c not in ["Scope Item", "Budget"]
-                ])
-                st.dataframe(styled, use_container_width=True, hide_index=True)
-
-            # Per-sub gap detail
-            st.markdown("##### 🚨 Critical Gap Details")
-            gap_detail_cols = st.columns(3)
-            for idx, sub_key in enumerate(["A", "B", "C"]):
-                with gap_detail_cols[idx]:
-                    sub = st.session_state.subs[trade][sub_key]
-                    if sub["total"] == 0:
-                        continue
-                    name = sub["name"] or f"Sub {sub_key}"
-                    gaps = detect_gaps(trade, sub_key)
-                    if not gaps["missing_items"]:
-                        st.markdown(f"""
-                        <div style='background:rgba(52,211,153,0.07); border:1px solid rgba(52,211,153,0.3);
-                                    border-radius:8px; padding:12px 16px;'>
-                            <span style='color:#34D399; font-weight:700;'>✓ {name}</span>
-                            <p style='color:#94A3B8; font-size:0.82rem; margin:4px 0 0 0;'>No critical gaps detected.</p>
+        # Scope item gap table
+        st.markdown("##### 📋 Scope Item Coverage Matrix")
+
+        # Status codes for the whole trade in one vectorized step, shown as
+        # categorical columns; only the visible page is styled.
+        with stage("coverage matrix", items=len(result.scope)):
+            codes = result.status_matrix()
+            rows = np.arange(len(codes))
+            if st.toggle("Only items with gaps", key=f"gaps_only_{trade}"):
+                rows = np.flatnonzero(np.isin(codes, (CODE_GAP, CODE_PARTIAL)).any(axis=1))
+            pages = max(1, -(-len(rows) // COVERAGE_PAGE_ROWS))
+            if pages > 1:
+                page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=f"coverage_page_{trade}")
+                start = (min(page, pages) - 1) * COVERAGE_PAGE_ROWS
+                st.caption(f"Items {start + 1:,}–{min(start + COVERAGE_PAGE_ROWS, len(rows)):,} of {len(rows):,}")
+                rows = rows[start:start + COVERAGE_PAGE_ROWS]
+
+            gap_df = pd.DataFrame({
+                "Scope Item": result.scope["Item"].to_numpy()[rows],
+                "Budget": result.scope["Budget_Total"].to_numpy(dtype=float)[rows],
+                **{
+                    label: pd.Categorical.from_codes(codes[rows, j], dtype=STATUS_DTYPE)
+                    for j, label in enumerate(sub_labels(subs))
+                },
+            })
+            styled = (gap_df.style
+                      .map(STATUS_STYLES.get, subset=list(gap_df.columns[2:]))
+                      .format(fmt_currency, subset=["Budget"]))
+            st.dataframe(styled, use_container_width=True, hide_index=True)
+
+        # Per-sub gap detail
+        st.markdown("##### 🚨 Critical Gap Details")
+        bidders = list(result.active.values())
+        gap_detail_cols = []
+        for _ in range((len(bidders) + 2) // 3):
+            gap_detail_cols += st.columns(3)
+        for idx, sub in enumerate(bidders):
+            with gap_detail_cols[idx]:
+                name = sub.name
+                if not sub.missing_items and not sub.partial_items:
+                    st.markdown(f"""
+                    <div style='background:rgba(52,211,153,0.07); border:1px solid rgba(52,211,153,0.3);
+                                border-radius:8px; padding:12px 16px;'>
+                        <span style='color:#34D399; font-weight:700;'>✓ {name}</span>
+                        <p style='color:#94A3B8; font-size:0.82rem; margin:4px 0 0 0;'>No critical gaps detected.</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                else:
+                    partial_note = f" · {len(sub.partial_items)} Partial" if sub.partial_items else ""
+                    gap_html = f"""
+                    <div style='background:rgba(251,113,133,0.06); border:1px solid rgba(251,113,133,0.25);
+                                border-radius:8px; padding:12px 16px;'>
+                        <div style='color:#FB7185; font-weight:700; margin-bottom:8px;'>
+                            ⚠ {name} — {len(sub.missing_items)} Gap(s){partial_note}
+                        </div>
+                    """
+                    for g in sub.missing_items:
+                        gap_html += f"""
+                        <div style='display:flex; justify-content:space-between; align-items:center;
+                                    padding:4px 0; border-bottom:1px solid rgba(51,65,85,0.5);'>
+                            <span style='color:#FB7185; font-size:0.8rem; font-weight:600;'>{g["item"][:28]}</span>
+                            <span style='color:#F97316; font-size:0.78rem; font-weight:700;'>+{fmt_currency(g["plug"])}</span>
                         </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        gap_html = f"""
-                        <div style='background:rgba(251,113,133,0.06); border:1px solid rgba(251,113,133,0.25);
-                                    border-radius:8px; padding:12px 16px;'>
-                            <div style='color:#FB7185; font-weight:700; margin-bottom:8px;'>
-                                ⚠ {name} — {len(gaps["missing_items"])} Gap(s)
-                            </div>
                         """
-                        for g in gaps["missing_items"]:
-                            gap_html += f"""
-                            <div style='display:flex; justify-content:space-between; align-items:center;
-                                        padding:4px 0; border-bottom:1px solid rgba(51,65,85,0.5);'>
-                                <span style='color:#FB7185; font-size:0.8rem; font-weight:600;'>{g["item"][:28]}</span>
-                                <span style='color:#F97316; font-size:0.78rem; font-weight:700;'>+{fmt_currency(g["plug"])}</span>
-                            </div>
-                            """
+                    for g in sub.partial_items:
                         gap_html += f"""
-                            <div style='margin-top:8px; padding-top:6px; text-align:right;'>
-                                <span style='color:#94A3B8; font-size:0.78rem;'>Plug Total: </span>
-                                <span style='color:#FB7185; font-weight:800;'>{fmt_currency(gaps["gap_cost"])}</span>
-                            </div>
+                        <div style='display:flex; justify-content:space-between; align-items:center;
+                                    padding:4px 0; border-bottom:1px solid rgba(51,65,85,0.5);'>
+                            <span style='color:#FBBF24; font-size:0.8rem; font-weight:600;'>◐ {g["item"][:22]}
+                                <span style='color:#94A3B8; font-weight:400;'>−{g["short"]:,.0f} {g["unit"]}</span></span>
+                            <span style='color:#F97316; font-size:0.78rem; font-weight:700;'>+{fmt_currency(g["plug"])}</span>
                         </div>
                         """
-                        st.markdown(gap_html, unsafe_allow_html=True)
-
-            # ── Bar Chart ──
-            active_any = any(st.session_state.subs[trade][k]["total"] > 0 for k in ["A", "B", "C"])
-            if active_any:
-                st.markdown("<hr style='border-color:#334155; margin:20px 0;'>", unsafe_allow_html=True)
-                st.markdown("#### 📊 Bid Comparison Chart")
-
-                chart_data = {
-                    "Subcontractor": [],
-                    "Bid Total": [],
-                    "Adjusted Total": [],
-                    "Color": [],
-                }
-                colors_list = [COLORS["sub_a"], COLORS["sub_b"], COLORS["sub_c"]]
-
-                bar_fig = go.Figure()
-                names_list = []
-                bids_list = []
-                adj_list = []
-
-                for si, sub_key in enumerate(["A", "B", "C"]):
-                    sub = st.session_state.subs[trade][sub_key]
-                    if sub["total"] == 0:
-                        continue
-                    name = sub["name"] or f"Sub {sub_key}"
-                    adj = get_adjusted_total(trade, sub_key)
-                    names_list.append(name)
-                    bids_list.append(sub["total"])
-                    adj_list.append(adj)
-
-                    bar_fig.add_trace(go.Bar(
-                        name=f"{name} (Raw)",
-                        x=[name],
-                        y=[sub["total"]],
-                        marker_color=colors_list[si],
-                        marker_line=dict(width=0),
-                        opacity=0.7,
-                        text=[fmt_currency(sub["total"])],
-                        textposition="outside",
-                        textfont=dict(color=colors_list[si], size=11),
-                    ))
-                    bar_fig.add_trace(go.Bar(
-                        name=f"{name} (Adjusted)",
-                        x=[name],
-                        y=[adj],
-                        marker_color=colors_list[si],
-                        marker_line=dict(color="#FB7185", width=2),
-                        opacity=1.0,
-                        text=[fmt_currency(adj)],
-                        textposition="outside",
-                        textfont=dict(color="#FB7185", size=11, family="Inter"),
-                    ))
-
+                    gap_html += f"""
+                        <div style='margin-top:8px; padding-top:6px; text-align:right;'>
+                            <span style='color:#94A3B8; font-size:0.78rem;'>Plug Total: </span>
+                            <span style='color:#FB7185; font-weight:800;'>{fmt_currency(sub.gap_cost)}</span>
+                        </div>
+                    </div>
+                    """
+                    st.markdown(gap_html, unsafe_allow_html=True)
+
+        # ── Bar Chart ──
+        if result.active:
+            st.markdown("<hr style='border-color:#334155; margin:20px 0;'>", unsafe_allow_html=True)
+            st.markdown("#### 📊 Bid Comparison Chart")
+
+            bidders = [(label, color, sub) for label, color, sub
+                       in zip(sub_labels(subs), bidder_colors(len(subs)), subs) if sub.has_bid]
+            names = [label for label, _, _ in bidders]
+            colors = [color for _, color, _ in bidders]
+            raw = np.array([sub.total for _, _, sub in bidders], dtype=float)
+            adjusted = np.array([sub.adjusted_total for _, _, sub in bidders], dtype=float)
+
+            def build_bar():
+                # One trace per series, not per bidder: raw and adjusted bars
+                # are grouped side by side under each bidder's name.
+                fig = go.Figure(
+                    data=[
+                        go.Bar(
+                            name="Raw Bid", x=names, y=raw, marker_color=colors, marker_line=dict(width=0),
+                            opacity=0.7, text=[fmt_currency(v) for v in raw], textposition="outside",
+                            textfont=dict(color=colors, size=11),
+                        ),
+                        go.Bar(
+                            name="Adjusted (with gap plugs)", x=names, y=adjusted, marker_color=colors,
+                            marker_line=dict(color="#FB7185", width=2), opacity=1.0,
+                            text=[fmt_currency(v) for v in adjusted], textposition="outside",
+                            textfont=dict(color="#FB7185", size=11, family="Inter"),
+                        ),
+                    ],
+                    layout=dict(CHART_SKELETONS["trade_bar"], title=chart_title(f"{trade} — Raw vs. Adjusted Bid Comparison")),
+                )
                 # Budget line
-                bar_fig.add_hline(
+                fig.add_hline(
                     y=trade_budget, line_dash="dot", line_color=COLORS["budget"],
                     line_width=2,
                     annotation_text=f"Budget: {fmt_currency(trade_budget)}",
                     annotation_font_color=COLORS["budget"],
                 )
+                return fig
 
-                bar_fig.update_layout(
-                    **PLOTLY_TEMPLATE["layout"],
-                    title=f"{trade} — Raw vs. Adjusted Bid Comparison",
-                    barmode="group",
-                    showlegend=True,
-                    height=420,
-                    yaxis_tickprefix="$",
-                    yaxis_tickformat=",",
-                )
-                st.plotly_chart(bar_fig, use_container_width=True)
+            bar_fig = cached_figure(
+                f"trade_bar::{trade}", data_fingerprint(names, colors, raw, adjusted, trade_budget), build_bar
+            )
+            show_figure(bar_fig)
+
+        if len(result.active) > 1 and st.toggle("🎯 Award sensitivity (what-if plug sweep)", key=f"sensitivity_{trade}"):
+            render_sensitivity(trade, result)
+
+# ── Award Sensitivity ───────────────────────────────────────────────────────────
+SCENARIO_COUNTS = [1_000, 5_000, 10_000]
+TORNADO_ITEMS = 10
+
+def render_sensitivity(trade: str, result: TradeResult):
+    """Win shares and a tornado of the trade's award under random plug costs within a band."""
+    c1, c2, c3 = st.columns(3)
+    band = c1.slider("Plug band (±%)", 5, 50, 20, 5, key=f"sens_band_{trade}") / 100
+    n = c2.selectbox("Scenarios", SCENARIO_COUNTS, key=f"sens_count_{trade}", format_func=lambda v: f"{v:,}")
+    by = c3.radio("Vary plugs", ["item", "trade"], key=f"sens_by_{trade}", horizontal=True,
+                  format_func={"item": "Per item", "trade": "Whole trade"}.get)
+
+    with stage("scenarios", items=n):
+        start = time.perf_counter()
+        model = ScenarioModel.build({trade: result}, st.session_state.plug_rates, by=by)
+        run = model.run(model.monte_carlo(n, band, seed=0))
+        stability = run.stability()
+        tornado = model.tornado(band).head(TORNADO_ITEMS)
+        elapsed = (time.perf_counter() - start) * 1000
+
+    flips = run.flip_rate().iloc[0]
+    st.caption(
+        f"Winner changes in {flips:.1%} of {n:,} scenarios with every plug drawn within ±{band:.0%} "
+        f"of its current cost · {elapsed:,.0f} ms"
+    )
+    st.dataframe(
+        pd.DataFrame({
+            "Bidder": stability["bidder"],
+            "Adjusted": stability["base_adjusted"],
+            "Wins": stability["win_share"] * 100,
+            "P5": stability["p5"],
+            "Median": stability["median"],
+            "P95": stability["p95"],
+        }),
+        use_container_width=True, hide_index=True,
+        column_config={
+            "Wins": st.column_config.ProgressColumn("Wins (% of scenarios)", format="%.1f%%", min_value=0, max_value=100),
+            **{c: st.column_config.NumberColumn(format="dollar") for c in ("Adjusted", "P5", "Median", "P95")},
+        },
+    )
+    if tornado.empty:
+        return
+    labels = [g.split("::", 1)[-1] for g in tornado["group"]]
+    base_margin = float(tornado["base_margin"].iloc[0])
+    low = tornado["margin_low"].to_numpy(dtype=float) - base_margin
+    high = tornado["margin_high"].to_numpy(dtype=float) - base_margin
+
+    def build_tornado():
+        fig = go.Figure(
+            data=[
+                go.Bar(name=f"Plug −{band:.0%}", y=labels, x=low, orientation="h", marker_color=COLORS["sub_a"]),
+                go.Bar(name=f"Plug +{band:.0%}", y=labels, x=high, orientation="h", marker_color=COLORS["gap"]),
+            ],
+            layout=dict(
+                CHART_SKELETONS["tornado"],
+                title=chart_title(f"{trade} — Change in {tornado['base_winner'].iloc[0]}'s winning margin"),
+            ),
+        )
+        # Left of this line the current winner loses the award.
+        fig.add_vline(x=-base_margin, line_dash="dot", line_color=COLORS["budget"], line_width=2)
+        return fig
 
-# ── Analytics Tab ───────────────────────────────────────────────────────────────
-with tab_objects[-1]:
+    show_figure(cached_figure(
+        f"tornado::{trade}", data_fingerprint(labels, low, high, base_margin, band), build_tornado
+    ))
+
+# ── Analytics View ──────────────────────────────────────────────────────────────
+def render_analytics(trades: list[str]):
     st.markdown("""
     <div class='trade-header'>
         <h3>Cross-Trade Analytics & Risk Intelligence</h3>
@@ -683,169 +1206,115 @@ with tab_objects[-1]:
     </div>
     """, unsafe_allow_html=True)
 
-    df_scope = st.session_state.master_scope
-
-    if df_scope.empty:
+    if st.session_state.scope_store.empty:
         st.markdown("""
         <div class='card' style='text-align:center; padding:40px;'>
             <p style='color:#94A3B8;'>Load a Master Scope to enable analytics.</p>
         </div>
         """, unsafe_allow_html=True)
     else:
+        leveling = {trade: get_leveling(trade) for trade in trades}
+
         # ── Heatmap: Bid Divergence ──
         st.markdown("#### 🌡 Bid Divergence Heatmap")
         st.markdown("<p style='color:#94A3B8; font-size:0.85rem;'>Shows % deviation of each sub's adjusted bid vs. trade budget. Red = divergent (high risk). Green = tight.</p>", unsafe_allow_html=True)
 
-        heatmap_trades = []
-        heatmap_subs = []
-        heatmap_values = []
-        heatmap_text = []
-
-        sub_names = {k: f"Sub {k}" for k in ["A", "B", "C"]}
-        for trade in TRADES:
-            scope = get_trade_scope(trade)
-            budget = scope["Budget_Total"].astype(float).sum() if not scope.empty else 0
-            for sub_key in ["A", "B", "C"]:
-                sub = st.session_state.subs[trade][sub_key]
-                name = sub["name"] or f"Sub {sub_key}"
-                sub_names[sub_key] = name
-                adj = get_adjusted_total(trade, sub_key) if sub["total"] > 0 else None
-                if adj is not None and budget > 0:
-                    delta_pct = pct_delta(adj, budget)
-                else:
-                    delta_pct = None
-                heatmap_trades.append(trade)
-                heatmap_subs.append(name)
-                heatmap_values.append(round(delta_pct, 1) if delta_pct is not None else 0)
-                heatmap_text.append(
-                    f"{delta_pct:+.1f}%" if delta_pct is not None else "No bid"
-                )
-
-        heat_df = pd.DataFrame({
-            "Trade": heatmap_trades,
-            "Sub": heatmap_subs,
-            "Delta": heatmap_values,
-            "Text": heatmap_text,
-        })
+        divergence = divergence_matrix(leveling)
+        heat_text = np.where(
+            np.isnan(divergence.delta),
+            np.where(divergence.present, "No bid", ""),
+            np.char.mod("%+.1f%%", np.nan_to_num(divergence.delta)),
+        )
+        # Cells with a sub but no bid sit at the neutral midpoint; absent cells stay blank.
+        heat_z = np.where(divergence.present, np.nan_to_num(divergence.delta.round(1)), np.nan)
+
+        def build_heatmap():
+            return go.Figure(
+                data=go.Heatmap(
+                    z=heat_z,
+                    x=divergence.trades,
+                    y=divergence.bidders,
+                    text=heat_text,
+                    texttemplate="%{text}",
+                    textfont=dict(size=13, color="#F8FAFC", family="Inter"),
+                    colorscale=HEATMAP_COLORSCALE,
+                    zmid=0,
+                    zmin=-20,
+                    zmax=20,
+                    showscale=True,
+                    colorbar=dict(
+                        title=dict(text="% vs Budget", font=dict(color="#94A3B8")),
+                        tickfont=dict(color="#94A3B8"),
+                        bordercolor="#334155",
+                        bgcolor="#1E293B",
+                    ),
+                    hovertemplate="<b>%{y}</b> — %{x}<br>Delta: %{text}<extra></extra>",
+                ),
+                layout=dict(CHART_SKELETONS["heatmap"], title=chart_title("Bid Risk Heatmap: % Delta vs. Budget by Trade")),
+            )
 
-        pivot = heat_df.pivot_table(index="Sub", columns="Trade", values="Delta", aggfunc="first")
-        text_pivot = heat_df.pivot_table(index="Sub", columns="Trade", values="Text", aggfunc="first")
-
-        heat_fig = go.Figure(data=go.Heatmap(
-            z=pivot.values,
-            x=pivot.columns.tolist(),
-            y=pivot.index.tolist(),
-            text=text_pivot.values,
-            texttemplate="%{text}",
-            textfont=dict(size=13, color="#F8FAFC", family="Inter"),
-            colorscale=[
-                [0.0, "#34D399"],    # tight — green
-                [0.4, "#FBBF24"],    # moderate — amber
-                [0.7, "#FB923C"],    # elevated — orange
-                [1.0, "#FB7185"],    # divergent — red
-            ],
-            zmid=0,
-            zmin=-20,
-            zmax=20,
-            showscale=True,
-            colorbar=dict(
-                title=dict(text="% vs Budget", font=dict(color="#94A3B8")),
-                tickfont=dict(color="#94A3B8"),
-                bordercolor="#334155",
-                bgcolor="#1E293B",
-            ),
-            hovertemplate="<b>%{y}</b> — %{x}<br>Delta: %{text}<extra></extra>",
-        ))
-        heat_fig.update_layout(
-            **PLOTLY_TEMPLATE["layout"],
-            title="Bid Risk Heatmap: % Delta vs. Budget by Trade",
-            height=360,
-            xaxis=dict(side="bottom", tickfont=dict(color="#94A3B8", size=12)),
-            yaxis=dict(tickfont=dict(color="#94A3B8", size=12)),
+        heat_fig = cached_figure(
+            "heatmap", data_fingerprint(divergence.trades, divergence.bidders, heat_z, heat_text), build_heatmap
         )
-        st.plotly_chart(heat_fig, use_container_width=True)
+        show_figure(heat_fig)
 
         # ── Cross-Trade Grouped Bar ──
         st.markdown("#### 📊 Cross-Trade Budget vs. Adjusted Bids")
 
-        sub_colors_list = [COLORS["sub_a"], COLORS["sub_b"], COLORS["sub_c"]]
-        ct_fig = go.Figure()
-
-        # Budget bars
-        budgets = []
-        trade_labels = []
-        for trade in TRADES:
-            scope = get_trade_scope(trade)
-            budget = scope["Budget_Total"].astype(float).sum() if not scope.empty else 0
-            budgets.append(budget)
-            trade_labels.append(trade)
-
-        ct_fig.add_trace(go.Bar(
-            name="Budget",
-            x=trade_labels,
-            y=budgets,
-            marker_color=COLORS["budget"],
-            opacity=0.6,
-            marker_line=dict(width=0),
-        ))
-
-        for si, sub_key in enumerate(["A", "B", "C"]):
+        sub_keys = list(dict.fromkeys(k for trade in trades for k in leveling[trade].subs))
+        sub_colors_list = bidder_colors(len(sub_keys))
+        budgets = np.array([leveling[trade].budget for trade in trades], dtype=float)
+
+        # One series per sub key, dropped if that sub has no bid in any trade.
+        series = []
+        for si, sub_key in enumerate(sub_keys):
             sub_adj = []
-            for trade in TRADES:
-                sub = st.session_state.subs[trade][sub_key]
-                adj = get_adjusted_total(trade, sub_key) if sub["total"] > 0 else 0
+            for trade in trades:
+                sub = leveling[trade].subs.get(sub_key)
+                adj = sub.adjusted_total if sub is not None and sub.has_bid else 0
                 sub_adj.append(adj)
 
             if any(v > 0 for v in sub_adj):
-                name = st.session_state.subs[TRADES[0]][sub_key]["name"] or f"Sub {sub_key}"
-                ct_fig.add_trace(go.Bar(
-                    name=name,
-                    x=trade_labels,
-                    y=sub_adj,
-                    marker_color=sub_colors_list[si],
-                    marker_line=dict(width=0),
-                    opacity=0.9,
-                ))
-
-        ct_fig.update_layout(
-            **PLOTLY_TEMPLATE["layout"],
-            title="Portfolio View: Budget vs. Adjusted Bids per Trade",
-            barmode="group",
-            height=420,
-            yaxis_tickprefix="$",
-            yaxis_tickformat=",",
-        )
-        st.plotly_chart(ct_fig, use_container_width=True)
+                name = next(leveling[t].subs[sub_key].name for t in trades if sub_key in leveling[t].subs)
+                series.append((name, sub_colors_list[si], np.array(sub_adj, dtype=float)))
+
+        def build_cross_trade():
+            # Budget bars
+            traces = [go.Bar(
+                name="Budget",
+                x=trades,
+                y=budgets,
+                marker_color=COLORS["budget"],
+                opacity=0.6,
+                marker_line=dict(width=0),
+            )]
+            traces += [
+                go.Bar(name=name, x=trades, y=values, marker_color=color, marker_line=dict(width=0), opacity=0.9)
+                for name, color, values in series
+            ]
+            return go.Figure(
+                data=traces,
+                layout=dict(CHART_SKELETONS["cross_trade"], title=chart_title("Portfolio View: Budget vs. Adjusted Bids per Trade")),
+            )
+
+        ct_fig = cached_figure("cross_trade", data_fingerprint(
+            trades, budgets, [(name, color) for name, color, _ in series],
+            np.array([values for _, _, values in series], dtype=float).reshape(len(series), len(trades)),
+        ), build_cross_trade)
+        show_figure(ct_fig)
 
         # ── Risk Score Summary ──
         st.markdown("#### 🎯 Risk Score Summary")
-        risk_cols = st.columns(4)
-        for ti, trade in enumerate(TRADES):
+        risks = divergence.risk()
+        risk_cols = []
+        for _ in range((len(trades) + 3) // 4):
+            risk_cols += st.columns(4)
+        for ti, trade in enumerate(trades):
             with risk_cols[ti]:
-                scope = get_trade_scope(trade)
-                budget = scope["Budget_Total"].astype(float).sum() if not scope.empty else 0
-                deltas = []
-                for sub_key in ["A", "B", "C"]:
-                    sub = st.session_state.subs[trade][sub_key]
-                    if sub["total"] > 0 and budget > 0:
-                        adj = get_adjusted_total(trade, sub_key)
-                        deltas.append(abs(pct_delta(adj, budget)))
-
-                if deltas:
-                    avg_delta = sum(deltas) / len(deltas)
-                    if avg_delta < 5:
-                        risk_label = "🟢 LOW"
-                        risk_color = "#34D399"
-                    elif avg_delta < 15:
-                        risk_label = "🟡 MEDIUM"
-                        risk_color = "#FBBF24"
-                    else:
-                        risk_label = "🔴 HIGH"
-                        risk_color = "#FB7185"
-                else:
-                    risk_label = "⚪ NO DATA"
-                    risk_color = "#475569"
-                    avg_delta = 0
+                budget = leveling[trade].budget
+                risk = risks[ti]
+                risk_label, risk_color = RISK_BADGES[risk.level]
+                avg_delta = risk.avg_delta
 
                 st.markdown(f"""
                 <div class='card' style='text-align:center;'>
@@ -856,6 +1325,115 @@ with tab_objects[-1]:
                 </div>
                 """, unsafe_allow_html=True)
 
+# ── Trade Summaries ─────────────────────────────────────────────────────────────
+def render_trade_summaries(trades: list[str], current: str):
+    """
+    One chip per trade not on screen, from its last leveling — nothing here
+    levels. A trade edited since then is marked stale until it is opened again.
+    """
+    summaries = st.session_state.trade_summaries
+    chips = []
+    for trade in trades:
+        if trade == current:
+            continue
+        summary = summaries.get(trade)
+        if summary is None:
+            body = "<div style='color:#475569; font-size:0.78rem;'>Not leveled yet</div>"
+        else:
+            risk_label, risk_color = RISK_BADGES[summary["risk"]]
+            lowest = (f"{fmt_currency(summary['lowest'])} · {summary['winner']}"
+                      if summary["winner"] else "No bids")
+            stale = summary["stamp"] != leveling_stamp(trade)
+            body = f"""
+                <div style='color:#F8FAFC; font-size:0.9rem; font-weight:700;'>{lowest}</div>
+                <div style='color:#94A3B8; font-size:0.75rem;'>{summary['bidders']} bidder(s) · {fmt_currency(summary['budget'])} budget</div>
+                <div style='color:{risk_color}; font-size:0.75rem; font-weight:700;'>{risk_label}{" · <span style='color:#FBBF24;'>⟳ stale</span>" if stale else ""}</div>
+            """
+        chips.append(f"""
+            <div class='card' style='flex:1 1 180px; padding:10px 14px; margin:0;'>
+                <div style='color:#94A3B8; font-size:0.72rem; text-transform:uppercase; letter-spacing:0.08em;'>{trade}</div>
+                {body}
+            </div>
+        """)
+    if chips:
+        st.markdown(
+            f"<div style='display:flex; flex-wrap:wrap; gap:10px; margin:4px 0 16px 0;'>{''.join(chips)}</div>",
+            unsafe_allow_html=True,
+        )
+
+# ── View Selector ───────────────────────────────────────────────────────────────
+# Only the selected view runs: one trade's leveling and charts, or Analytics.
+# Other trades show their last-computed summary until they are opened.
+trades = get_trades()
+views = trades + [ANALYTICS_VIEW]
+view_label = lambda v: v if v == ANALYTICS_VIEW else f"🔧 {v}"
+if len(views) <= MAX_INLINE_VIEWS:
+    view = st.radio("View", views, key="view", horizontal=True, format_func=view_label, label_visibility="collapsed")
+else:
+    view = st.selectbox("View", views, key="view", format_func=view_label)
+
+view_start = time.perf_counter()
+with stage(f"view {view}"):
+    if view == ANALYTICS_VIEW:
+        render_analytics(trades)
+    else:
+        if not st.session_state.scope_store.empty:
+            render_trade_summaries(trades, view)
+        render_trade(view)
+view_ms = (time.perf_counter() - view_start) * 1000
+
+save_start = time.perf_counter()
+with stage("save project"):
+    trades_saved = sync_project()
+save_ms = (time.perf_counter() - save_start) * 1000
+
+# ── Gap Cache Stats ─────────────────────────────────────────────────────────────
+with st.sidebar:
+    cache_stats = st.session_state.gap_cache.stats()
+    st.markdown(
+        f"<p style='font-size:0.75rem; color:#475569;'>Gap cache · {cache_stats['entries']}/{cache_stats['maxsize']} entries"
+        f" · {cache_stats['hits']} hits · {cache_stats['misses']} misses"
+        f"<br>{view_label(view)} rendered in {view_ms:,.0f} ms ({len(trade_results)} trade(s) leveled)"
+        + (f"<br>Saved {trades_saved} trade(s) in {save_ms:,.0f} ms" if trades_saved else "") + "</p>",
+        unsafe_allow_html=True,
+    )
+
+# ── Diagnostics ─────────────────────────────────────────────────────────────────
+def render_diagnostics(profiler: Profiler, run_ms: float):
+    """This rerun's stage table plus a JSONL export of the recent profiled reruns."""
+    runs = st.session_state.profile_runs
+    run = (runs[-1][0]["run"] + 1) if runs else 1
+    runs.append(profiler.records(run=run, view=view, run_ms=run_ms) or [{"run": run, "view": view, "run_ms": run_ms}])
+    del runs[:-PROFILE_HISTORY]
+    stats = list(profiler.stats.values())
+    with st.expander(f"Run {run} · {run_ms:,.0f} ms · {len(stats)} stage(s)", expanded=True):
+        table = pd.DataFrame({
+            "Stage": ["\u2003" * (len(s.path) - 1) + s.path[-1] for s in stats],
+            "Calls": [s.calls for s in stats],
+            "Items": [s.items for s in stats],
+            "ms": [s.seconds * 1000 for s in stats],
+        })
+        if profiler.trace_memory:
+            table["Alloc KB"] = [s.alloc_bytes / 1024 for s in stats]
+            table["Peak KB"] = [s.peak_bytes / 1024 for s in stats]
+        st.dataframe(
+            table, use_container_width=True, hide_index=True,
+            column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ("ms", "Alloc KB", "Peak KB")},
+        )
+        st.caption(f"Outside any stage: {max(0.0, run_ms - profiler.seconds * 1000):,.0f} ms")
+        st.download_button(
+            "⬇ Export JSONL", "".join(json.dumps(r) + "\n" for records in runs for r in records),
+            file_name="leveler-profile.jsonl", mime="application/jsonl",
+        )
+
+with st.sidebar:
+    st.markdown("<hr style='border-color:#334155; margin:16px 0;'>", unsafe_allow_html=True)
+    st.markdown("### 🩺 Diagnostics")
+    st.toggle("Profile reruns", key="profiling")
+    if profiler is not None:
+        st.checkbox("Trace allocations (slows the app)", key="profile_memory")
+        render_diagnostics(profiler, (time.perf_counter() - run_start) * 1000)
+
 # ── Footer ──────────────────────────────────────────────────────────────────────
 st.markdown("""
 <hr style='border-color:#1E293B; margin:32px 0 16px 0;'>
@@ -0,0 +1,93 @@
+"""
+Scaling benchmark for the gap engine.
+
+Compares the original per-row ``any(item in inc or inc in item ...)`` scan with
+``leveler.coverage.coverage_matrix`` on synthetic scopes — both over a plain
+item corpus and over a prebuilt ``ScopeIndex`` (trigram anchors, then with an
+Aho–Corasick ``ItemAutomaton``) — checks every path produces the same coverage,
+and prints wall time per size.
+
+    python benchmarks/bench_coverage.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from leveler.coverage import coverage_matrix
+from leveler.automaton import ItemAutomaton
+from leveler.index import ScopeIndex
+from synthetic import WORDS
+
+
+SIZES = [(250, 40), (1000, 150), (4000, 600), (20000, 600)]
+LEGACY_MAX_ITEMS = 4000
+N_SUBS = 3
+
+
+def make_case(n_items: int, n_lines: int, seed: int = 7):
+    rng = random.Random(seed)
+    items = [f"{' '.join(rng.sample(WORDS, rng.randint(2, 4)))} {i}" for i in range(n_items)]
+    subs = []
+    for _ in range(N_SUBS):
+        lines = []
+        for _ in range(n_lines):
+            roll = rng.random()
+            if roll < 0.5:
+                lines.append(f"{rng.choice(items)} per plans and specs")
+            elif roll < 0.8:
+                lines.append(" ".join(rng.sample(WORDS, rng.randint(3, 8))))
+            else:
+                lines.append(rng.choice(items)[: rng.randint(6, 14)])
+        subs.append(lines)
+    return items, subs
+
+
+def legacy_coverage(items, subs):
+    out = np.zeros((len(items), len(subs)), dtype=bool)
+    for b, lines in enumerate(subs):
+        inclusions = [i.strip().lower() for i in lines if i.strip()]
+        for r, item in enumerate(items):
+            item_name = str(item).lower()
+            out[r, b] = any(item_name in inc or inc in item_name for inc in inclusions) if inclusions else False
+    return out
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    print(
+        f"{'items':>7} {'lines/sub':>10} {'legacy s':>10} {'engine s':>10} "
+        f"{'build s':>9} {'index s':>9} {'ac build':>9} {'ac s':>9}"
+    )
+    for n_items, n_lines in SIZES:
+        items, subs = make_case(n_items, n_lines)
+        got, t_new = timed(coverage_matrix, items, subs)
+        index, t_build = timed(ScopeIndex, items)
+        indexed, t_index = timed(coverage_matrix, index, subs)
+        automaton, t_ac_build = timed(ItemAutomaton, items)
+        scanned, t_ac = timed(coverage_matrix, ScopeIndex(items, automaton), subs)
+        if n_items <= LEGACY_MAX_ITEMS:
+            ref, t_ref = timed(legacy_coverage, items, subs)
+            legacy = f"{t_ref:>10.3f}"
+        else:
+            ref, legacy = got, f"{'—':>10}"
+        if not all(np.array_equal(ref, m) for m in (got, indexed, scanned)):
+            raise SystemExit(f"coverage mismatch at {n_items} items × {n_lines} lines")
+        print(
+            f"{n_items:>7} {n_lines:>10} {legacy} {t_new:>10.3f} "
+            f"{t_build:>9.3f} {t_index:>9.3f} {t_ac_build:>9.3f} {t_ac:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
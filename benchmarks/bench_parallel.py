@@ -0,0 +1,80 @@
+"""
+Serial vs. process-pool portfolio leveling.
+
+Builds a synthetic portfolio (projects × trades, each trade a ``make_case``
+scope with three subs), levels it serially and with ``LevelingPool`` at a few
+pool sizes, checks every run returns identical results in the same order, and
+prints wall time and speedup over the serial path.
+
+    python benchmarks/bench_parallel.py [projects] [trades]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from bench_coverage import make_case
+from leveler.parallel import LevelingPool
+
+N_PROJECTS = 40
+N_TRADES = 20
+ITEMS_PER_TRADE = 400
+LINES_PER_SUB = 120
+
+
+def make_portfolio(n_projects: int, n_trades: int):
+    scopes, jobs = {}, {}
+    for p in range(n_projects):
+        frames, bids = [], {}
+        for t in range(n_trades):
+            trade = f"Trade {t:02d}"
+            items, subs = make_case(ITEMS_PER_TRADE, LINES_PER_SUB, seed=p * 1000 + t)
+            frames.append(pd.DataFrame({"Trade": trade, "Item": items, "Budget_Total": 1000.0 + np.arange(len(items))}))
+            bids[trade] = {
+                k: {"name": f"Sub {k}", "total": 250_000.0, "inclusions": lines, "exclusions": lines[:5]}
+                for k, lines in zip("ABC", subs)
+            }
+        scopes[f"P{p:02d}"] = pd.concat(frames, ignore_index=True)
+        jobs[f"P{p:02d}"] = (f"P{p:02d}", bids)
+    return scopes, jobs
+
+
+def fingerprint(results):
+    return [
+        (job, trade, key, sub.gap_cost, sub.included.tobytes(), sub.excluded.tobytes())
+        for job, project in results.items()
+        for trade, result in project.trades.items()
+        for key, sub in result.subs.items()
+    ]
+
+
+def main():
+    n_projects = int(sys.argv[1]) if len(sys.argv) > 1 else N_PROJECTS
+    n_trades = int(sys.argv[2]) if len(sys.argv) > 2 else N_TRADES
+    scopes, jobs = make_portfolio(n_projects, n_trades)
+    print(f"{n_projects} projects × {n_trades} trades × {ITEMS_PER_TRADE} items, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'setup s':>9} {'level s':>9} {'speedup':>8}")
+
+    reference, serial = None, None
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        with LevelingPool(scopes, workers=workers) as pool:
+            setup = time.perf_counter() - start
+            start = time.perf_counter()
+            results = pool.level(jobs)
+            elapsed = time.perf_counter() - start
+        got = fingerprint(results)
+        if reference is None:
+            reference, serial = got, elapsed
+        elif got != reference:
+            raise SystemExit(f"results differ from the serial path with {workers} workers")
+        print(f"{workers:>8} {setup:>9.3f} {elapsed:>9.3f} {serial / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Time and peak memory of each leveling stage, checked against saved baselines.
+
+For every size it builds a seeded synthetic project (``synthetic.py``) and
+measures, stage by stage, the work the dashboard does:
+
+    ingest      read_scope_csv over the project's CSV text
+    partition   ScopeStore split plus every trade frame
+    index       per-trade trigram index and the scope automaton
+    level       level_project with the indexes in place (the gap scan)
+    coverage    Coverage Matrix status codes for every trade
+    heatmap     the bidder × trade divergence grid
+
+Time is the best of ``--repeat`` runs; peak memory is traced on one extra run
+(tracemalloc also sees NumPy buffers) and is the peak above the stage's start.
+
+    python benchmarks/bench_stages.py                     # small and medium
+    python benchmarks/bench_stages.py --sizes large huge
+    python benchmarks/bench_stages.py --save              # record baselines
+
+Without ``--save`` each result is compared with the baseline recorded for its
+size and stage; anything slower than ``--tolerance`` (default 25%) or using
+more than ``--memory-tolerance`` (default 10%) extra memory is flagged and the
+run exits with status 1. Baselines are per machine — record them on the box
+the comparison runs on, before the change under test.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from synthetic import make_bids, make_scope
+from leveler.engine import divergence_matrix, level_project
+from leveler.ingest import read_scope_csv
+from leveler.scope import ScopeStore
+
+# label → (items, trades, noise lines per sub)
+SIZES = {
+    "tiny": (10, 2, 2),
+    "small": (2_000, 8, 20),
+    "medium": (20_000, 25, 40),
+    "large": (100_000, 60, 60),
+    "huge": (500_000, 150, 80),
+}
+DEFAULT_SIZES = ["small", "medium"]
+BASELINES = Path(__file__).with_name("baselines") / "stages.json"
+SEED = 1
+# Differences under these are timer and allocator noise, whatever the tolerance.
+NOISE_SECONDS = 0.02
+NOISE_MB = 0.5
+
+
+def stages(n_items: int, n_trades: int, noise_lines: int):
+    """
+    (name, setup, fn) per stage: ``fn(setup(previous output))`` is timed, and
+    `setup` (untimed, may be None) hands each run a fresh input where the
+    stage would otherwise find its work already cached.
+    """
+    scope = make_scope(n_items, n_trades, seed=SEED)
+    bids = make_bids(scope, subs=3, coverage=0.8, noise_lines=noise_lines, seed=SEED)
+    csv_text = scope.to_csv(index=False)
+    plugs = {f"{t}::{i}": 1.0 for t, i in zip(scope["Trade"][::50].astype(str), scope["Item"][::50])}
+
+    def partition(df):
+        store = ScopeStore(df)
+        for trade in store.trades:
+            store.get(trade).frame
+        return store
+
+    def index(store):
+        for trade in store.trades:
+            store.index(trade)
+        return store
+
+    def coverage(project):
+        for result in project.trades.values():
+            result.status_matrix()
+        return project
+
+    return [
+        ("ingest", None, lambda _: read_scope_csv(StringIO(csv_text))[0]),
+        ("partition", None, partition),
+        ("index", lambda store: partition(store.frame), index),
+        ("level", None, lambda store: level_project(store, bids, plugs)),
+        ("coverage", None, coverage),
+        ("heatmap", None, lambda project: divergence_matrix(project.trades)),
+    ]
+
+
+def measure(pipeline, repeat: int) -> dict[str, dict]:
+    """Best time and traced peak (MB) per stage, every stage fed the previous one's output."""
+    results, value = {}, None
+    for name, setup, fn in pipeline:
+        fresh = setup or (lambda v: v)
+        best = float("inf")
+        for _ in range(repeat):
+            arg = fresh(value)
+            start = time.perf_counter()
+            out = fn(arg)
+            best = min(best, time.perf_counter() - start)
+        arg = fresh(value)
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        fn(arg)
+        peak = tracemalloc.get_traced_memory()[1] - base
+        tracemalloc.stop()
+        results[name] = {"seconds": best, "peak_mb": peak / 2**20}
+        value = out
+    return results
+
+
+def compare(size: str, results: dict, baseline: dict, tolerance: float, memory_tolerance: float) -> list[str]:
+    failures = []
+    for stage, got in results.items():
+        ref = baseline.get(stage)
+        if ref is None:
+            continue
+        if got["seconds"] > ref["seconds"] * (1 + tolerance) + NOISE_SECONDS:
+            failures.append(f"{size}/{stage}: {got['seconds']:.3f}s vs baseline {ref['seconds']:.3f}s")
+        if got["peak_mb"] > ref["peak_mb"] * (1 + memory_tolerance) + NOISE_MB:
+            failures.append(f"{size}/{stage}: {got['peak_mb']:.1f} MB vs baseline {ref['peak_mb']:.1f} MB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="record these results as the baselines")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    parser.add_argument("--baselines", type=Path, default=BASELINES)
+    args = parser.parse_args()
+
+    saved = json.loads(args.baselines.read_text()) if args.baselines.exists() else {"sizes": {}}
+    failures = []
+    print(f"{'size':>8} {'stage':>10} {'seconds':>9} {'peak MB':>9} {'baseline s':>11} {'baseline MB':>12}")
+    for size in args.sizes:
+        results = measure(stages(*SIZES[size]), args.repeat)
+        baseline = saved["sizes"].get(size, {})
+        for stage, got in results.items():
+            ref = baseline.get(stage, {})
+            ref_s = f"{ref['seconds']:>11.3f}" if ref else f"{'—':>11}"
+            ref_mb = f"{ref['peak_mb']:>12.1f}" if ref else f"{'—':>12}"
+            print(f"{size:>8} {stage:>10} {got['seconds']:>9.3f} {got['peak_mb']:>9.1f} {ref_s} {ref_mb}")
+        if args.save:
+            saved["sizes"][size] = results
+        else:
+            failures += compare(size, results, baseline, args.tolerance, args.memory_tolerance)
+
+    if args.save:
+        saved["machine"] = {
+            "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "platform": platform.platform(), "cpus": os.cpu_count(),
+        }
+        args.baselines.parent.mkdir(parents=True, exist_ok=True)
+        args.baselines.write_text(json.dumps(saved, indent=2) + "\n")
+        print(f"baselines saved to {args.baselines}")
+    elif failures:
+        print("\nregressions:\n  " + "\n  ".join(failures))
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
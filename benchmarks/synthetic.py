@@ -0,0 +1,78 @@
+"""
+Seeded synthetic projects for the benchmarks.
+
+``make_scope`` builds a master scope of any size (tens of rows to 500k+) split
+over many trades, with the load-time dtypes ``read_scope_csv`` produces;
+``make_bids`` writes bids against it. Each sub names a ``coverage`` share of
+its trade's items (so two subs overlap on about ``coverage²`` of them), plus
+``noise_lines`` lines that match nothing and ``exclusions`` excluded items —
+enough knobs to push match density and line counts independently. The same
+seed always yields the same project.
+
+    scope = make_scope(100_000, trades=40, seed=1)
+    bids = make_bids(scope, subs=3, coverage=0.8, noise_lines=50)
+"""
+
+import numpy as np
+import pandas as pd
+
+from leveler.ingest import normalize_scope
+
+WORDS = (
+    "gwb type x metal stud framing acoustic insulation tape finish level corner bead hvac "
+    "split system ductwork supply return electrical panel branch circuit wiring plumbing "
+    "rough-in fire sprinkler low voltage data flooring lvp carpet tile ceiling grid doors "
+    "millwork cabinets painting walls earthwork grading asphalt paving concrete sidewalks "
+    "storm drainage landscaping sod site lighting fencing chain link"
+).split()
+
+UNITS = np.array(["SF", "LF", "EA", "CY", "LB", "LS", "HR"])
+
+
+def make_scope(n_items: int, trades: int = 10, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+    picks = words[rng.integers(0, len(words), size=(n_items, 3))]
+    items = [f"{a} {b} {c} {i}" for i, (a, b, c) in enumerate(picks.tolist())]
+    quantity = rng.integers(1, 5000, size=n_items).astype(float)
+    unit_cost = np.round(rng.uniform(0.5, 120.0, size=n_items), 2)
+    return normalize_scope(pd.DataFrame({
+        "Trade": [f"Trade {t:03d}" for t in rng.integers(0, trades, size=n_items)],
+        "Item": items,
+        "Unit": UNITS[rng.integers(0, len(UNITS), size=n_items)],
+        "Quantity": quantity,
+        "Unit_Cost": unit_cost,
+        "Budget_Total": np.round(quantity * unit_cost, 2),
+        "Description": "",
+    }))
+
+
+def make_bids(scope: pd.DataFrame, subs: int = 3, coverage: float = 0.8, noise_lines: int = 20,
+              exclusions: int = 5, seed: int = 0) -> dict[str, dict[str, dict]]:
+    """Trade → sub → bid for every trade in `scope`, totals near the trade budget."""
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+    package = {}
+    for trade, frame in scope.groupby("Trade", sort=False, observed=True):
+        items = frame["Item"].astype(str).to_numpy()
+        budget = float(frame["Budget_Total"].sum())
+        bids = {}
+        for s in range(subs):
+            named = items[rng.random(len(items)) < coverage]
+            # Item names as bidders write them: verbatim, with trailing notes, or cut short.
+            style = rng.integers(0, 3, size=len(named))
+            lines = [
+                name if k == 0 else f"{name} per plans and specs" if k == 1 else name[: max(6, len(name) // 2)]
+                for name, k in zip(named.tolist(), style.tolist())
+            ]
+            lines += [" ".join(words[rng.integers(0, len(words), size=6)]) + " allowance" for _ in range(noise_lines)]
+            rng.shuffle(lines)
+            excluded = items[rng.integers(0, len(items), size=min(exclusions, len(items)))]
+            bids[f"S{s}"] = {
+                "name": f"Sub {s}",
+                "total": round(budget * rng.uniform(0.8, 1.2), 2),
+                "inclusions": lines,
+                "exclusions": excluded.tolist(),
+            }
+        package[str(trade)] = bids
+    return package
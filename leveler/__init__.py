@@ -0,0 +1,39 @@
+"""
+The Leveler — bid leveling engine.
+Column-oriented gap detection shared by the Streamlit dashboard and batch tooling.
+"""
+
+from leveler.coverage import ItemCorpus, LineCoverage, coverage_matrix, gap_costs, match_lines, normalize_lines
+from leveler.engine import (
+    DivergenceMatrix,
+    ProjectResult,
+    RiskScore,
+    SubResult,
+    TradeResult,
+    divergence_matrix,
+    level_project,
+    level_trade,
+    pct_delta,
+    plug_vector,
+    sub_labels,
+)
+
+__all__ = [
+    "DivergenceMatrix",
+    "ItemCorpus",
+    "LineCoverage",
+    "ProjectResult",
+    "RiskScore",
+    "SubResult",
+    "TradeResult",
+    "coverage_matrix",
+    "divergence_matrix",
+    "gap_costs",
+    "level_project",
+    "level_trade",
+    "match_lines",
+    "normalize_lines",
+    "pct_delta",
+    "plug_vector",
+    "sub_labels",
+]
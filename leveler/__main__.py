@@ -0,0 +1,5 @@
+import sys
+
+from leveler.cli import main
+
+sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Aho–Corasick automaton over scope item names.
+
+Answers the "item ⊂ line" half of the matching rule for every item at once: a
+single left-to-right pass over a bid's joined lines reports each item name
+found, with the line it was found on and its offset within that line. One
+automaton is compiled per scope version (over the distinct lowercased names of
+every trade) and shared by all subs and trades.
+"""
+
+from collections import deque
+from typing import Iterable, Iterator
+
+from leveler.coverage import _SEP
+
+
+class ItemAutomaton:
+    """Multi-pattern matcher compiled from scope item names."""
+
+    def __init__(self, names: Iterable[str]):
+        self.patterns: list[str] = []
+        self.pattern_ids: dict[str, int] = {}
+        for name in names:
+            name = str(name).lower()
+            if name not in self.pattern_ids:
+                self.pattern_ids[name] = len(self.patterns)
+                self.patterns.append(name)
+
+        goto: list[dict[str, int]] = [{}]
+        out: list[list[int]] = [[]]
+        for pid, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = goto[node][ch] = len(goto)
+                    goto.append({})
+                    out.append([])
+                node = nxt
+            out[node].append(pid)
+
+        # Breadth-first failure links; each node's outputs absorb its fail node's.
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0)
+                fail[nxt] = target if target != nxt else 0
+                out[nxt].extend(out[fail[nxt]])
+                queue.append(nxt)
+
+        self._goto = goto
+        self._fail = fail
+        self._out = [tuple(o) for o in out]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _walk(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yield (end position, node) for every position that completes a pattern."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield pos, node
+
+    def scan(self, lines: list[str]) -> list[tuple[int, int, int]]:
+        """
+        Every occurrence of an item name in `lines` (already normalized), as
+        (pattern id, line index, offset within the line).
+        """
+        text = _SEP.join(lines)
+        line_starts = [0]
+        for line in lines[:-1]:
+            line_starts.append(line_starts[-1] + len(line) + 1)
+        hits = []
+        line_no = 0
+        for pos, node in self._walk(text):
+            while line_no + 1 < len(line_starts) and pos >= line_starts[line_no + 1]:
+                line_no += 1
+            for pid in self._out[node]:
+                start = pos - len(self.patterns[pid]) + 1
+                hits.append((pid, line_no, start - line_starts[line_no]))
+        return hits
+
+    def found(self, lines: list[str]) -> set[int]:
+        """Ids of the item names occurring in any of `lines`."""
+        ids: set[int] = set()
+        for _, node in self._walk(_SEP.join(lines)):
+            ids.update(self._out[node])
+        return ids
@@ -0,0 +1,190 @@
+"""
+Bid book.
+
+Every bid on a project held column-wise — one row per (trade, sub) in
+parallel name / total / inclusion / exclusion columns — so a trade can carry
+any number of bidders and whole columns (e.g. every total) are read without
+walking per-sub dicts. Subs are keyed per trade with spreadsheet-style labels
+(A … Z, AA, AB …) that are never reused after a removal, so widget keys and
+cached results tied to a label stay unambiguous.
+"""
+
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SUBS = 3
+
+
+def sub_label(n: int) -> str:
+    """0 → "A", 25 → "Z", 26 → "AA", …"""
+    label = ""
+    n += 1
+    while n:
+        n, rem = divmod(n - 1, 26)
+        label = chr(ord("A") + rem) + label
+    return label
+
+
+def label_index(label: str) -> int | None:
+    """Inverse of ``sub_label``: "A" → 0, "AA" → 26; None for keys that are not labels."""
+    if not label or not label.isascii() or not label.isalpha() or not label.isupper():
+        return None
+    n = 0
+    for ch in label:
+        n = n * 26 + ord(ch) - ord("A") + 1
+    return n - 1
+
+
+class BidBook:
+    """
+    Project bids as parallel columns with a (trade, sub) → row map.
+
+    `trades` get `subs_per_trade` blank subs up front, as the dashboard shows.
+    """
+
+    def __init__(self, trades: Iterable[str] = (), subs_per_trade: int = DEFAULT_SUBS):
+        self.trade: list[str] = []
+        self.sub: list[str] = []
+        self.name: list[str] = []
+        self.total: list[float] = []
+        self.inclusions: list[tuple[str, ...]] = []
+        self.exclusions: list[tuple[str, ...]] = []
+        self._row: dict[tuple[str, str], int] = {}
+        self._subs: dict[str, list[str]] = {}
+        self._issued: dict[str, int] = {}
+        self._versions: dict[str, int] = {}
+        self._revisions: dict[str, int] = {}
+        for trade in trades:
+            self.ensure(trade, subs_per_trade)
+
+    def __len__(self) -> int:
+        return len(self.sub)
+
+    @property
+    def trades(self) -> list[str]:
+        return list(self._subs)
+
+    def subs(self, trade: str) -> list[str]:
+        return list(self._subs.get(trade, ()))
+
+    def version(self, trade: str) -> int:
+        """Bumped whenever `trade` gains or loses a sub (not on field edits)."""
+        return self._versions.get(trade, 0)
+
+    def revision(self, trade: str) -> int:
+        """Bumped on any change to `trade`'s bids, field edits included."""
+        return self._revisions.get(trade, 0)
+
+    def _touch(self, trade: str) -> None:
+        self._revisions[trade] = self.revision(trade) + 1
+
+    def display_name(self, trade: str, key: str) -> str:
+        return self.name[self._row[(trade, key)]] or f"Sub {key}"
+
+    def ensure(self, trade: str, n: int = DEFAULT_SUBS) -> None:
+        """Give `trade` at least `n` (blank) subs."""
+        self._subs.setdefault(trade, [])
+        while len(self._subs[trade]) < n:
+            self.add(trade)
+
+    def add(self, trade: str, name: str = "", total: float = 0.0,
+            inclusions: Iterable[str] = (), exclusions: Iterable[str] = (), key: str | None = None) -> str:
+        """Append a sub to `trade`; returns its key."""
+        if key is None:
+            while key is None or (trade, key) in self._row:
+                key = sub_label(self._issued.get(trade, 0))
+                self._issued[trade] = self._issued.get(trade, 0) + 1
+        elif (trade, key) in self._row:
+            raise KeyError(f"{trade} already has a sub {key!r}")
+        else:
+            # An explicit label (e.g. from a saved package) is spent too, so it is never issued again.
+            index = label_index(key)
+            if index is not None and index >= self._issued.get(trade, 0):
+                self._issued[trade] = index + 1
+        self._row[(trade, key)] = len(self.sub)
+        self.trade.append(trade)
+        self.sub.append(key)
+        self.name.append(name)
+        self.total.append(float(total))
+        self.inclusions.append(tuple(inclusions))
+        self.exclusions.append(tuple(exclusions))
+        self._subs.setdefault(trade, []).append(key)
+        self._versions[trade] = self.version(trade) + 1
+        self._touch(trade)
+        return key
+
+    def update(self, trade: str, key: str, **changes) -> None:
+        """Set any of name, total, inclusions, exclusions for one sub."""
+        row = self._row[(trade, key)]
+        for field, value in changes.items():
+            if field in ("inclusions", "exclusions"):
+                value = tuple(value)
+            elif field == "total":
+                value = float(value)
+            elif field != "name":
+                raise KeyError(field)
+            getattr(self, field)[row] = value
+        self._touch(trade)
+
+    def remove(self, trade: str, key: str) -> None:
+        """Drop one sub; the last row moves into its slot so removal is O(1)."""
+        row = self._row.pop((trade, key))
+        last = len(self.sub) - 1
+        columns = (self.trade, self.sub, self.name, self.total, self.inclusions, self.exclusions)
+        if row != last:
+            for col in columns:
+                col[row] = col[last]
+            self._row[(self.trade[row], self.sub[row])] = row
+        for col in columns:
+            col.pop()
+        self._subs[trade].remove(key)
+        self._versions[trade] = self.version(trade) + 1
+        self._touch(trade)
+
+    def bid(self, trade: str, key: str) -> dict:
+        row = self._row[(trade, key)]
+        return {
+            "name": self.name[row],
+            "total": self.total[row],
+            "inclusions": list(self.inclusions[row]),
+            "exclusions": list(self.exclusions[row]),
+        }
+
+    def trade_bids(self, trade: str) -> dict[str, dict]:
+        """Sub key → bid dict for `trade`, in sub order, as the engine takes them."""
+        return {key: self.bid(trade, key) for key in self._subs.get(trade, ())}
+
+    def roster(self, trade: str) -> pd.DataFrame:
+        """Name and total per sub of `trade`, indexed by sub key."""
+        rows = [self._row[(trade, key)] for key in self._subs.get(trade, ())]
+        return pd.DataFrame(
+            {"Name": [self.name[r] for r in rows], "Bid Total": np.array(self.total, dtype=float)[rows]},
+            index=pd.Index(self.subs(trade), name="Sub"),
+        )
+
+    def set_roster(self, trade: str, roster: pd.DataFrame) -> None:
+        """Write back names and totals from an edited ``roster`` frame."""
+        names = roster["Name"].fillna("").astype(str).str.strip()
+        totals = pd.to_numeric(roster["Bid Total"], errors="coerce").fillna(0.0)
+        for key, name, total in zip(roster.index, names, totals):
+            row = self._row[(trade, key)]
+            if self.name[row] != name or self.total[row] != float(total):
+                self.name[row] = name
+                self.total[row] = float(total)
+                self._touch(trade)
+
+    def to_package(self) -> dict[str, dict[str, dict]]:
+        """Trade → sub → bid, the shape ``level_project`` and bid files use."""
+        return {trade: self.trade_bids(trade) for trade in self._subs}
+
+    @classmethod
+    def from_package(cls, package: Mapping[str, Mapping[str, dict]]) -> "BidBook":
+        book = cls()
+        for trade, subs in package.items():
+            book._subs.setdefault(trade, [])
+            for key, bid in subs.items():
+                book.add(trade, bid.get("name", ""), bid.get("total", 0.0),
+                         bid.get("inclusions", ()), bid.get("exclusions", ()), key=key)
+        return book
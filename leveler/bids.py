@@ -0,0 +1,107 @@
+"""
+Bid package files.
+
+A bid package is one file holding the bids received for a project: a JSON
+object or list of objects, or a CSV with one bid per row. Every bid names its
+trade, company, total, inclusions and exclusions:
+
+    {"trade": "Drywall", "name": "Acme Interiors", "total": 95000,
+     "inclusions": ["Metal Stud Framing", "Tape & Finish L4"],
+     "exclusions": ["Acoustical Ceiling"]}
+
+JSON line lists may also be given as one newline-separated string, which is
+also how CSV cells carry them. An optional ``sub`` field keys the bid within
+its trade; otherwise subs are numbered in file order.
+"""
+
+import csv
+import itertools
+import json
+from pathlib import Path
+from typing import Iterator
+
+BID_SUFFIXES = (".json", ".csv")
+
+
+class BidFormatError(ValueError):
+    """A bid package file cannot be read as bids."""
+
+
+def _lines(value) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.splitlines()
+    return [str(l).strip() for l in value if str(l).strip()]
+
+
+def _total(value) -> float:
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, str):
+        value = value.replace("$", "").replace(",", "")
+    return float(value)
+
+
+def parse_bids(records: list[dict]) -> dict[str, dict[str, dict]]:
+    """
+    Group raw bid records into trade → sub → bid dicts the engine accepts.
+    A record without a sub is numbered by its position in the trade, skipping
+    any number an explicit sub of that trade uses anywhere in `records`.
+    """
+    package: dict[str, dict[str, dict]] = {}
+    explicit: dict[str, set[str]] = {}
+    for record in records:
+        if isinstance(record, dict) and record.get("sub"):
+            explicit.setdefault(str(record.get("trade") or "").strip(), set()).add(str(record["sub"]))
+    for n, record in enumerate(records, 1):
+        if not isinstance(record, dict):
+            raise BidFormatError(f"bid {n}: expected an object, got {type(record).__name__}")
+        trade = str(record.get("trade") or "").strip()
+        if not trade:
+            raise BidFormatError(f"bid {n}: missing trade")
+        subs = package.setdefault(trade, {})
+        if record.get("sub"):
+            key = str(record["sub"])
+        else:
+            taken = explicit.get(trade, set())
+            key = next(k for k in map(str, itertools.count(len(subs) + 1)) if k not in subs and k not in taken)
+        if key in subs:
+            raise BidFormatError(f"bid {n}: duplicate sub {key!r} for {trade}")
+        try:
+            total = _total(record.get("total"))
+        except (TypeError, ValueError):
+            raise BidFormatError(f"bid {n}: total {record.get('total')!r} is not a number") from None
+        subs[key] = {
+            "name": str(record.get("name") or "").strip(),
+            "total": total,
+            "inclusions": _lines(record.get("inclusions")),
+            "exclusions": _lines(record.get("exclusions")),
+        }
+    return package
+
+
+def read_bid_file(path: str | Path) -> dict[str, dict[str, dict]]:
+    """Read one bid package file (JSON or CSV)."""
+    path = Path(path)
+    try:
+        if path.suffix.lower() == ".json":
+            with path.open(encoding="utf-8") as f:
+                records = json.load(f)
+            if isinstance(records, dict):
+                records = records.get("bids", [records])
+        else:
+            with path.open(newline="", encoding="utf-8-sig") as f:
+                records = [{k.strip().lower(): v for k, v in row.items() if k} for row in csv.DictReader(f)]
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        raise BidFormatError(str(e)) from None
+    if not isinstance(records, list):
+        raise BidFormatError("expected a bid object or a list of bids")
+    return parse_bids(records)
+
+
+def iter_bid_files(directory: str | Path) -> Iterator[Path]:
+    """Bid package files under `directory`, recursively, in a stable order."""
+    for path in sorted(Path(directory).rglob("*")):
+        if path.is_file() and path.suffix.lower() in BID_SUFFIXES:
+            yield path
@@ -0,0 +1,79 @@
+"""
+Content-addressed memoization of per-(trade, sub) gap results.
+
+Keys are digests of everything a sub's coverage depends on — the trade's scope
+rows, the sub's normalized inclusion/exclusion lines and the plug vector — so
+a rerun that only changes a company name or another trade's inputs reuses the
+previous result instead of rescanning.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+from leveler.coverage import normalize_lines
+
+
+def scope_fingerprint(scope_df: pd.DataFrame) -> str:
+    """Digest of the scope rows that drive matching and gap dollars."""
+    h = hashlib.blake2b(digest_size=16)
+    if not scope_df.empty:
+        rows = pd.util.hash_pandas_object(scope_df[["Item", "Budget_Total"]], index=False)
+        h.update(rows.to_numpy().tobytes())
+    h.update(str(len(scope_df)).encode())
+    return h.hexdigest()
+
+
+def bid_key(scope_fp: str, inclusions: Iterable[str], exclusions: Iterable[str], plugs: np.ndarray) -> str:
+    """Cache key for one sub's result against a fingerprinted scope."""
+    h = hashlib.blake2b(scope_fp.encode(), digest_size=16)
+    for lines in (inclusions, exclusions):
+        h.update("\x00".join(normalize_lines(lines)).encode())
+        h.update(b"\x01")
+    h.update(np.ascontiguousarray(plugs, dtype=float).tobytes())
+    return h.hexdigest()
+
+
+class GapCache:
+    """Bounded LRU mapping of bid keys to gap results, with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[str | None, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][1]
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any, tag: str | None = None) -> None:
+        """Store `value`; `tag` (e.g. the trade) allows targeted invalidation."""
+        self._entries[key] = (tag, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, tag: str | None = None) -> None:
+        """
+        Drop every entry (e.g. when the master scope is replaced), or only the
+        entries stored under `tag` (e.g. when one trade's scope is edited).
+        """
+        if tag is None:
+            self._entries.clear()
+            return
+        for key in [k for k, (t, _) in self._entries.items() if t == tag]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
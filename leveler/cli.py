@@ -0,0 +1,211 @@
+"""
+Batch leveling from the command line.
+
+    python -m leveler master_scope.csv bids/ -o out/ [--format parquet]
+
+Levels every bid package file under the bid directory against one master
+scope and streams three tables into the output directory:
+
+- ``totals``   — one row per bid: raw total, gap count and cost, adjusted
+  total, % delta vs. trade budget and whether it is the trade's winner
+- ``gaps``     — one row per scope item a bid is missing, with its plug cost
+- ``coverage`` — the coverage matrix, one row per (bid, scope item)
+
+Packages are read and leveled a batch at a time — across ``--workers``
+processes if asked — and rows are flushed in batches, so memory stays bounded
+by the scope, one batch of packages and one batch of rows however many
+packages the archive holds. Unreadable packages are reported and skipped.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from leveler.bids import BidFormatError, iter_bid_files, read_bid_file
+from leveler.engine import ProjectResult
+from leveler.ingest import ScopeSchemaError, read_scope_csv
+from leveler.parallel import LevelingPool
+from leveler.plugs import PlugTableError, read_plug_table
+
+TABLES = {
+    "totals": {
+        "package": str, "trade": str, "sub": str, "name": str, "total": float, "gap_count": int,
+        "gap_cost": float, "adjusted_total": float, "delta_pct": float, "winner": bool,
+    },
+    "gaps": {
+        "package": str, "trade": str, "sub": str, "name": str, "item": str, "budget": float, "plug": float,
+    },
+    "coverage": {
+        "package": str, "trade": str, "sub": str, "name": str, "item": str, "included": bool, "excluded": bool,
+    },
+}
+FLUSH_ROWS = 50_000
+PACKAGES_PER_WORKER = 16
+
+
+class CsvSink:
+    def __init__(self, path: Path):
+        self.file = path.open("w", newline="", encoding="utf-8")
+        self.header = True
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class ParquetSink:
+    def __init__(self, path: Path, columns: dict[str, type]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow") from None
+        types = {str: pa.string(), float: pa.float64(), int: pa.int64(), bool: pa.bool_()}
+        self.pa = pa
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns.items()])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, df: pd.DataFrame) -> None:
+        self.writer.write_table(self.pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class TableWriter:
+    """Buffers column chunks for one output table and flushes them in batches."""
+
+    def __init__(self, out_dir: Path, name: str, fmt: str, flush_rows: int = FLUSH_ROWS):
+        self.columns = TABLES[name]
+        path = out_dir / f"{name}.{fmt}"
+        self.sink = ParquetSink(path, self.columns) if fmt == "parquet" else CsvSink(path)
+        self.flush_rows = flush_rows
+        self.chunks: dict[str, list] = {col: [] for col in self.columns}
+        self.pending = 0
+        self.rows = 0
+
+    def append(self, columns: dict[str, np.ndarray | list]) -> None:
+        n = len(columns["package"])
+        if not n:
+            return
+        for col, values in columns.items():
+            self.chunks[col].append(np.asarray(values))
+        self.pending += n
+        if self.pending >= self.flush_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        df = pd.DataFrame({col: np.concatenate(chunks) for col, chunks in self.chunks.items()})
+        self.sink.write(df.astype(self.columns))
+        self.rows += len(df)
+        self.chunks = {col: [] for col in self.columns}
+        self.pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self.sink.close()
+
+
+def project_tables(package: str, project: ProjectResult) -> dict[str, dict[str, list | np.ndarray]]:
+    """Totals, gaps and coverage columns for one leveled package."""
+    tables = {name: {col: [] for col in columns} for name, columns in TABLES.items()}
+    totals, gaps, coverage = tables["totals"], tables["gaps"], tables["coverage"]
+    for trade, result in project.trades.items():
+        winner = result.winner()
+        items = result.scope["Item"].astype(str).to_numpy(dtype=object)
+        for key, sub in result.subs.items():
+            ids = {"package": package, "trade": trade, "sub": key, "name": sub.name}
+            for col, value in ids.items():
+                totals[col].append(value)
+                gaps[col].extend([value] * len(sub.missing_items))
+                coverage[col].extend([value] * len(items))
+            totals["total"].append(sub.total)
+            totals["gap_count"].append(len(sub.missing_items))
+            totals["gap_cost"].append(sub.gap_cost)
+            totals["adjusted_total"].append(sub.adjusted_total)
+            totals["delta_pct"].append(result.delta_pct(sub))
+            totals["winner"].append(winner is not None and winner.key == key)
+            for col in ("item", "budget", "plug"):
+                gaps[col].extend(gap[col] for gap in sub.missing_items)
+            coverage["item"].extend(items)
+            coverage["included"].extend(sub.included)
+            coverage["excluded"].extend(sub.excluded)
+    return tables
+
+
+def run(scope_path: str, bid_dir: str, out_dir: str, fmt: str = "csv", plugs_path: str | None = None,
+        flush_rows: int = FLUSH_ROWS, workers: int = 1) -> int:
+    """Level every package under `bid_dir`; returns the number of packages that failed."""
+    scope_df, bad_rows = read_scope_csv(scope_path)
+    for bad in bad_rows:
+        print(f"{scope_path}:{bad.line}: skipped scope row ({bad.reason})", file=sys.stderr)
+    plug_rates = read_plug_table(plugs_path) if plugs_path else None
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    writers = {name: TableWriter(out, name, fmt, flush_rows) for name in TABLES}
+    root = Path(bid_dir)
+    batch_size = max(1, workers) * PACKAGES_PER_WORKER
+    batch: dict[str, tuple[str, dict]] = {}
+    done = failed = 0
+
+    def level_batch():
+        for package, project in pool.level(batch).items():
+            for name, columns in project_tables(package, project).items():
+                writers[name].append(columns)
+        batch.clear()
+
+    start = time.perf_counter()
+    with LevelingPool({"": scope_df}, {"": plug_rates}, workers) as pool:
+        try:
+            for path in iter_bid_files(root):
+                try:
+                    bids = read_bid_file(path)
+                except BidFormatError as e:
+                    print(f"{path}: skipped ({e})", file=sys.stderr)
+                    failed += 1
+                    continue
+                batch[path.relative_to(root).with_suffix("").as_posix()] = ("", bids)
+                done += 1
+                if len(batch) >= batch_size:
+                    level_batch()
+            level_batch()
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Leveled {done} package(s), {writers['totals'].rows} bid(s) in {elapsed:.1f}s"
+        f" → {out}" + (f"; {failed} package(s) skipped" if failed else ""),
+        file=sys.stderr,
+    )
+    return failed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m leveler", description="Level a directory of bid packages.")
+    parser.add_argument("scope", help="master scope CSV")
+    parser.add_argument("bids", help="directory of bid package files (.json / .csv), searched recursively")
+    parser.add_argument("-o", "--out", default="leveled", help="output directory (default: ./leveled)")
+    parser.add_argument("-f", "--format", choices=["csv", "parquet"], default="csv", help="output format")
+    parser.add_argument("--plugs", help="plug cost overrides: CSV with Trade, Item, Plug columns")
+    parser.add_argument("--flush-rows", type=int, default=FLUSH_ROWS, help="rows buffered per table before writing")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="worker processes (default: 1, in-process)")
+    args = parser.parse_args(argv)
+
+    try:
+        failed = run(args.scope, args.bids, args.out, args.format, args.plugs, args.flush_rows, args.workers)
+    except (OSError, ScopeSchemaError, PlugTableError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    return 1 if failed else 0
@@ -0,0 +1,170 @@
+"""
+Vectorized scope coverage.
+
+A scope item is covered by a bid when its lowercased name is a substring of any
+inclusion line, or any inclusion line is a substring of the item name. Instead
+of testing every (item, line) pair in Python, both directions are resolved
+against joined NUL-separated buffers so the substring search runs in C:
+
+* item ⊂ line — a bid's lines are joined into one haystack, so each item needs
+  exactly one ``in`` scan.
+* line ⊂ item — the item column is joined into one corpus built once per scope
+  and shared by every bid. Each line is located with ``str.find`` and hits are
+  mapped back to row positions; lines longer than the longest item are skipped.
+
+``LineCoverage`` keeps one bid's coverage live under edits: it counts, per
+scope row, how many of the bid's lines match it, so adding or removing a line
+only touches the rows that line matches.
+"""
+
+from bisect import bisect_right
+from typing import Iterable, Sequence
+
+import numpy as np
+
+# Separator for joined buffers — cannot occur in a pasted line or a scope item name.
+_SEP = "\x00"
+
+
+def normalize_lines(lines: Iterable[str]) -> list[str]:
+    """Strip and lowercase bid lines, dropping blanks and duplicates."""
+    return list(dict.fromkeys(s for s in (str(l).strip().lower() for l in lines) if s))
+
+
+class ItemCorpus:
+    """Lowercased scope item names joined into a single searchable buffer."""
+
+    def __init__(self, items: Iterable[str]):
+        self.items = [str(i).lower() for i in items]
+        self.text = _SEP.join(self.items)
+        self.starts = []
+        pos = 0
+        for item in self.items:
+            self.starts.append(pos)
+            pos += len(item) + 1
+        self.longest = max((len(i) for i in self.items), default=0)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def rows_containing(self, line: str) -> list[int]:
+        """Row positions whose item name contains `line`."""
+        if len(line) > self.longest:
+            return []
+        rows = []
+        n = len(self.items)
+        pos = self.text.find(line)
+        while pos != -1:
+            row = bisect_right(self.starts, pos) - 1
+            rows.append(row)
+            if row + 1 >= n:
+                break
+            pos = self.text.find(line, self.starts[row + 1])
+        return rows
+
+    def rows_within(self, lines: list[str]) -> np.ndarray:
+        """Boolean mask: True where the item name occurs inside any of `lines`."""
+        haystack = _SEP.join(lines)
+        return np.fromiter((item in haystack for item in self.items), dtype=bool, count=len(self.items))
+
+    def line_matrix(self, lines: list[str]) -> np.ndarray:
+        """(items × lines) mask: column j holds the rows `lines[j]` matches in either direction."""
+        out = np.zeros((len(self.items), len(lines)), dtype=bool)
+        for j, line in enumerate(lines):
+            out[:, j] = self.rows_within([line])
+            out[self.rows_containing(line), j] = True
+        return out
+
+
+def match_lines(corpus: ItemCorpus, lines: Iterable[str]) -> np.ndarray:
+    """Boolean mask over the corpus rows matching any of `lines` in either direction."""
+    lines = normalize_lines(lines)
+    mask = np.zeros(len(corpus), dtype=bool)
+    if not lines or not len(corpus):
+        return mask
+    mask |= corpus.rows_within(lines)
+    for line in lines:
+        mask[corpus.rows_containing(line)] = True
+    return mask
+
+
+class LineCoverage:
+    """
+    Coverage of one bid's lines, updated by line diff.
+
+    ``counts[row]`` is the number of current lines matching the row in either
+    direction; the row is covered while it is positive. ``update`` costs one
+    corpus lookup per added or removed line, however long the line list is.
+    """
+
+    def __init__(self, corpus: ItemCorpus, lines: Iterable[str] = ()):
+        self.corpus = corpus
+        self.counts = np.zeros(len(corpus), dtype=np.int32)
+        self.lines: dict[str, np.ndarray] = {}
+        self.update(lines)
+
+    @property
+    def mask(self) -> np.ndarray:
+        return self.counts > 0
+
+    def rows_matching(self, line: str) -> np.ndarray:
+        """Row positions `line` covers: items inside it, or items containing it."""
+        rows = np.flatnonzero(self.corpus.rows_within([line]))
+        return np.union1d(rows, np.asarray(self.corpus.rows_containing(line), dtype=np.int64))
+
+    def update(self, lines: Iterable[str]) -> tuple[list[str], list[str], np.ndarray]:
+        """
+        Replace the line set with `lines`. Returns the added lines, the removed
+        lines and the rows whose covered state flipped.
+        """
+        new = normalize_lines(lines)
+        added = [l for l in new if l not in self.lines]
+        keep = set(new)
+        removed = [l for l in self.lines if l not in keep]
+        if not added and not removed:
+            return added, removed, np.zeros(0, dtype=np.int64)
+        removed_rows = [self.lines.pop(line) for line in removed]
+        added_rows = [self.rows_matching(line) for line in added]
+        touched = np.unique(np.concatenate(removed_rows + added_rows))
+        before = self.counts[touched] > 0
+        for rows in removed_rows:
+            self.counts[rows] -= 1
+        for line, rows in zip(added, added_rows):
+            self.lines[line] = rows
+            self.counts[rows] += 1
+        self.lines = {l: self.lines[l] for l in new}
+        return added, removed, touched[before != (self.counts[touched] > 0)]
+
+    def matches(self, lines: Iterable[str]) -> bool:
+        """Whether this tracker is current for `lines`."""
+        return list(self.lines) == normalize_lines(lines)
+
+
+def coverage_matrix(items: Iterable[str] | ItemCorpus, line_lists: Sequence[Iterable[str]]) -> np.ndarray:
+    """
+    Coverage for several bids in one pass.
+
+    Returns an (items × bids) boolean matrix. The item corpus is built once
+    and lines shared by several bids are only located once.
+    """
+    corpus = items if isinstance(items, ItemCorpus) else ItemCorpus(items)
+    out = np.zeros((len(corpus), len(line_lists)), dtype=bool)
+    if not len(corpus):
+        return out
+    located: dict[str, list[int]] = {}
+    for b, raw in enumerate(line_lists):
+        lines = normalize_lines(raw)
+        if not lines:
+            continue
+        col = corpus.rows_within(lines)
+        for line in lines:
+            if line not in located:
+                located[line] = corpus.rows_containing(line)
+            col[located[line]] = True
+        out[:, b] = col
+    return out
+
+
+def gap_costs(coverage: np.ndarray, plugs: np.ndarray) -> np.ndarray:
+    """Plug dollars per bid: each column's uncovered mask dotted with `plugs`."""
+    return (~coverage).T.astype(float) @ np.asarray(plugs, dtype=float)
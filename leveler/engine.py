@@ -0,0 +1,453 @@
+"""
+Headless leveling engine.
+
+Everything needed to level bids — coverage, exclusion status, gap lists,
+adjusted totals, % delta against budget and trade risk scores — with no
+Streamlit dependency, so the same code serves the dashboard, batch jobs, tests
+and worker processes.
+
+One ``TradeResult`` holds everything the dashboard shows for a trade, so each
+(trade, sub) pair is scanned exactly once per rerun and every view reads from
+the same object. ``level_project`` levels every trade of a scope into a
+``ProjectResult``. ``divergence_matrix`` lays several trades' results out as a
+dense bidder × trade grid of % deltas, the shape the heatmap and the
+portfolio risk cards read.
+
+Bids are plain dicts: ``{"name", "total", "inclusions", "exclusions"}``, keyed
+by sub (and by trade, for a project). Plug rates are either a mapping keyed
+``"{trade}::{item}"`` or a Series of plug costs aligned with the scope rows;
+rows without a plug fall back to their budget. With ``quantities=True`` a line
+quoting less than a row's quantity ("GWB 6,000 SF" against 10,000 SF) covers
+the row only in part, and the short quantity is plugged at the row's plug per
+unit (``leveler.quantities``).
+"""
+
+import hashlib
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from leveler.cache import GapCache, bid_key, scope_fingerprint
+from leveler.coverage import ItemCorpus, coverage_matrix, gap_costs, normalize_lines
+from leveler.profiling import stage
+from leveler.quantities import canonical_units, short_quantities, split_quantities
+from leveler.scope import ScopeStore
+from leveler.similarity import ItemVectors
+
+STATUS_INCLUDED = "✅ Included"
+STATUS_GAP = "⚠️ GAP"
+STATUS_EXCLUDED = "❌ EXCLUDED"
+STATUS_NO_BID = "—"
+STATUS_PARTIAL = "◐ PARTIAL"
+
+# Coverage Matrix cells as small integer codes; STATUS_LABELS[code] is the label.
+CODE_NO_BID, CODE_GAP, CODE_EXCLUDED, CODE_INCLUDED, CODE_PARTIAL = range(5)
+STATUS_LABELS = [STATUS_NO_BID, STATUS_GAP, STATUS_EXCLUDED, STATUS_INCLUDED, STATUS_PARTIAL]
+
+# Average |% delta| vs budget below which a trade scores LOW / MEDIUM risk.
+RISK_LOW_PCT = 5.0
+RISK_MEDIUM_PCT = 15.0
+
+PlugRates = Mapping[str, float] | pd.Series
+
+
+def pct_delta(val: float, ref: float) -> float:
+    if ref == 0:
+        return 0.0
+    return ((val - ref) / ref) * 100
+
+
+@dataclass
+class SubResult:
+    key: str
+    name: str
+    total: float
+    included: np.ndarray
+    excluded: np.ndarray
+    missing_items: list[dict]
+    gap_cost: float  # plugs for missing rows plus partial_cost
+    partial_cost: float = 0.0
+    short_qty: np.ndarray | None = None  # per row, quantity the bid leaves out of an included row
+    partial_items: list[dict] = field(default_factory=list)
+
+    @property
+    def has_bid(self) -> bool:
+        return self.total > 0
+
+    @property
+    def adjusted_total(self) -> float:
+        return self.total + self.gap_cost
+
+    def status_codes(self) -> np.ndarray:
+        """Coverage Matrix code per scope row: excluded beats included (or partial) beats gap."""
+        fallback = CODE_GAP if self.has_bid else CODE_NO_BID
+        covered = CODE_INCLUDED if self.short_qty is None else np.where(self.short_qty > 0, CODE_PARTIAL, CODE_INCLUDED)
+        return np.where(self.excluded, CODE_EXCLUDED, np.where(self.included, covered, fallback)).astype(np.int8)
+
+    def status(self) -> np.ndarray:
+        """Coverage Matrix label per scope row."""
+        return np.asarray(STATUS_LABELS, dtype=object)[self.status_codes()]
+
+
+@dataclass
+class RiskScore:
+    level: str
+    avg_delta: float
+
+
+def risk_score(deltas: np.ndarray) -> RiskScore:
+    """LOW / MEDIUM / HIGH from the mean absolute % delta; NO DATA when there is none."""
+    deltas = np.abs(np.asarray(deltas, dtype=float))
+    if not len(deltas):
+        return RiskScore("NO DATA", 0.0)
+    avg = float(deltas.mean())
+    if avg < RISK_LOW_PCT:
+        return RiskScore("LOW", avg)
+    if avg < RISK_MEDIUM_PCT:
+        return RiskScore("MEDIUM", avg)
+    return RiskScore("HIGH", avg)
+
+
+def sub_labels(subs: Iterable[SubResult]) -> list[str]:
+    """Sub names for table columns and chart categories, keyed apart when names repeat."""
+    subs = list(subs)
+    counts = Counter(sub.name for sub in subs)
+    return [f"{sub.name} ({sub.key})" if counts[sub.name] > 1 else sub.name for sub in subs]
+
+
+@dataclass
+class TradeResult:
+    trade: str
+    scope: pd.DataFrame
+    budget: float
+    subs: dict[str, SubResult] = field(default_factory=dict)
+
+    @property
+    def active(self) -> dict[str, SubResult]:
+        """Subs that submitted a bid."""
+        return {k: s for k, s in self.subs.items() if s.has_bid}
+
+    def winner(self) -> SubResult | None:
+        """Active sub with the lowest adjusted total."""
+        active = self.active
+        if not active:
+            return None
+        return min(active.values(), key=lambda s: s.adjusted_total)
+
+    def status_matrix(self) -> np.ndarray:
+        """Coverage Matrix codes for every (scope row, sub) at once, subs in order."""
+        subs = list(self.subs.values())
+        if not subs:
+            return np.zeros((len(self.scope), 0), dtype=np.int8)
+        included = np.column_stack([s.included for s in subs])
+        excluded = np.column_stack([s.excluded for s in subs])
+        fallback = np.where([s.has_bid for s in subs], CODE_GAP, CODE_NO_BID)
+        covered = CODE_INCLUDED
+        if any(s.short_qty is not None for s in subs):
+            short = np.column_stack([np.zeros(len(self.scope)) if s.short_qty is None else s.short_qty for s in subs])
+            covered = np.where(short > 0, CODE_PARTIAL, CODE_INCLUDED)
+        return np.where(excluded, CODE_EXCLUDED, np.where(included, covered, fallback)).astype(np.int8)
+
+    def delta_pct(self, sub: SubResult) -> float:
+        """The sub's adjusted total as % over (+) or under (−) the trade budget."""
+        return pct_delta(sub.adjusted_total, self.budget)
+
+    def risk(self) -> RiskScore:
+        """
+        LOW / MEDIUM / HIGH from the average absolute % delta of the active
+        subs; NO DATA without bids or budget.
+        """
+        deltas = [self.delta_pct(s) for s in self.active.values()] if self.budget > 0 else []
+        return risk_score(np.array(deltas, dtype=float))
+
+
+@dataclass
+class ProjectResult:
+    trades: dict[str, TradeResult] = field(default_factory=dict)
+
+    def __getitem__(self, trade: str) -> TradeResult:
+        return self.trades[trade]
+
+    @property
+    def budget(self) -> float:
+        return sum(t.budget for t in self.trades.values())
+
+
+@dataclass
+class DivergenceMatrix:
+    """
+    Adjusted-bid % delta vs. budget for every bidder across trades.
+
+    Rows are bidder labels — the same name in several trades shares a row, while
+    repeated names within one trade are keyed apart (``sub_labels``), so no
+    bid is ever folded into another. ``present`` marks cells where the bidder
+    has a sub in the trade; ``delta`` is NaN where that sub has no bid (or the
+    trade no budget) and for absent cells.
+    """
+    trades: list[str]
+    bidders: list[str]
+    delta: np.ndarray
+    present: np.ndarray
+
+    def risk(self) -> list[RiskScore]:
+        """Per-trade risk from the same grid the heatmap draws."""
+        return [risk_score(col[~np.isnan(col)]) for col in self.delta.T]
+
+
+def divergence_matrix(results: Mapping[str, TradeResult]) -> DivergenceMatrix:
+    """Dense bidder × trade grid built straight from leveling results, in trade then sub order."""
+    trades = list(results)
+    rows: dict[str, int] = {}
+    cells = []
+    for t, result in enumerate(results.values()):
+        for label, sub in zip(sub_labels(result.subs.values()), result.subs.values()):
+            row = rows.setdefault(label, len(rows))
+            delta = result.delta_pct(sub) if sub.has_bid and result.budget > 0 else np.nan
+            cells.append((row, t, delta))
+    delta = np.full((len(rows), len(trades)), np.nan)
+    present = np.zeros((len(rows), len(trades)), dtype=bool)
+    if cells:
+        r, t, d = (np.array(c) for c in zip(*cells))
+        r, t = r.astype(np.int64), t.astype(np.int64)
+        delta[r, t] = d
+        present[r, t] = True
+    return DivergenceMatrix(trades=trades, bidders=list(rows), delta=delta, present=present)
+
+
+def plug_vector(scope_df: pd.DataFrame, plug_rates: PlugRates | None = None, trade: str | None = None) -> pd.Series:
+    """Plug cost per scope row: the configured override, else the row's budget."""
+    budgets = scope_df["Budget_Total"].to_numpy(dtype=float)
+    if plug_rates is None or len(plug_rates) == 0 or scope_df.empty:
+        return pd.Series(budgets, index=scope_df.index)
+    if isinstance(plug_rates, pd.Series):
+        if not plug_rates.index.equals(scope_df.index):
+            plug_rates = plug_rates.reindex(scope_df.index)
+        values = plug_rates.to_numpy(dtype=float, na_value=np.nan)
+    else:
+        trades = scope_df["Trade"].astype(str) if trade is None else trade
+        keys = trades + "::" + scope_df["Item"].astype(str)
+        values = keys.map(plug_rates).to_numpy(dtype=float, na_value=np.nan)
+    return pd.Series(np.where(np.isnan(values), budgets, values), index=scope_df.index)
+
+
+def _quantity_fingerprint(scope_df: pd.DataFrame) -> str:
+    """Digest of the Quantity and Unit columns, which partial coverage also reads."""
+    columns = [c for c in ("Quantity", "Unit") if c in scope_df]
+    if scope_df.empty or not columns:
+        return ""
+    frame = scope_df[columns].astype({"Unit": str} if "Unit" in columns else {})
+    rows = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return hashlib.blake2b(rows.tobytes(), digest_size=16).hexdigest()
+
+
+def _sub_result(key: str, bid: dict, included: np.ndarray, excluded: np.ndarray,
+                items: np.ndarray, budgets: np.ndarray, plugs: np.ndarray, gap_cost: float,
+                partial: "_Partials | None" = None, column: int = 0) -> SubResult:
+    missing_rows = ~included
+    missing = [
+        {"item": item, "budget": budget, "plug": plug}
+        for item, budget, plug in zip(
+            items[missing_rows].tolist(), budgets[missing_rows].tolist(), plugs[missing_rows].tolist()
+        )
+    ]
+    result = SubResult(
+        key=key,
+        name=bid["name"] or f"Sub {key}",
+        total=bid["total"],
+        included=included,
+        excluded=excluded,
+        missing_items=missing,
+        gap_cost=float(gap_cost),
+    )
+    if partial is not None:
+        short = partial.short[:, column]
+        rows = np.flatnonzero(short > 0)
+        result.short_qty = short
+        result.partial_cost = float(partial.costs[column])
+        result.gap_cost += result.partial_cost
+        result.partial_items = [
+            {"item": item, "quantity": qty, "short": s, "unit": unit, "plug": plug}
+            for item, qty, s, unit, plug in zip(
+                items[rows].tolist(), partial.quantity[rows].tolist(), short[rows].tolist(),
+                partial.units[rows].tolist(), (short[rows] * partial.unit_price[rows]).tolist(),
+            )
+        ]
+    return result
+
+
+@dataclass
+class _Partials:
+    """Short quantities (rows × subs) of a batch of subs and what they cost."""
+    short: np.ndarray
+    costs: np.ndarray
+    quantity: np.ndarray
+    units: np.ndarray
+    unit_price: np.ndarray
+
+
+def _split_inclusions(bids: Mapping[str, dict], keys: list[str]) -> tuple[list[list[str]], list[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Each sub's inclusion lines that quote no quantity, plus the distinct
+    quantity-quoting lines (text left once the quantity is removed, quantity,
+    unit) and the (quoting lines × subs) mask of who wrote them.
+    """
+    bid_lines = [normalize_lines(bids[k]["inclusions"]) for k in keys]
+    unique = list(dict.fromkeys(line for lines in bid_lines for line in lines))
+    split = split_quantities(unique)
+    quoted = np.flatnonzero(split.quoted)
+    column = {unique[q]: i for i, q in enumerate(quoted.tolist())}
+    owner = np.zeros((len(quoted), len(keys)), dtype=bool)
+    plain = []
+    for j, lines in enumerate(bid_lines):
+        plain.append([line for line in lines if line not in column])
+        owner[[column[line] for line in lines if line in column], j] = True
+    return plain, [split.text[q] for q in quoted], split.quantity[quoted], split.unit[quoted], owner
+
+
+def _partials(scope_df: pd.DataFrame, plugs: np.ndarray, included: np.ndarray, line_match: np.ndarray,
+              line_quantity: np.ndarray, line_units: np.ndarray, owner: np.ndarray) -> _Partials:
+    """Short quantity of every included row for every sub, priced at the row's plug per unit."""
+    quantity = scope_df["Quantity"].to_numpy(dtype=float, na_value=np.nan) if "Quantity" in scope_df else np.full(len(scope_df), np.nan)
+    units = canonical_units(scope_df["Unit"]) if "Unit" in scope_df else np.full(len(scope_df), None, dtype=object)
+    short = short_quantities(quantity, units, line_match, line_quantity, line_units, owner) * included
+    unit_price = np.divide(plugs, quantity, out=np.zeros(len(plugs)), where=np.nan_to_num(quantity) > 0)
+    return _Partials(short=short, costs=unit_price @ short, quantity=quantity, units=units, unit_price=unit_price)
+
+
+def level_trade(scope_df: pd.DataFrame, bids: Mapping[str, dict], plug_rates: PlugRates | None = None, *,
+                trade: str | None = None, cache: GapCache | None = None,
+                index: ItemCorpus | None = None,
+                coverage: Mapping[str, tuple[np.ndarray, np.ndarray]] | None = None,
+                similarity: float | None = None, vectors: ItemVectors | None = None,
+                quantities: bool = False) -> TradeResult:
+    """
+    Level every sub's bid against one trade's scope in a single batched pass.
+
+    `trade` defaults to the scope's first Trade value. With a `cache`, subs
+    whose scope, lines and plugs are unchanged reuse their stored result and
+    only the remaining subs are scanned. A prebuilt `index` (e.g. a
+    ``ScopeIndex`` over the same rows) replaces the per-call item corpus.
+    `coverage` maps sub key → (included, excluded) row masks already known for
+    the sub's current lines (e.g. from ``LineCoverage``); those subs skip the scan.
+
+    With a `similarity` threshold, lines match items by TF-IDF trigram cosine
+    (``leveler.similarity``) instead of the substring rule, using `vectors`
+    built for these rows if given; substring `index` and `coverage` are unused.
+
+    With `quantities`, inclusions are matched with their quantity phrases
+    removed, and an included row whose matching lines quote less than its
+    Quantity (in a unit of the same dimension) is partial: the short quantity
+    times the row's plug per unit is added to the sub's gap cost. Known
+    `coverage` is unused, as it was found from the unsplit lines.
+    """
+    if quantities:
+        coverage = None
+    if similarity is not None:
+        coverage = None
+        if vectors is None:
+            vectors = ItemVectors(scope_df["Item"].astype(str), scope_df.get("Description"))
+    if scope_df.empty:
+        scope_df = pd.DataFrame(columns=["Trade", "Item", "Budget_Total"])
+    if trade is None:
+        trade = str(scope_df["Trade"].iloc[0]) if len(scope_df) else ""
+    budgets = scope_df["Budget_Total"].astype(float)
+    plug_values = plug_vector(scope_df, plug_rates, trade).to_numpy(dtype=float)
+    result = TradeResult(trade=trade, scope=scope_df, budget=float(budgets.sum()))
+
+    keys = {}
+    if cache is not None:
+        with stage("cache lookup", items=len(bids)):
+            scope_fp = scope_fingerprint(scope_df)
+            if similarity is not None:
+                scope_fp = f"{scope_fp}:{vectors.fingerprint}:{similarity}"
+            if quantities:
+                scope_fp = f"{scope_fp}:qty:{_quantity_fingerprint(scope_df)}"
+            for key, bid in bids.items():
+                with stage(f"sub {key}", items=len(bid["inclusions"]) + len(bid["exclusions"])):
+                    keys[key] = bid_key(scope_fp, bid["inclusions"], bid["exclusions"], plug_values)
+                    cached = cache.get(keys[key])
+                    if cached is not None:
+                        name = bid["name"] or f"Sub {key}"
+                        result.subs[key] = replace(cached, key=key, name=name, total=bid["total"])
+
+    pending = [k for k in bids if k not in result.subs]
+    if pending:
+        known = [k for k in pending if coverage is not None and k in coverage]
+        pending = [k for k in pending if k not in known]
+        partial = None
+        if pending:
+            # One batched scan for every pending sub: timed per trade, not per sub.
+            with stage("gap scan", items=len(pending)):
+                inclusions = [bids[k]["inclusions"] for k in pending]
+                if quantities:
+                    inclusions, quoted, line_quantity, line_units, owner = _split_inclusions(bids, pending)
+                if similarity is not None:
+                    included = vectors.coverage_matrix(inclusions, similarity)
+                    excluded = vectors.coverage_matrix([bids[k]["exclusions"] for k in pending], similarity)
+                else:
+                    corpus = index if index is not None else ItemCorpus(scope_df["Item"].astype(str))
+                    included = coverage_matrix(corpus, inclusions)
+                    excluded = coverage_matrix(corpus, [bids[k]["exclusions"] for k in pending])
+            if quantities:
+                with stage("partial quantities", items=len(quoted)):
+                    # One column per quoting line: the rows that line alone matches, which
+                    # its writers' coverage then takes in.
+                    if similarity is not None:
+                        line_match = vectors.coverage_matrix([[t] for t in quoted], similarity)
+                    else:
+                        line_match = corpus.line_matrix(quoted)
+                    included |= line_match @ owner
+                    partial = _partials(scope_df, plug_values, included, line_match, line_quantity, line_units, owner)
+        else:
+            included = excluded = np.zeros((len(scope_df), 0), dtype=bool)
+        if known:
+            included = np.column_stack([included] + [coverage[k][0] for k in known])
+            excluded = np.column_stack([excluded] + [coverage[k][1] for k in known])
+            pending += known
+        with stage("gap costs", items=len(pending)):
+            costs = gap_costs(included, plug_values)
+            items = scope_df["Item"].to_numpy()
+            budget_values = budgets.to_numpy()
+            for j, key in enumerate(pending):
+                with stage(f"sub {key}"):
+                    result.subs[key] = _sub_result(
+                        key, bids[key], included[:, j], excluded[:, j], items, budget_values, plug_values, costs[j],
+                        partial, j,
+                    )
+                    if cache is not None:
+                        cache.put(keys[key], result.subs[key], tag=trade)
+
+    result.subs = {k: result.subs[k] for k in bids}
+    return result
+
+
+def level_project(scope: pd.DataFrame | ScopeStore, bids: Mapping[str, Mapping[str, dict]],
+                  plug_rates: PlugRates | None = None, *, trades: list[str] | None = None,
+                  cache: GapCache | None = None, similarity: float | None = None,
+                  quantities: bool = False) -> ProjectResult:
+    """
+    Level every trade of a project.
+
+    `scope` is the master scope frame (or an already partitioned ``ScopeStore``,
+    whose trade indexes are then reused); `bids` maps trade → sub → bid.
+    `trades` fixes which trades are leveled and in what order — by default every
+    trade that has scope or bids. `similarity` is the optional match threshold
+    ``level_trade`` takes, with the store's per-trade vectors; `quantities`
+    turns on partial coverage.
+    """
+    store = scope if isinstance(scope, ScopeStore) else ScopeStore(scope)
+    if trades is None:
+        trades = store.trades + [t for t in bids if t not in store]
+    project = ProjectResult()
+    for trade in trades:
+        part = store.get(trade)
+        project.trades[trade] = level_trade(
+            part.frame, bids.get(trade, {}), plug_rates, trade=trade, cache=cache,
+            index=store.index(trade) if part.count and similarity is None else None,
+            similarity=similarity, vectors=part.vectors() if part.count and similarity is not None else None,
+            quantities=quantities,
+        )
+    return project
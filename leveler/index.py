@@ -0,0 +1,140 @@
+"""
+Inverted n-gram index over scope item names.
+
+Every item name is posted under its distinct character trigrams. A trigram
+index answers both halves of the substring rule without touching every row:
+
+* line ⊂ item — the item must contain every trigram of the line, so candidates
+  are the intersection of the line's posting lists (rarest first).
+* item ⊂ line — every trigram of the item must occur in the line, so each item
+  is also filed under one anchor (its rarest trigram) and candidates are the
+  items anchored on a trigram the line contains.
+
+Candidates are then verified with an exact substring test, so results are
+identical to ``ItemCorpus``. Names and lines shorter than a trigram fall back
+to the corpus scan.
+
+Given a compiled ``ItemAutomaton``, the item ⊂ line half skips candidates
+altogether: one Aho–Corasick pass over the bid's lines names every item found.
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+from leveler.automaton import ItemAutomaton
+from leveler.coverage import _SEP, ItemCorpus
+
+N = 3
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def ngrams(text: str) -> set[str]:
+    """Distinct character trigrams of `text` (empty for strings shorter than N)."""
+    return {text[i:i + N] for i in range(len(text) - N + 1)}
+
+
+class ScopeIndex(ItemCorpus):
+    """``ItemCorpus`` with trigram posting lists for candidate pruning."""
+
+    def __init__(self, items: Iterable[str], automaton: ItemAutomaton | None = None):
+        super().__init__(items)
+        self.automaton = automaton
+        if automaton is not None:
+            ids = automaton.pattern_ids
+            self.row_patterns = np.array([ids.get(item, -1) if item else -1 for item in self.items], dtype=np.int64)
+            self.unscanned_rows = np.flatnonzero(self.row_patterns < 0).tolist()
+        postings: dict[str, list[int]] = {}
+        item_grams = [ngrams(item) for item in self.items]
+        for row, grams in enumerate(item_grams):
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+        anchors: dict[str, list[int]] = {}
+        short_rows = []
+        for row, grams in enumerate(item_grams):
+            if not grams:
+                short_rows.append(row)
+                continue
+            anchor = min(grams, key=lambda g: (len(postings[g]), g))
+            anchors.setdefault(anchor, []).append(row)
+        self.postings = {g: np.asarray(rows, dtype=np.int64) for g, rows in postings.items()}
+        self.anchors = {g: np.asarray(rows, dtype=np.int64) for g, rows in anchors.items()}
+        self.short_rows = short_rows
+
+    def candidates_containing(self, line: str, probes: int = 3) -> np.ndarray:
+        """
+        Rows holding the `probes` rarest trigrams of `line`. Intersecting a few
+        short lists already prunes almost everything; verification does the rest.
+        """
+        lists = []
+        for gram in ngrams(line):
+            rows = self.postings.get(gram)
+            if rows is None:
+                return _EMPTY
+            lists.append(rows)
+        lists.sort(key=len)
+        rows = lists[0]
+        for other in lists[1:probes]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+            if not len(rows):
+                break
+        return rows
+
+    def candidates_within(self, line: str) -> np.ndarray:
+        """Rows whose anchor trigram occurs in `line`."""
+        lists = [self.anchors[g] for g in ngrams(line) if g in self.anchors]
+        if not lists:
+            return _EMPTY
+        return np.concatenate(lists)
+
+    def rows_containing(self, line: str) -> list[int]:
+        if len(line) < N:
+            return super().rows_containing(line)
+        if len(line) > self.longest:
+            return []
+        items = self.items
+        return [r for r in self.candidates_containing(line).tolist() if line in items[r]]
+
+    def rows_within(self, lines: list[str]) -> np.ndarray:
+        if self.automaton is not None:
+            return self._rows_within_automaton(lines)
+        mask = np.zeros(len(self.items), dtype=bool)
+        items = self.items
+        if self.short_rows:
+            haystack = _SEP.join(lines)
+            mask[[r for r in self.short_rows if items[r] in haystack]] = True
+        for line in lines:
+            hits = [r for r in self.candidates_within(line).tolist() if not mask[r] and items[r] in line]
+            mask[hits] = True
+        return mask
+
+    def line_matrix(self, lines: list[str]) -> np.ndarray:
+        if self.automaton is None:
+            return super().line_matrix(lines)
+        # One automaton pass finds every (item, line) hit; names can repeat across rows.
+        out = np.zeros((len(self.items), len(lines)), dtype=bool)
+        hits = self.automaton.scan(lines)
+        if hits:
+            pids, line_nos, _ = (np.array(c, dtype=np.int64) for c in zip(*hits))
+            order = np.argsort(self.row_patterns, kind="stable")
+            sorted_ids = self.row_patterns[order]
+            lo, hi = np.searchsorted(sorted_ids, pids, "left"), np.searchsorted(sorted_ids, pids, "right")
+            counts = hi - lo
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            out[order[np.repeat(lo, counts) + offsets], np.repeat(line_nos, counts)] = True
+        items = self.items
+        for j, line in enumerate(lines):
+            out[[r for r in self.unscanned_rows if items[r] in line], j] = True
+            out[self.rows_containing(line), j] = True
+        return out
+
+    def _rows_within_automaton(self, lines: list[str]) -> np.ndarray:
+        found = self.automaton.found(lines)
+        mask = np.isin(self.row_patterns, np.fromiter(found, dtype=np.int64, count=len(found)))
+        if self.unscanned_rows:
+            # empty names, or names the automaton was compiled without
+            haystack = _SEP.join(lines)
+            items = self.items
+            mask[[r for r in self.unscanned_rows if items[r] in haystack]] = True
+        return mask
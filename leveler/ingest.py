@@ -0,0 +1,187 @@
+"""
+Master scope ingestion.
+
+Scope CSVs are read in fixed-size chunks so memory stays bounded by the chunk
+size plus the typed result, whatever the file length. The header line is
+checked before any data is parsed, column dtypes are fixed once at load time
+(float64 money and quantities, categorical Trade and Unit), and unusable rows
+are reported with their CSV line numbers instead of failing the whole upload.
+Each chunk's lines are field-counted before pandas parses them, so rows with
+more fields than the header are reported wherever the chunk boundaries fall.
+"""
+
+import csv
+import io
+import itertools
+import os
+import re
+import warnings
+from contextlib import closing
+from dataclasses import dataclass
+from typing import IO, Iterator
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+SCOPE_COLUMNS = ["Trade", "Item", "Unit", "Quantity", "Unit_Cost", "Budget_Total", "Description"]
+REQUIRED_COLUMNS = {"Trade", "Item", "Budget_Total"}
+NUMERIC_COLUMNS = ["Quantity", "Unit_Cost", "Budget_Total"]
+CATEGORICAL_COLUMNS = ["Trade", "Unit"]
+TEXT_COLUMNS = ["Item", "Description"]
+
+_READ_DTYPES = {**{col: "category" for col in CATEGORICAL_COLUMNS}, **{col: str for col in TEXT_COLUMNS}}
+_SKIPPED_LINE = re.compile(r"Skipping line (\d+): (.+)")
+
+
+class ScopeSchemaError(ValueError):
+    """The scope file is unusable as a whole (e.g. a required column is missing)."""
+
+
+@dataclass
+class BadRow:
+    line: int
+    reason: str
+
+
+def empty_scope() -> pd.DataFrame:
+    """A zero-row scope frame with the load-time dtypes."""
+    return normalize_scope(pd.DataFrame(columns=SCOPE_COLUMNS))
+
+
+def normalize_scope(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fix scope column dtypes: float64 numerics and categorical Trade/Unit.
+    Missing optional columns are added empty. Returns a new frame.
+    """
+    df = df.copy()
+    for col in SCOPE_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.Series(np.nan, index=df.index, dtype=object)
+    for col in NUMERIC_COLUMNS:
+        if df[col].dtype != "float64":
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in CATEGORICAL_COLUMNS:
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _validate_chunk(chunk: pd.DataFrame, lines: np.ndarray) -> tuple[pd.DataFrame, list[BadRow]]:
+    blank = chunk.isna().all(axis=1).to_numpy()
+    budget = pd.to_numeric(chunk["Budget_Total"], errors="coerce")
+    reasons = [
+        (chunk["Trade"].isna().to_numpy(), "missing Trade"),
+        (chunk["Item"].isna().to_numpy(), "missing Item"),
+        (budget.isna().to_numpy(), "Budget_Total is missing or not a number"),
+    ]
+    bad = np.zeros(len(chunk), dtype=bool)
+    found = []
+    for mask, reason in reasons:
+        mask = mask & ~blank & ~bad
+        found.extend(BadRow(int(line), reason) for line in lines[mask])
+        bad |= mask
+    return chunk[~bad & ~blank], found
+
+
+def _text_lines(source: str | os.PathLike | IO) -> Iterator[str]:
+    """The source's lines as text; a file object is left at the position it started from."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8-sig", errors="replace") as f:
+            yield from f
+        return
+    # Plain loops, not ``yield from``: closing this generator must not close the caller's file.
+    start = source.tell()
+    try:
+        if isinstance(source.read(0), bytes):
+            text = io.TextIOWrapper(source, encoding="utf-8-sig", errors="replace", newline="")
+            try:
+                for line in text:
+                    yield line
+            finally:
+                text.detach()
+        else:
+            for line in source:
+                yield line
+    finally:
+        source.seek(start)
+
+
+def _field_counts(block: list[str]) -> np.ndarray:
+    """Fields per line: a comma count, with only the lines holding quotes split properly."""
+    lines = pd.Series(block, dtype=object)
+    counts = lines.str.count(",").to_numpy(dtype=np.int64) + 1
+    quoted = np.flatnonzero(lines.str.contains('"', regex=False).to_numpy(dtype=bool))
+    if len(quoted):
+        counts[quoted] = [len(row) for row in csv.reader([block[i] for i in quoted])]
+    return counts
+
+
+def read_scope_csv(source: str | IO, chunksize: int = 50_000) -> tuple[pd.DataFrame, list[BadRow]]:
+    """
+    Stream a master scope CSV into a typed frame.
+
+    Returns the normalized frame and the rows that were dropped, by CSV line
+    number (line 1 is the header; records are assumed to be one per line).
+    Raises ``ScopeSchemaError`` if a required column is missing.
+    """
+    with closing(_text_lines(source)) as lines:
+        header = next(lines, "").lstrip("\ufeff")
+        columns = next(csv.reader([header]), [])
+        missing = REQUIRED_COLUMNS - set(columns)
+        if missing:
+            raise ScopeSchemaError(f"Missing columns: {sorted(missing)}")
+        if not header.endswith("\n"):
+            header += "\n"
+
+        bad_rows: list[BadRow] = []
+        chunks: list[pd.DataFrame] = []
+        first_line = 2
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", pd.errors.ParserWarning)
+            while block := list(itertools.islice(lines, chunksize)):
+                numbers = np.arange(first_line, first_line + len(block))
+                first_line += len(block)
+                # The C parser only checks a row against the field count of the
+                # chunk it opens, so overlong rows are dropped here first.
+                counts = _field_counts(block)
+                over = counts > len(columns)
+                bad_rows.extend(
+                    BadRow(int(line), f"expected {len(columns)} fields, saw {n}")
+                    for line, n in zip(numbers[over], counts[over])
+                )
+                kept = numbers[~over]
+                chunk = pd.read_csv(
+                    io.StringIO(header + "".join(line for line, o in zip(block, over) if not o)),
+                    dtype=_READ_DTYPES, on_bad_lines="warn", skip_blank_lines=False,
+                )
+                # Anything else the parser rejects is reported by its chunk-relative line.
+                skipped = []
+                for w in caught:
+                    for line, reason in _SKIPPED_LINE.findall(str(w.message)):
+                        skipped.append(int(kept[int(line) - 2]))
+                        bad_rows.append(BadRow(skipped[-1], reason.strip()))
+                caught.clear()
+                good, bad = _validate_chunk(chunk, kept[~np.isin(kept, skipped)][: len(chunk)])
+                bad_rows.extend(bad)
+                chunks.append(normalize_scope(good))
+
+    bad_rows.sort(key=lambda r: r.line)
+    if not chunks:
+        return empty_scope(), bad_rows
+    return concat_scope(chunks), bad_rows
+
+
+def _object_categories(values: pd.Series) -> pd.Categorical:
+    # union_categoricals needs one category dtype; empty or inferred-str categories may differ.
+    cat = values.array
+    return cat.set_categories(cat.categories.astype(object))
+
+
+def concat_scope(chunks: list[pd.DataFrame], ignore_index: bool = True) -> pd.DataFrame:
+    """Concatenate normalized scope frames, unioning categories instead of decaying to object."""
+    cats = {col: union_categoricals([_object_categories(c[col]) for c in chunks]) for col in CATEGORICAL_COLUMNS}
+    df = pd.concat([c.drop(columns=CATEGORICAL_COLUMNS) for c in chunks], ignore_index=ignore_index)
+    for col, values in cats.items():
+        df[col] = pd.Categorical(values, categories=values.categories).remove_unused_categories()
+    return df[SCOPE_COLUMNS + [c for c in df.columns if c not in SCOPE_COLUMNS]]
@@ -0,0 +1,231 @@
+"""
+Process-pool leveling for portfolios.
+
+Work is split into (job, trade) units and spread across a process pool. The
+scopes are packed once into a shared-memory block — budgets, plug costs and
+UTF-8 item names, grouped so every (scope, trade) partition is a contiguous
+row range — and each worker attaches to it once at start-up. A task then
+carries only its unit's address and bids; nothing scope-sized is pickled per
+task. Workers return sub results only, and the parent reattaches its own
+partition frames, so results come back in job order and then trade order
+regardless of which worker finished first.
+
+    with LevelingPool({"p1": scope_df}, workers=8) as pool:
+        results = pool.level({"bid-day-1": ("p1", bids)})
+
+``level_portfolio`` wraps the common one-scope-per-project case. With
+``workers`` of 0 or 1 the same per-unit code runs in-process, which is the
+serial baseline the pool is measured and checked against.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from leveler.engine import PlugRates, ProjectResult, TradeResult, level_trade, plug_vector
+from leveler.index import ScopeIndex
+from leveler.scope import ScopeStore
+
+Bids = Mapping[str, Mapping[str, dict]]
+
+
+class SharedScope:
+    """
+    Scope partitions packed into one shared-memory block.
+
+    Layout: float64 budgets[n] | float64 plugs[n] | int64 offsets[n + 1] | item bytes.
+    ``spec`` is the small picklable descriptor workers attach with.
+    """
+
+    def __init__(self, spec: dict, shm: shared_memory.SharedMemory, owner: bool):
+        self.spec = spec
+        self.shm = shm
+        self.owner = owner
+        n, text_len = spec["rows"], spec["text_bytes"]
+        buf = shm.buf
+        self.budgets = np.ndarray(n, dtype=np.float64, buffer=buf)
+        self.plugs = np.ndarray(n, dtype=np.float64, buffer=buf, offset=8 * n)
+        self.offsets = np.ndarray(n + 1, dtype=np.int64, buffer=buf, offset=16 * n)
+        self.text = np.ndarray(text_len, dtype=np.uint8, buffer=buf, offset=24 * n + 8)
+
+    @classmethod
+    def create(cls, stores: Mapping[str, ScopeStore],
+               plug_rates: Mapping[str, PlugRates | None] | None = None) -> "SharedScope":
+        budgets, plugs, names, units = [], [], [], {}
+        row = 0
+        for scope_id, store in stores.items():
+            rates = (plug_rates or {}).get(scope_id)
+            for trade in store.trades:
+                frame = store.get(trade).frame
+                budgets.append(frame["Budget_Total"].to_numpy(dtype=np.float64))
+                plugs.append(plug_vector(frame, rates, trade).to_numpy(dtype=np.float64))
+                names.extend(s.encode("utf-8") for s in frame["Item"].astype(str))
+                units[(scope_id, trade)] = (row, row + len(frame))
+                row += len(frame)
+
+        lengths = np.fromiter((len(b) for b in names), dtype=np.int64, count=len(names))
+        text = b"".join(names)
+        spec = {"rows": row, "text_bytes": len(text), "units": units}
+        shm = shared_memory.SharedMemory(create=True, size=max(24 * row + 8 + len(text), 1))
+        shared = cls(spec, shm, owner=True)
+        if row:
+            shared.budgets[:] = np.concatenate(budgets)
+            shared.plugs[:] = np.concatenate(plugs)
+        shared.offsets[0] = 0
+        np.cumsum(lengths, out=shared.offsets[1:])
+        shared.text[:] = np.frombuffer(text, dtype=np.uint8)
+        spec["name"] = shm.name
+        return shared
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SharedScope":
+        # Pool workers share the parent's resource tracker, so attaching here
+        # never unlinks the block early; the parent unlinks it on close.
+        return cls(spec, shared_memory.SharedMemory(name=spec["name"]), owner=False)
+
+    def unit(self, scope_id: str, trade: str) -> tuple[pd.DataFrame, pd.Series]:
+        """The partition's scope frame and plug vector, copied out of shared memory."""
+        start, stop = self.spec["units"].get((scope_id, trade), (0, 0))
+        offsets = self.offsets[start:stop + 1] - self.offsets[start]
+        text = self.text[self.offsets[start]:self.offsets[stop]].tobytes()
+        items = [text[a:b].decode("utf-8") for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+        frame = pd.DataFrame({
+            "Trade": [trade] * (stop - start),
+            "Item": items,
+            "Budget_Total": self.budgets[start:stop].copy(),
+        })
+        return frame, pd.Series(self.plugs[start:stop].copy(), index=frame.index)
+
+    def close(self) -> None:
+        self.budgets = self.plugs = self.offsets = self.text = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ── Per-unit leveling (shared by workers and the in-process path) ─────────────
+class _Unit:
+    """A (scope, trade) partition as a worker sees it; indexed once it is reused."""
+
+    def __init__(self, trade: str, frame: pd.DataFrame, plugs: pd.Series):
+        self.trade = trade
+        self.frame = frame
+        self.plugs = plugs
+        self.index: ScopeIndex | None = None
+        self.uses = 0
+
+    def level(self, bids: Mapping[str, dict]) -> dict:
+        # A one-off unit is cheapest to scan with a plain corpus; build the
+        # trigram index only when the same partition is leveled again.
+        self.uses += 1
+        if self.index is None and self.uses > 1 and len(self.frame):
+            self.index = ScopeIndex(self.frame["Item"])
+        return level_trade(self.frame, bids, self.plugs, trade=self.trade, index=self.index).subs
+
+
+_shared: SharedScope | None = None
+_units: dict[tuple[str, str], _Unit] = {}
+
+
+def _init_worker(spec: dict) -> None:
+    global _shared
+    _shared = SharedScope.attach(spec)
+    _units.clear()
+
+
+def _level_unit(task: tuple[str, str, Mapping[str, dict]]) -> dict:
+    scope_id, trade, bids = task
+    unit = _units.get((scope_id, trade))
+    if unit is None:
+        unit = _units[(scope_id, trade)] = _Unit(trade, *_shared.unit(scope_id, trade))
+    return unit.level(bids)
+
+
+# ── Parent side ────────────────────────────────────────────────────────────────
+class LevelingPool:
+    """
+    A process pool bound to a set of scopes.
+
+    `scopes` maps scope id → master scope frame (or ``ScopeStore``);
+    `plug_rates` maps scope id → that scope's plug rates. ``level`` takes jobs
+    as job id → (scope id, trade → sub → bids) and returns job id →
+    ``ProjectResult``, in job order.
+    """
+
+    def __init__(self, scopes: Mapping[str, pd.DataFrame | ScopeStore],
+                 plug_rates: Mapping[str, PlugRates | None] | None = None, workers: int | None = None):
+        self.stores = {k: s if isinstance(s, ScopeStore) else ScopeStore(s) for k, s in scopes.items()}
+        self.plug_rates = plug_rates or {}
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._local_units: dict[tuple[str, str], _Unit] = {}
+        self.shared: SharedScope | None = None
+        self.executor: ProcessPoolExecutor | None = None
+        if self.workers > 1:
+            self.shared = SharedScope.create(self.stores, self.plug_rates)
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(self.shared.spec,))
+
+    def __enter__(self) -> "LevelingPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    def _units(self, jobs: Mapping[str, tuple[str, Bids]]) -> list[tuple[str, str, str, Mapping[str, dict]]]:
+        units = []
+        for job_id, (scope_id, bids) in jobs.items():
+            store = self.stores[scope_id]
+            for trade in store.trades + [t for t in bids if t not in store]:
+                units.append((job_id, scope_id, trade, bids.get(trade, {})))
+        return units
+
+    def level(self, jobs: Mapping[str, tuple[str, Bids]], chunksize: int | None = None) -> dict[str, ProjectResult]:
+        units = self._units(jobs)
+        # Trades nobody bid on have nothing to scan and never leave this process.
+        tasks = [(scope_id, trade, bids) for _, scope_id, trade, bids in units if bids]
+        if self.executor is None:
+            leveled = iter([self._level_local(*task) for task in tasks])
+        else:
+            chunksize = chunksize or max(1, len(tasks) // (self.workers * 4))
+            leveled = self.executor.map(_level_unit, tasks, chunksize=chunksize)
+
+        results = {job_id: ProjectResult() for job_id in jobs}
+        for job_id, scope_id, trade, bids in units:
+            trade_subs = next(leveled) if bids else {}
+            frame = self.stores[scope_id].get(trade).frame
+            results[job_id].trades[trade] = TradeResult(
+                trade=trade, scope=frame, budget=float(frame["Budget_Total"].astype(float).sum()), subs=trade_subs
+            )
+        return results
+
+    def _level_local(self, scope_id: str, trade: str, bids: Mapping[str, dict]) -> dict:
+        unit = self._local_units.get((scope_id, trade))
+        if unit is None:
+            frame = self.stores[scope_id].get(trade).frame
+            plugs = plug_vector(frame, self.plug_rates.get(scope_id), trade)
+            unit = self._local_units[(scope_id, trade)] = _Unit(trade, frame, plugs)
+        return unit.level(bids)
+
+
+def level_portfolio(scopes: Mapping[str, pd.DataFrame | ScopeStore], bids: Mapping[str, Bids],
+                    plug_rates: Mapping[str, PlugRates | None] | None = None, *,
+                    workers: int | None = None) -> dict[str, ProjectResult]:
+    """
+    Level every trade of every project, one process per core by default.
+
+    `scopes`, `bids` and `plug_rates` are keyed by project; each project's
+    bids map trade → sub → bid as for ``level_project``.
+    """
+    with LevelingPool(scopes, plug_rates, workers) as pool:
+        return pool.level({project: (project, bids.get(project, {})) for project in scopes})
@@ -0,0 +1,241 @@
+"""
+On-disk project store.
+
+Projects — master scope, bids and plug overrides — are kept in one SQLite
+file so a browser refresh or a server restart reopens them in milliseconds
+instead of re-ingesting CSVs, with no service to run. Everything is stored per
+trade and written per trade: saving a trade replaces just that trade's scope
+rows, bids and plugs, so an edit costs the size of the trade, not of the
+project, and ``load_scope`` can read a subset of trades.
+
+Scope rows keep their store labels, so plug overrides (keyed by label) and
+partition frames line up again after a reload.
+
+    db = ProjectDB()                        # $LEVELER_DB or ./leveler.db
+    project = db.create_project("Riverside Clinic")
+    db.save_trade(project, "Drywall", scope_rows, bids, plugs)
+    scope = db.load_scope(project)          # or load_scope(project, ["MEP"])
+
+A connection is opened per call, so one ``ProjectDB`` can be shared across
+threads (e.g. Streamlit sessions).
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping
+
+import numpy as np
+import pandas as pd
+
+from leveler.ingest import SCOPE_COLUMNS, empty_scope, normalize_scope
+
+DB_FILE = "leveler.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scope_rows (
+    project TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    label INTEGER NOT NULL,
+    trade TEXT NOT NULL,
+    item TEXT,
+    unit TEXT,
+    quantity REAL,
+    unit_cost REAL,
+    budget_total REAL,
+    description TEXT,
+    PRIMARY KEY (project, label)
+);
+CREATE INDEX IF NOT EXISTS scope_rows_trade ON scope_rows (project, trade);
+CREATE TABLE IF NOT EXISTS bids (
+    project TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    trade TEXT NOT NULL,
+    sub TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    total REAL NOT NULL,
+    inclusions TEXT NOT NULL,
+    exclusions TEXT NOT NULL,
+    PRIMARY KEY (project, trade, sub)
+);
+CREATE TABLE IF NOT EXISTS plugs (
+    project TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    trade TEXT NOT NULL,
+    label INTEGER NOT NULL,
+    plug REAL NOT NULL,
+    PRIMARY KEY (project, label)
+);
+"""
+
+# scope_rows column ← scope frame column
+_ROW_COLUMNS = {
+    "trade": "Trade", "item": "Item", "unit": "Unit", "quantity": "Quantity",
+    "unit_cost": "Unit_Cost", "budget_total": "Budget_Total", "description": "Description",
+}
+
+
+class ProjectNotFound(KeyError):
+    """No project with the given id."""
+
+
+def _none(values: np.ndarray) -> list:
+    """Column values with NaN as None, for SQLite NULLs."""
+    return [None if v is None or (isinstance(v, float) and np.isnan(v)) else v for v in values.tolist()]
+
+
+class ProjectDB:
+    """Projects in one SQLite file: `path`, ``$LEVELER_DB`` or ``leveler.db`` (created on first use)."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = str(path or os.environ.get("LEVELER_DB") or DB_FILE)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA journal_mode = WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # ── Projects ──
+    def list_projects(self) -> list[dict]:
+        """Every project, most recently updated first."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, name, created, updated FROM projects ORDER BY updated DESC").fetchall()
+        return [dict(zip(("id", "name", "created", "updated"), row)) for row in rows]
+
+    def create_project(self, name: str) -> str:
+        project = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT INTO projects VALUES (?, ?, ?, ?)", (project, name, now, now))
+        return project
+
+    def project(self, project: str) -> dict:
+        with self._connect() as conn:
+            row = conn.execute("SELECT id, name, created, updated FROM projects WHERE id = ?", (project,)).fetchone()
+        if row is None:
+            raise ProjectNotFound(project)
+        return dict(zip(("id", "name", "created", "updated"), row))
+
+    def delete_project(self, project: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM projects WHERE id = ?", (project,))
+
+    # ── Writes ──
+    def save_trade(self, project: str, trade: str, scope: pd.DataFrame | None = None,
+                   bids: Mapping[str, dict] | None = None, plugs: pd.Series | None = None) -> None:
+        """
+        Replace whichever of the trade's scope rows, bids (sub → bid, in order)
+        and plug overrides (scope label → plug; NaN rows are dropped) are given,
+        in one transaction.
+        """
+        with self._connect() as conn:
+            self._touch(conn, project)
+            if scope is not None:
+                conn.execute("DELETE FROM scope_rows WHERE project = ? AND trade = ?", (project, trade))
+                columns = [_none(scope[col].astype(object).to_numpy()) for col in _ROW_COLUMNS.values()]
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO scope_rows (project, label, {', '.join(_ROW_COLUMNS)}) VALUES ({', '.join('?' * 9)})",
+                    zip([project] * len(scope), scope.index.astype(int).tolist(), *columns),
+                )
+            if bids is not None:
+                conn.execute("DELETE FROM bids WHERE project = ? AND trade = ?", (project, trade))
+                conn.executemany(
+                    "INSERT INTO bids VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (project, trade, key, pos, bid.get("name", ""), float(bid.get("total", 0.0)),
+                         json.dumps(list(bid.get("inclusions", ()))), json.dumps(list(bid.get("exclusions", ()))))
+                        for pos, (key, bid) in enumerate(bids.items())
+                    ],
+                )
+            if plugs is not None:
+                plugs = plugs.dropna()
+                conn.execute("DELETE FROM plugs WHERE project = ? AND trade = ?", (project, trade))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO plugs VALUES (?, ?, ?, ?)",
+                    zip([project] * len(plugs), [trade] * len(plugs), plugs.index.astype(int).tolist(),
+                        plugs.astype(float).tolist()),
+                )
+
+    def drop_trades(self, project: str, trades: Iterable[str]) -> None:
+        """Remove everything stored for `trades`."""
+        trades = list(trades)
+        if not trades:
+            return
+        marks = ", ".join("?" * len(trades))
+        with self._connect() as conn:
+            self._touch(conn, project)
+            for table in ("scope_rows", "bids", "plugs"):
+                conn.execute(f"DELETE FROM {table} WHERE project = ? AND trade IN ({marks})", (project, *trades))
+
+    def _touch(self, conn: sqlite3.Connection, project: str) -> None:
+        if not conn.execute("UPDATE projects SET updated = ? WHERE id = ?", (time.time(), project)).rowcount:
+            raise ProjectNotFound(project)
+
+    # ── Reads ──
+    def trades(self, project: str) -> list[str]:
+        """Trades with stored scope rows or bids, sorted — for loading a project trade by trade."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT trade FROM scope_rows WHERE project = ? UNION SELECT trade FROM bids WHERE project = ?"
+                " ORDER BY trade", (project, project),
+            ).fetchall()
+        return [trade for (trade,) in rows]
+
+    def load_scope(self, project: str, trades: Iterable[str] | None = None) -> pd.DataFrame:
+        """The project's scope rows (optionally only `trades`), indexed by label, with load-time dtypes."""
+        sql = f"SELECT label, {', '.join(_ROW_COLUMNS)} FROM scope_rows WHERE project = ?"
+        params: list = [project]
+        if trades is not None:
+            trades = list(trades)
+            sql += f" AND trade IN ({', '.join('?' * len(trades))})"
+            params += trades
+        with self._connect() as conn:
+            rows = conn.execute(sql + " ORDER BY label", params).fetchall()
+        if not rows:
+            return empty_scope()
+        labels, *columns = zip(*rows)
+        df = pd.DataFrame(dict(zip(_ROW_COLUMNS.values(), columns)), index=pd.Index(labels, dtype="int64"))
+        return normalize_scope(df)[SCOPE_COLUMNS]
+
+    def load_bids(self, project: str, trades: Iterable[str] | None = None) -> dict[str, dict[str, dict]]:
+        """Trade → sub → bid, subs in stored order — the shape ``BidBook.from_package`` takes."""
+        sql = "SELECT trade, sub, name, total, inclusions, exclusions FROM bids WHERE project = ?"
+        params: list = [project]
+        if trades is not None:
+            trades = list(trades)
+            sql += f" AND trade IN ({', '.join('?' * len(trades))})"
+            params += trades
+        with self._connect() as conn:
+            rows = conn.execute(sql + " ORDER BY trade, position", params).fetchall()
+        package: dict[str, dict[str, dict]] = {}
+        for trade, sub, name, total, inclusions, exclusions in rows:
+            package.setdefault(trade, {})[sub] = {
+                "name": name, "total": total,
+                "inclusions": json.loads(inclusions), "exclusions": json.loads(exclusions),
+            }
+        return package
+
+    def load_plugs(self, project: str) -> pd.Series:
+        """Plug overrides as scope label → plug."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT label, plug FROM plugs WHERE project = ? ORDER BY label", (project,)).fetchall()
+        if not rows:
+            return pd.Series(dtype=float)
+        labels, plugs = zip(*rows)
+        return pd.Series(plugs, index=pd.Index(labels, dtype="int64"), dtype=float)
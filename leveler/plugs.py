@@ -0,0 +1,59 @@
+"""
+Plug cost tables.
+
+In the dashboard, plug overrides are a float Series aligned with the scope's
+row labels — one slot per line item, NaN (or no entry) meaning "plug at the
+row's budget" — so ``plug_vector`` picks a trade's plugs by index instead of
+building a ``"{trade}::{item}"`` key per row. Plug tables on disk are CSVs
+with ``Trade``, ``Item`` and ``Plug`` columns (a ``Budget`` column, as written
+by ``plug_table``, is ignored on import); they read into the keyed mapping the
+batch CLI takes, and map onto any scope's rows with ``plug_series``.
+"""
+
+from pathlib import Path
+from typing import IO, Mapping
+
+import numpy as np
+import pandas as pd
+
+PLUG_COLUMNS = ["Trade", "Item", "Plug"]
+
+
+class PlugTableError(ValueError):
+    """The plug table is missing a required column."""
+
+
+def plug_key(trades: pd.Series | str, items: pd.Series) -> pd.Series:
+    return trades + "::" + items
+
+
+def read_plug_table(source: str | Path | IO) -> dict[str, float]:
+    """``"{trade}::{item}"`` → plug cost from a Trade, Item, Plug CSV; blank plugs are skipped."""
+    df = pd.read_csv(source)
+    missing = [c for c in PLUG_COLUMNS if c not in df.columns]
+    if missing:
+        raise PlugTableError(f"plug table is missing column(s): {', '.join(missing)}")
+    df = df[PLUG_COLUMNS].dropna()
+    plugs = pd.to_numeric(df["Plug"], errors="coerce")
+    df = df[plugs.notna()]
+    keys = plug_key(df["Trade"].astype(str).str.strip(), df["Item"].astype(str).str.strip())
+    return dict(zip(keys, plugs[plugs.notna()].astype(float)))
+
+
+def plug_series(scope_df: pd.DataFrame, rates: Mapping[str, float]) -> pd.Series:
+    """Keyed plug rates laid onto the scope rows; NaN where a row has none."""
+    keys = plug_key(scope_df["Trade"].astype(str), scope_df["Item"].astype(str))
+    return pd.Series(keys.map(rates).to_numpy(dtype=float, na_value=np.nan), index=scope_df.index)
+
+
+def plug_table(scope_df: pd.DataFrame, plugs: pd.Series | None = None) -> pd.DataFrame:
+    """Trade, Item, Budget and effective Plug per scope row — the export format."""
+    budgets = scope_df["Budget_Total"].to_numpy(dtype=float)
+    values = np.full(len(scope_df), np.nan) if plugs is None else (
+        plugs.reindex(scope_df.index).to_numpy(dtype=float, na_value=np.nan))
+    return pd.DataFrame({
+        "Trade": scope_df["Trade"].astype(str).to_numpy(),
+        "Item": scope_df["Item"].astype(str).to_numpy(),
+        "Budget": budgets,
+        "Plug": np.where(np.isnan(values), budgets, values),
+    }, index=scope_df.index)
@@ -0,0 +1,134 @@
+"""
+Opt-in stage timing.
+
+Code marks its expensive steps with ``stage``; while a ``Profiler`` is active
+in the current context, each stage adds its wall time, call count and (if the
+profiler traces memory) allocations to that profiler, nested under whatever
+stage encloses it. With no active profiler ``stage`` returns a shared no-op
+context manager, so instrumented code costs one context-variable lookup.
+
+    profiler = Profiler(trace_memory=True)
+    token = activate(profiler)
+    with stage("level"):
+        level_trade(...)           # adds "level › gap scan", etc.
+    deactivate(token)
+    print(profiler.jsonl(run=1))
+
+The active profiler lives in a ``ContextVar``, so concurrent Streamlit
+sessions (one script thread each) profile independently. Memory tracing uses
+``tracemalloc``, which is process-wide and slows allocation-heavy code
+severalfold; the caller starts and stops it.
+"""
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar, Token
+from dataclasses import asdict, dataclass
+from typing import Iterator
+
+PATH_SEPARATOR = " › "
+
+_NULL = nullcontext()
+_active: ContextVar["Profiler | None"] = ContextVar("leveler_profiler", default=None)
+
+
+@dataclass
+class StageStats:
+    path: tuple[str, ...]
+    calls: int = 0
+    items: int = 0
+    seconds: float = 0.0
+    alloc_bytes: int = 0  # net change in traced memory over the stage
+    peak_bytes: int = 0  # highest traced memory above the stage's start
+
+    @property
+    def name(self) -> str:
+        return PATH_SEPARATOR.join(self.path)
+
+
+class Profiler:
+    """Stage stats for one run, keyed by stage path, in first-entered order."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stats: dict[tuple[str, ...], StageStats] = {}
+        self.started = time.time()
+        self._path: tuple[str, ...] = ()
+        self._peaks: list[int] = []  # running absolute peak per open stage
+
+    @contextmanager
+    def stage(self, name: str, items: int = 0) -> Iterator[None]:
+        path = self._path + (name,)
+        stats = self.stats.get(path)
+        if stats is None:
+            stats = self.stats[path] = StageStats(path)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            start_mem = self._enter_memory()
+        self._path = path
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+            stats.items += items
+            self._path = path[:-1]
+            if tracing:
+                current, peak = self._exit_memory()
+                stats.alloc_bytes += current - start_mem
+                stats.peak_bytes = max(stats.peak_bytes, peak - start_mem)
+
+    def _enter_memory(self) -> int:
+        # The enclosing stage keeps the peak seen so far before the counter is reset for this one.
+        current, peak = tracemalloc.get_traced_memory()
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        self._peaks.append(current)
+        return current
+
+    def _exit_memory(self) -> tuple[int, int]:
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, self._peaks.pop())
+        if self._peaks:
+            self._peaks[-1] = max(self._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        return current, peak
+
+    @property
+    def seconds(self) -> float:
+        """Wall time of the top-level stages."""
+        return sum(s.seconds for s in self.stats.values() if len(s.path) == 1)
+
+    def records(self, **meta) -> list[dict]:
+        """One flat dict per stage — `meta` (e.g. run number, view) plus the stage's stats."""
+        return [
+            {**meta, "started": self.started, "stage": s.name, "depth": len(s.path) - 1,
+             **{k: v for k, v in asdict(s).items() if k != "path"}}
+            for s in self.stats.values()
+        ]
+
+    def jsonl(self, **meta) -> str:
+        return "".join(json.dumps(record) + "\n" for record in self.records(**meta))
+
+
+def activate(profiler: Profiler | None) -> Token:
+    """Make `profiler` (None: nothing) the one ``stage`` reports to in this context."""
+    return _active.set(profiler)
+
+
+def deactivate(token: Token) -> None:
+    _active.reset(token)
+
+
+def active() -> Profiler | None:
+    return _active.get()
+
+
+def stage(name: str, items: int = 0):
+    """Time the enclosed block into the active profiler, if any; `items` counts units of work."""
+    profiler = _active.get()
+    return _NULL if profiler is None else profiler.stage(name, items)
@@ -0,0 +1,124 @@
+"""
+Quantities quoted in bid lines.
+
+Subs often cover a scope item only in part — "GWB 6,000 SF" against a
+10,000 SF line. ``split_quantities`` pulls the first ``<number> <unit>``
+phrase out of each line (the rest of the line is what gets matched against
+the scope) and normalizes the unit; ``short_quantities`` then works out, for
+every (scope row, sub) at once, how much of the row's quantity the sub's
+matching lines leave out.
+
+Units are canonicalized to SF, LF, EA, CY and LB (plus SY, SQ, CF and TON,
+which convert into them); a quantity only counts toward a row whose unit has
+the same dimension. Rows with other units (LS, HR, …) or no quantity are never
+partial. Ratings written with a hyphen ("5-Ton") are not read as quantities.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+# Written form (lowercase) → canonical unit.
+UNIT_ALIASES = {
+    "sf": "SF", "sq ft": "SF", "sq. ft": "SF", "sqft": "SF", "square feet": "SF", "square foot": "SF", "ft2": "SF",
+    "sy": "SY", "sq yd": "SY", "square yards": "SY",
+    "sq": "SQ", "squares": "SQ",
+    "lf": "LF", "lin ft": "LF", "linear feet": "LF", "linear foot": "LF",
+    "ea": "EA", "each": "EA", "pcs": "EA", "pc": "EA",
+    "cy": "CY", "cu yd": "CY", "cubic yards": "CY", "yd3": "CY",
+    "cf": "CF", "cu ft": "CF", "cubic feet": "CF",
+    "lb": "LB", "lbs": "LB", "pounds": "LB",
+    "ton": "TON", "tons": "TON",
+}
+# Canonical unit → (dimension, size in the dimension's base unit).
+UNIT_SCALE = {
+    "SF": ("area", 1.0), "SY": ("area", 9.0), "SQ": ("area", 100.0),
+    "LF": ("length", 1.0),
+    "EA": ("count", 1.0),
+    "CY": ("volume", 1.0), "CF": ("volume", 1.0 / 27.0),
+    "LB": ("weight", 1.0), "TON": ("weight", 2000.0),
+}
+
+_ALTERNATIVES = "|".join(re.escape(a) for a in sorted(UNIT_ALIASES, key=len, reverse=True))
+QUANTITY_PATTERN = re.compile(
+    rf"(?<![\w/.\-])(\d{{1,3}}(?:,\d{{3}})+|\d+(?:\.\d+)?)\s*({_ALTERNATIVES})\.?(?![a-z0-9])", re.IGNORECASE,
+)
+
+
+@dataclass
+class LineQuantities:
+    """Per line: the text left once the quantity phrase is removed, the quantity (NaN if none) and its unit."""
+    text: list[str]
+    quantity: np.ndarray
+    unit: np.ndarray
+
+    @property
+    def quoted(self) -> np.ndarray:
+        return ~np.isnan(self.quantity)
+
+
+def split_quantities(lines: Iterable[str]) -> LineQuantities:
+    lines = pd.Series([str(l) for l in lines], dtype=object)
+    if lines.empty:
+        return LineQuantities([], np.zeros(0), np.zeros(0, dtype=object))
+    found = lines.str.extract(QUANTITY_PATTERN)
+    quantity = pd.to_numeric(found[0].str.replace(",", "", regex=False), errors="coerce").to_numpy(dtype=float)
+    unit = found[1].str.lower().str.replace(r"\s+", " ", regex=True).map(UNIT_ALIASES).to_numpy(dtype=object)
+    text = lines.str.replace(QUANTITY_PATTERN, " ", n=1, regex=True).str.split().str.join(" ")
+    # A line that is nothing but a quantity keeps its text rather than matching everything.
+    text = text.where(text.str.len() > 0, lines)
+    return LineQuantities(text.tolist(), quantity, unit)
+
+
+def _canonical_unit(unit) -> str | None:
+    if not isinstance(unit, str):
+        return None
+    unit = unit.strip().lower()
+    return UNIT_ALIASES.get(unit) or (unit.upper() if unit.upper() in UNIT_SCALE else None)
+
+
+def canonical_units(units: Iterable) -> np.ndarray:
+    """Scope units as canonical codes; None where the unit is unknown or blank."""
+    units = units if isinstance(units, pd.Series) else pd.Series(list(units), dtype=object)
+    # A categorical Unit column maps once per category.
+    return units.map(_canonical_unit).to_numpy(dtype=object)
+
+
+_DIMENSIONS = {dim: i for i, dim in enumerate(dict.fromkeys(dim for dim, _ in UNIT_SCALE.values()))}
+
+
+def _unit_scale(units: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Dimension code (-1 if unknown) and size per unit."""
+    dims = np.fromiter((_DIMENSIONS[UNIT_SCALE[u][0]] if u in UNIT_SCALE else -1 for u in units), dtype=np.int8, count=len(units))
+    size = np.fromiter((UNIT_SCALE[u][1] if u in UNIT_SCALE else np.nan for u in units), dtype=float, count=len(units))
+    return dims, size
+
+
+def conversion(to_units: np.ndarray, from_units: np.ndarray) -> np.ndarray:
+    """(len(to) × len(from)) factors turning a `from` quantity into `to` units; NaN across dimensions."""
+    to_dim, to_size = _unit_scale(to_units)
+    from_dim, from_size = _unit_scale(from_units)
+    same = (to_dim[:, None] == from_dim[None, :]) & (to_dim[:, None] >= 0)
+    return np.where(same, from_size[None, :] / to_size[:, None], np.nan)
+
+
+def short_quantities(item_quantity: np.ndarray, item_units: np.ndarray, line_match: np.ndarray,
+                     line_quantity: np.ndarray, line_units: np.ndarray, owner: np.ndarray) -> np.ndarray:
+    """
+    (rows × subs) quantity each sub leaves out of each row it quotes a quantity for.
+
+    `line_match` is the (rows × quoted lines) match mask and `owner` the
+    (quoted lines × subs) mask of which sub wrote each line. A row's bid
+    quantity is the sum of the converted quantities of the sub's lines that
+    match it; rows with no such line, or no scope quantity, are 0.
+    """
+    factor = conversion(item_units, line_units)
+    usable = line_match & ~np.isnan(factor)
+    amounts = np.where(usable, np.nan_to_num(factor) * line_quantity[None, :], 0.0)
+    bid_quantity = amounts @ owner.astype(float)
+    quoted = usable.astype(float) @ owner.astype(float) > 0
+    scope_quantity = np.nan_to_num(np.asarray(item_quantity, dtype=float))[:, None]
+    return np.where(quoted & (scope_quantity > 0), np.clip(scope_quantity - bid_quantity, 0.0, None), 0.0)
@@ -0,0 +1,300 @@
+"""
+What-if sweeps over plug costs.
+
+A bid's adjusted total is its raw total plus, for every scope row it misses
+(or covers only in part), that row's plug cost — linear in the plugs. A
+``ScenarioModel`` holds that linear map for every bid of a project, with the
+plugs gathered into groups (one per trade, or one per scope item that some
+bid is short of) and each group's base-case gap dollars per bid in an
+``exposure`` matrix. A scenario is a vector of plug multipliers, one per
+group, so for a (scenarios × groups) matrix of multipliers
+
+    adjusted = totals + multipliers @ exposure.T
+
+is every bid's adjusted total in every scenario: one matrix product for the
+whole sweep. Each trade's winner is then an argmin over its bids' columns.
+
+    model = ScenarioModel.build(project.trades, plugs, by="item")
+    run = model.run(model.monte_carlo(5_000, spread=0.2, seed=1))
+    run.stability()          # win share and adjusted-total range per bid
+    model.tornado(0.2)       # how far each item's band moves each award
+
+Spreads are fractions of the base plug (0.2 = ±20%), either one for every
+group or per group label / trade name; groups left out of a mapping stay at
+their base plug.
+"""
+
+from dataclasses import dataclass
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from leveler.engine import PlugRates, SubResult, TradeResult, plug_vector, sub_labels
+
+GROUP_BY = ("trade", "item")
+DISTRIBUTIONS = ("uniform", "triangular", "normal")
+# Largest ``bands`` grid built before asking for Monte Carlo instead.
+MAX_GRID_SCENARIOS = 1_000_000
+
+Spread = float | Mapping[str, float] | np.ndarray
+
+
+def _row_weights(result: TradeResult, subs: Mapping[str, SubResult]) -> np.ndarray:
+    """
+    (subs × rows) share of each row's plug in each sub's gap cost: 1 where the
+    row is missing, short / Quantity where it is partial (as ``level_trade``
+    prices it), else 0.
+    """
+    n = len(result.scope)
+    if not subs:
+        return np.zeros((0, n))
+    weights = np.vstack([~s.included for s in subs.values()]).astype(float)
+    if "Quantity" in result.scope and any(s.short_qty is not None for s in subs.values()):
+        quantity = result.scope["Quantity"].to_numpy(dtype=float, na_value=np.nan)
+        per_unit = np.divide(1.0, quantity, out=np.zeros(n), where=np.nan_to_num(quantity) > 0)
+        for i, sub in enumerate(subs.values()):
+            if sub.short_qty is not None:
+                weights[i] += sub.short_qty * per_unit
+    return weights
+
+
+def _segment_argmin(values: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Per row, the column of the smallest value within each [bounds[t], bounds[t+1]) run; -1 for empty runs."""
+    out = np.full((len(values), len(bounds) - 1), -1, dtype=np.int64)
+    for t, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if hi > lo:
+            out[:, t] = lo + np.argmin(values[:, lo:hi], axis=1)
+    return out
+
+
+@dataclass
+class ScenarioModel:
+    """Adjusted totals of a project's bids as a linear function of per-group plug multipliers."""
+    trades: list[str]
+    bounds: np.ndarray  # bids of trade t are columns bounds[t]:bounds[t+1]
+    bidders: list[str]  # label per bid column, keyed apart within a trade as in ``sub_labels``
+    keys: list[str]  # sub key per bid column
+    totals: np.ndarray  # raw bid totals
+    groups: list[str]  # trade names, or "{trade}::{item}"
+    group_bounds: np.ndarray  # groups of trade t are columns group_bounds[t]:group_bounds[t+1]
+    exposure: np.ndarray  # (bids × groups) base-case gap dollars
+
+    @classmethod
+    def build(cls, results: Mapping[str, TradeResult], plug_rates: PlugRates | None = None,
+              by: str = "trade") -> "ScenarioModel":
+        """
+        Model the bids in leveling `results` (trade → ``TradeResult``, e.g.
+        ``ProjectResult.trades``) with the `plug_rates` they were leveled with.
+        Subs without a bid are left out; with ``by="item"`` so are rows no bid
+        is short of, which no plug change can move.
+        """
+        if by not in GROUP_BY:
+            raise ValueError(f"by must be one of {GROUP_BY}, not {by!r}")
+        trades, bounds, bidders, keys, totals, blocks = [], [0], [], [], [], []
+        groups, group_bounds = [], [0]
+        for t, (trade, result) in enumerate(results.items()):
+            trades.append(trade)
+            active = result.active
+            bidders += sub_labels(active.values())
+            keys += list(active)
+            totals += [s.total for s in active.values()]
+            bounds.append(len(keys))
+            weights = _row_weights(result, active)
+            dollars = weights * plug_vector(result.scope, plug_rates, trade).to_numpy(dtype=float)[None, :]
+            if by == "trade":
+                blocks.append(dollars.sum(axis=1, keepdims=True))
+                groups.append(trade)
+            else:
+                rows = np.flatnonzero((dollars != 0).any(axis=0))
+                blocks.append(dollars[:, rows])
+                groups += [f"{trade}::{item}" for item in result.scope["Item"].to_numpy()[rows].tolist()]
+            group_bounds.append(len(groups))
+        bounds = np.asarray(bounds, dtype=np.int64)
+        group_bounds = np.asarray(group_bounds, dtype=np.int64)
+        # Block diagonal: a trade's bids are only exposed to that trade's groups.
+        exposure = np.zeros((len(keys), len(groups)))
+        for t, block in enumerate(blocks):
+            exposure[bounds[t]:bounds[t + 1], group_bounds[t]:group_bounds[t + 1]] = block
+        return cls(
+            trades=trades, bounds=bounds, bidders=bidders, keys=keys, totals=np.asarray(totals, dtype=float),
+            groups=groups, group_bounds=group_bounds, exposure=exposure,
+        )
+
+    @property
+    def base(self) -> np.ndarray:
+        """Adjusted totals at the base plugs (every multiplier 1)."""
+        return self.totals + self.exposure.sum(axis=1)
+
+    @property
+    def bid_trade(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self.trades)), np.diff(self.bounds))
+
+    @property
+    def group_trade(self) -> np.ndarray:
+        return np.repeat(np.arange(len(self.trades)), np.diff(self.group_bounds))
+
+    def spreads(self, spread: Spread) -> np.ndarray:
+        """Per-group spread from a scalar, an array, or a mapping keyed by group label or trade."""
+        if isinstance(spread, Mapping):
+            return np.array([
+                spread.get(group, spread.get(self.trades[t], 0.0)) for group, t in zip(self.groups, self.group_trade)
+            ], dtype=float)
+        return np.broadcast_to(np.asarray(spread, dtype=float), (len(self.groups),)).copy()
+
+    def monte_carlo(self, n: int, spread: Spread = 0.2, seed: int | None = None,
+                    distribution: str = "uniform") -> np.ndarray:
+        """
+        (n × groups) random multipliers around 1. Uniform and triangular
+        draws stay within ±spread; normal draws use spread as the standard
+        deviation. Multipliers never go below 0.
+        """
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {DISTRIBUTIONS}, not {distribution!r}")
+        rng = np.random.default_rng(seed)
+        size = (n, len(self.groups))
+        if distribution == "uniform":
+            unit = 2.0 * rng.random(size) - 1.0
+        elif distribution == "triangular":
+            # The sum of two uniforms is triangular, and several times cheaper than rng.triangular.
+            unit = rng.random(size) + rng.random(size) - 1.0
+        else:
+            unit = rng.standard_normal(size)
+        unit *= self.spreads(spread)[None, :]
+        unit += 1.0
+        return np.maximum(unit, 0.0, out=unit)
+
+    def bands(self, spread: Spread = 0.2, steps: int = 5) -> np.ndarray:
+        """
+        (steps ** groups × groups) multipliers: every combination of `steps`
+        evenly spaced points across each group's band. Meant for a handful of
+        groups (e.g. one per trade); use ``monte_carlo`` beyond that.
+        """
+        if steps ** len(self.groups) > MAX_GRID_SCENARIOS:
+            raise ValueError(
+                f"{steps} steps over {len(self.groups)} groups is {steps ** len(self.groups):,} scenarios; "
+                "use monte_carlo or fewer groups"
+            )
+        points = np.linspace(-1.0, 1.0, steps) if steps > 1 else np.zeros(1)
+        grid = np.stack(np.meshgrid(*[points] * len(self.groups), indexing="ij"), axis=-1).reshape(-1, len(self.groups))
+        return np.clip(1.0 + grid * self.spreads(spread)[None, :], 0.0, None)
+
+    def adjusted(self, multipliers: np.ndarray) -> np.ndarray:
+        """
+        (scenarios × bids) adjusted totals for (scenarios × groups) plug
+        multipliers. Grouped by trade it is the single product; grouped by
+        item, each trade's diagonal block is multiplied on its own so the
+        zeros between trades cost nothing.
+        """
+        multipliers = np.atleast_2d(multipliers)
+        if len(self.groups) == len(self.trades):
+            return self.totals[None, :] + multipliers @ self.exposure.T
+        out = np.empty((len(multipliers), len(self.keys)))
+        for t in range(len(self.trades)):
+            b0, b1 = self.bounds[t], self.bounds[t + 1]
+            g0, g1 = self.group_bounds[t], self.group_bounds[t + 1]
+            out[:, b0:b1] = self.totals[None, b0:b1] + multipliers[:, g0:g1] @ self.exposure[b0:b1, g0:g1].T
+        return out
+
+    def winners(self, adjusted: np.ndarray) -> np.ndarray:
+        """(scenarios × trades) bid column of each trade's lowest adjusted total; -1 for trades without bids."""
+        return _segment_argmin(adjusted, self.bounds)
+
+    def run(self, multipliers: np.ndarray) -> "ScenarioRun":
+        multipliers = np.atleast_2d(np.asarray(multipliers, dtype=float))
+        adjusted = self.adjusted(multipliers)
+        return ScenarioRun(self, multipliers, adjusted, self.winners(adjusted))
+
+    def tornado(self, spread: Spread = 0.2) -> pd.DataFrame:
+        """
+        One row per group whose band can move its trade's award, widest first.
+
+        Each group is taken to the low and high end of its band with every
+        other plug at base. ``margin_*`` is the closest rival's adjusted total
+        minus the base winner's (negative: the base winner has lost), and
+        ``swing`` the width of the margin's range across the band.
+        """
+        columns = ["trade", "group", "base_winner", "base_margin", "low_winner", "high_winner",
+                   "margin_low", "margin_high", "swing", "flips"]
+        base = self.base
+        base_winner = self.winners(base[None, :])[0]
+        delta = self.spreads(spread)[:, None] * self.exposure.T  # (groups × bids)
+        trade_winner = base_winner[self.group_trade]
+        usable = (trade_winner >= 0) & (np.diff(self.bounds)[self.group_trade] > 1)
+        if not usable.any():
+            return pd.DataFrame(columns=columns)
+        groups = np.flatnonzero(usable)
+        delta, winner = delta[groups], trade_winner[groups]
+        ends = {"low": base[None, :] - delta, "high": base[None, :] + delta}
+        out = {
+            "trade": [self.trades[t] for t in self.group_trade[groups]],
+            "group": [self.groups[g] for g in groups],
+            "base_winner": [self.bidders[w] for w in winner],
+            "base_margin": self._margins(base[None, :].repeat(len(groups), axis=0), winner),
+        }
+        for end, adjusted in ends.items():
+            winners = self.winners(adjusted)[np.arange(len(groups)), self.group_trade[groups]]
+            out[f"{end}_winner"] = [self.bidders[w] for w in winners]
+            out[f"margin_{end}"] = self._margins(adjusted, winner)
+        report = pd.DataFrame(out)
+        report["swing"] = (report["margin_high"] - report["margin_low"]).abs()
+        report["flips"] = (report["low_winner"] != report["base_winner"]) | (report["high_winner"] != report["base_winner"])
+        report = report[report["swing"] > 0]
+        return report.sort_values("swing", ascending=False, kind="stable").reset_index(drop=True)[columns]
+
+    def _margins(self, adjusted: np.ndarray, winner: np.ndarray) -> np.ndarray:
+        """Per row, the best rival's adjusted total minus bid `winner[row]`'s, rivals being its trade's other bids."""
+        rows = np.arange(len(adjusted))
+        own = self.bid_trade[winner]
+        rivals = np.where(
+            (self.bid_trade[None, :] == own[:, None]) & (np.arange(adjusted.shape[1])[None, :] != winner[:, None]),
+            adjusted, np.inf,
+        )
+        return rivals.min(axis=1) - adjusted[rows, winner]
+
+
+@dataclass
+class ScenarioRun:
+    model: ScenarioModel
+    multipliers: np.ndarray  # (scenarios × groups)
+    adjusted: np.ndarray  # (scenarios × bids)
+    winners: np.ndarray  # (scenarios × trades)
+
+    def __len__(self) -> int:
+        return len(self.multipliers)
+
+    def win_share(self) -> np.ndarray:
+        """Fraction of scenarios each bid wins its trade."""
+        wins = np.zeros(len(self.model.keys))
+        for t in range(len(self.model.trades)):
+            won = self.winners[:, t]
+            wins += np.bincount(won[won >= 0], minlength=len(wins))
+        return wins / max(len(self), 1)
+
+    def stability(self) -> pd.DataFrame:
+        """
+        One row per bid: base-case adjusted total and whether it wins, the
+        share of scenarios it wins, and its adjusted total's 5th / 50th / 95th
+        percentiles across the sweep.
+        """
+        model = self.model
+        base_winner = model.winners(model.base[None, :])[0]
+        p5, p50, p95 = (np.percentile(self.adjusted, [5, 50, 95], axis=0) if len(self)
+                        else np.full((3, len(model.keys)), np.nan))
+        return pd.DataFrame({
+            "trade": [model.trades[t] for t in model.bid_trade],
+            "bidder": model.bidders,
+            "sub": model.keys,
+            "base_adjusted": model.base,
+            "base_winner": np.isin(np.arange(len(model.keys)), base_winner),
+            "win_share": self.win_share(),
+            "p5": p5,
+            "median": p50,
+            "p95": p95,
+        })
+
+    def flip_rate(self) -> pd.Series:
+        """Per trade, the share of scenarios whose winner is not the base-case winner; NaN without bids."""
+        base_winner = self.model.winners(self.model.base[None, :])[0]
+        rate = (self.winners != base_winner[None, :]).mean(axis=0) if len(self) else np.zeros(len(base_winner))
+        return pd.Series(np.where(base_winner >= 0, rate, np.nan), index=self.model.trades, name="flip_rate")
@@ -0,0 +1,220 @@
+"""
+Per-trade scope partitions and the editable scope store.
+
+The master scope is split by trade once, when it is loaded, instead of being
+re-filtered with ``df[df["Trade"] == trade].copy()`` by every view on every
+rerun. Each partition carries the aggregates the dashboard reads — budget sum,
+item count, lowercased item names — plus its lazily built ``ScopeIndex`` and
+similarity ``ItemVectors``.
+Partition frames are shared, not copied: treat them as read-only.
+
+Edits never rebuild the whole scope. Adding, changing or removing a line item
+writes to its trade's row log in O(1) and adjusts the running aggregates; the
+partition frame is compacted lazily, the next time something reads it, and
+only that trade's derived data (frame, index) is dropped.
+"""
+
+from itertools import count
+
+import pandas as pd
+
+from leveler.automaton import ItemAutomaton
+from leveler.index import ScopeIndex
+from leveler.similarity import ItemVectors
+from leveler.ingest import concat_scope, empty_scope, normalize_scope
+
+# Rows added or renamed since the automaton was compiled are matched by the
+# index's exact fallback scan; past this many, the automaton is recompiled.
+AUTOMATON_STALE_ROWS = 64
+
+_revisions = count(1)
+
+
+class TradePartition:
+    """
+    One trade's scope rows: a compacted frame plus a log of pending edits.
+
+    ``revision`` changes on every edit and is unique across partitions, so it
+    tells a reader whether anything it derived from the rows is still current.
+    """
+
+    def __init__(self, trade: str, frame: pd.DataFrame):
+        self.trade = trade
+        self.budget = float(frame["Budget_Total"].sum())
+        self.count = len(frame)
+        self._base = frame
+        self._rows: dict[int, dict] = {}
+        self._dropped: set[int] = set()
+        self._frame: pd.DataFrame | None = frame
+        self._items_lower: list[str] | None = None
+        self._index: ScopeIndex | None = None
+        self._vectors: ItemVectors | None = None
+        self.revision = next(_revisions)
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The trade's rows in load order, compacting any pending edits first."""
+        if self._frame is None:
+            df = self._base.drop(index=list(self._dropped)) if self._dropped else self._base
+            if self._rows:
+                logged = normalize_scope(pd.DataFrame.from_dict(self._rows, orient="index"))
+                df = concat_scope([df, logged], ignore_index=False).sort_index()
+            self._base, self._rows, self._dropped = df, {}, set()
+            self._frame = df
+        return self._frame
+
+    @property
+    def items_lower(self) -> list[str]:
+        if self._items_lower is None:
+            self._items_lower = self.frame["Item"].astype(str).str.lower().tolist()
+        return self._items_lower
+
+    def index(self, automaton: ItemAutomaton | None = None) -> ScopeIndex:
+        """Trigram index over this trade's items, built on first use."""
+        if self._index is None:
+            self._index = ScopeIndex(self.items_lower, automaton)
+        return self._index
+
+    def vectors(self) -> ItemVectors:
+        """TF-IDF trigram vectors over this trade's items and descriptions, built on first use."""
+        if self._vectors is None:
+            self._vectors = ItemVectors(self.frame["Item"].astype(str), self.frame["Description"])
+        return self._vectors
+
+    def row(self, label: int) -> dict:
+        if label in self._rows:
+            return dict(self._rows[label])
+        return self._base.loc[label].to_dict()
+
+    def put(self, label: int, row: dict) -> None:
+        """Insert or replace the row stored under `label`."""
+        if label in self._rows or (label in self._base.index and label not in self._dropped):
+            self.budget -= float(self.row(label)["Budget_Total"])
+        else:
+            self.count += 1
+        if label in self._base.index:
+            self._dropped.add(label)
+        self._rows[label] = row
+        self.budget += float(row["Budget_Total"])
+        self._invalidate()
+
+    def remove(self, label: int) -> None:
+        self.budget -= float(self.row(label)["Budget_Total"])
+        self.count -= 1
+        self._rows.pop(label, None)
+        if label in self._base.index:
+            self._dropped.add(label)
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        self.revision = next(_revisions)
+        self._frame = None
+        self._items_lower = None
+        self._index = None
+        self._vectors = None
+
+
+class ScopeStore:
+    """
+    The master scope held as trade partitions.
+
+    Rows are addressed by a stable integer label (the index label of the loaded
+    frame; new rows get the next free label). Mutators return the trades whose
+    derived data changed so callers can drop matching cached results.
+    """
+
+    def __init__(self, master: pd.DataFrame | None = None):
+        master = empty_scope() if master is None else master
+        self.parts: dict[str, TradePartition] = {
+            str(trade): TradePartition(str(trade), frame)
+            for trade, frame in master.groupby("Trade", sort=False, observed=True)
+        }
+        self._trade_of: dict[int, str] = dict(zip(master.index, master["Trade"].astype(str)))
+        self._next_label = int(master.index.max()) + 1 if len(master) else 0
+        self._frame: pd.DataFrame | None = master
+        self._automaton: ItemAutomaton | None = None
+        self._stale_rows = 0
+
+    def __contains__(self, trade: str) -> bool:
+        return trade in self.parts and self.parts[trade].count > 0
+
+    def __len__(self) -> int:
+        return sum(p.count for p in self.parts.values())
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def trades(self) -> list[str]:
+        return [t for t, p in self.parts.items() if p.count]
+
+    @property
+    def budget(self) -> float:
+        return sum(p.budget for p in self.parts.values())
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The whole scope in label order. Rebuilt lazily after edits; prefer partitions."""
+        if self._frame is None:
+            frames = [p.frame for p in self.parts.values() if p.count]
+            self._frame = concat_scope(frames, ignore_index=False).sort_index() if frames else empty_scope()
+        return self._frame
+
+    def get(self, trade: str) -> TradePartition:
+        """The trade's partition; an empty one for trades with no scope."""
+        part = self.parts.get(trade)
+        if part is None:
+            return TradePartition(trade, empty_scope())
+        return part
+
+    def automaton(self) -> ItemAutomaton:
+        """Aho–Corasick automaton over every item name, compiled once per scope version."""
+        if self._automaton is None or self._stale_rows > AUTOMATON_STALE_ROWS:
+            self._automaton = ItemAutomaton(self.frame["Item"].astype(str))
+            self._stale_rows = 0
+        return self._automaton
+
+    def index(self, trade: str) -> ScopeIndex:
+        return self.get(trade).index(self.automaton())
+
+    def row(self, label: int) -> dict:
+        return self.parts[self._trade_of[label]].row(label)
+
+    def add(self, row: dict) -> tuple[int, set[str]]:
+        """Append a line item; returns its label and the affected trades."""
+        label = self._next_label
+        self._next_label += 1
+        trade = str(row["Trade"])
+        self._part_for(trade).put(label, row)
+        self._trade_of[label] = trade
+        self._touched()
+        return label, {trade}
+
+    def update(self, label: int, changes: dict) -> set[str]:
+        """Change fields of a line item, moving it if its trade changes."""
+        old_trade = self._trade_of[label]
+        row = self.parts[old_trade].row(label)
+        row.update(changes)
+        new_trade = str(row["Trade"])
+        if new_trade != old_trade:
+            self.parts[old_trade].remove(label)
+        self._part_for(new_trade).put(label, row)
+        self._trade_of[label] = new_trade
+        self._touched()
+        return {old_trade, new_trade}
+
+    def remove(self, label: int) -> set[str]:
+        trade = self._trade_of.pop(label)
+        self.parts[trade].remove(label)
+        self._frame = None
+        return {trade}
+
+    def _part_for(self, trade: str) -> TradePartition:
+        if trade not in self.parts:
+            self.parts[trade] = TradePartition(trade, empty_scope())
+        return self.parts[trade]
+
+    def _touched(self) -> None:
+        self._frame = None
+        self._stale_rows += 1
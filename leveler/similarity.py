@@ -0,0 +1,177 @@
+"""
+Similarity matching of bid lines to scope items.
+
+The substring rule misses rewordings ("5/8 Type X Gypsum Board" against the
+item ``5/8" Type X GWB``) and over-matches short lines, which are substrings of
+many names. ``ItemVectors`` is the alternative: TF-IDF vectors over character
+trigrams of each item's name (plus, at half weight, its description), built
+once per scope version. Lines are vectorized against the same vocabulary and
+every (line, item) cosine is computed in one sparse × sparse product, so a
+row is covered when any of a bid's lines scores at or above the threshold.
+
+Text is lowercased, punctuation other than ``/`` and ``.`` is dropped (so
+``5/8"`` and ``5/8`` agree) and common estimating abbreviations are spelled
+out before trigrams are taken.
+
+NumPy only: the item matrix is held column-wise (trigram → items, weights)
+and the product expands each line trigram's posting list and sums with
+``bincount``, a block of lines at a time to bound memory.
+"""
+
+import hashlib
+import re
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from leveler.coverage import normalize_lines
+
+N = 3
+DEFAULT_THRESHOLD = 0.6
+DESCRIPTION_WEIGHT = 0.5
+# Expanded (line, item) pairs per block of the product — bounds peak memory.
+BLOCK_PAIRS = 4_000_000
+
+ABBREVIATIONS = {
+    "gwb": "gypsum wall board",
+    "gyp": "gypsum",
+    "bd": "board",
+    "mtl": "metal",
+    "stl": "steel",
+    "conc": "concrete",
+    "elec": "electrical",
+    "clg": "ceiling",
+    "flr": "floor",
+    "insul": "insulation",
+    "fdn": "foundation",
+    "w/": "with",
+}
+
+_PUNCT = re.compile(r"[^a-z0-9/.]+")
+
+
+def normalize_text(text: str) -> str:
+    words = _PUNCT.sub(" ", str(text).lower()).split()
+    return " ".join(ABBREVIATIONS.get(w, w) for w in words)
+
+
+def trigrams(text: str) -> list[str]:
+    """Character trigrams of the normalized, space-padded text, repeats kept."""
+    padded = f" {normalize_text(text)} "
+    return [padded[i:i + N] for i in range(len(padded) - N + 1)]
+
+
+class ItemVectors:
+    """L2-normalized TF-IDF trigram vectors for a trade's scope items."""
+
+    def __init__(self, items: Iterable[str], descriptions: Iterable[str] | None = None):
+        items = [str(i) for i in items]
+        descriptions = [("" if d is None or d != d else str(d)) for d in descriptions] if descriptions is not None else []
+        self.fingerprint = hashlib.blake2b(
+            "\x00".join(items + ["\x01"] + descriptions).encode(), digest_size=16
+        ).hexdigest()
+        self.n = len(items)
+        vocab: dict[str, int] = {}
+        rows, cols, tfs = [], [], []
+        for row, item in enumerate(items):
+            counts: dict[int, float] = {}
+            for gram in trigrams(item):
+                gid = vocab.setdefault(gram, len(vocab))
+                counts[gid] = counts.get(gid, 0.0) + 1.0
+            if row < len(descriptions) and descriptions[row]:
+                for gram in trigrams(descriptions[row]):
+                    gid = vocab.setdefault(gram, len(vocab))
+                    counts[gid] = counts.get(gid, 0.0) + DESCRIPTION_WEIGHT
+            rows += [row] * len(counts)
+            cols += counts.keys()
+            tfs += counts.values()
+        self.vocab = vocab
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        df = np.bincount(cols, minlength=len(vocab))
+        self.idf = (np.log((1.0 + self.n) / (1.0 + df)) + 1.0).astype(np.float32)
+        weights = np.asarray(tfs, dtype=np.float32) * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=self.n)).astype(np.float32)
+        weights /= np.where(norms > 0, norms, 1.0)[rows]
+        # Column-wise (trigram → items) for the product.
+        order = np.argsort(cols, kind="stable")
+        self.col_ptr = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        self.col_rows = rows[order].astype(np.int32)
+        self.col_vals = weights[order]
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _line_terms(self, lines: Sequence[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (line, trigram id, normalized weight) for every in-vocabulary trigram of
+        `lines`; trigrams no scope item has carry no signal and are dropped.
+        """
+        line_ids, gram_ids, weights = [], [], []
+        for i, line in enumerate(lines):
+            counts: dict[str, int] = {}
+            for gram in trigrams(line):
+                counts[gram] = counts.get(gram, 0) + 1
+            known = [(self.vocab[g], c) for g, c in counts.items() if g in self.vocab]
+            if not known:
+                continue
+            ids = np.fromiter((g for g, _ in known), dtype=np.int64, count=len(known))
+            w = np.fromiter((c for _, c in known), dtype=np.float32, count=len(known)) * self.idf[ids]
+            norm = np.sqrt(float(w @ w))
+            line_ids.append(np.full(len(ids), i, dtype=np.int64))
+            gram_ids.append(ids)
+            weights.append(w / norm)
+        if not line_ids:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float32)
+        return np.concatenate(line_ids), np.concatenate(gram_ids), np.concatenate(weights)
+
+    def scores(self, lines: Sequence[str]) -> np.ndarray:
+        """(lines × items) cosine similarity, float32."""
+        m = len(lines)
+        out = np.zeros((m, self.n), dtype=np.float32)
+        if not m or not self.n:
+            return out
+        line_ids, gram_ids, weights = self._line_terms(lines)
+        lengths = self.col_ptr[gram_ids + 1] - self.col_ptr[gram_ids]
+        # Runs of whole lines expanding to about BLOCK_PAIRS (line, item) pairs each.
+        pairs = np.bincount(line_ids, weights=lengths, minlength=m)
+        block = ((np.cumsum(pairs) - pairs) // BLOCK_PAIRS).astype(np.int64)
+        line_starts = np.concatenate([[0], np.flatnonzero(np.diff(block)) + 1, [m]])
+        for lo, hi in zip(line_starts[:-1], line_starts[1:]):
+            t0, t1 = np.searchsorted(line_ids, [lo, hi])
+            self._accumulate(out, int(lo), int(hi), line_ids[t0:t1], gram_ids[t0:t1], weights[t0:t1], lengths[t0:t1])
+        return out
+
+    def _accumulate(self, out: np.ndarray, lo: int, hi: int, line_ids: np.ndarray, gram_ids: np.ndarray,
+                    weights: np.ndarray, lengths: np.ndarray) -> None:
+        """Add the products of lines ``lo:hi`` (given as their terms) into ``out[lo:hi]``."""
+        total = int(lengths.sum())
+        if not total:
+            return
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = np.repeat(self.col_ptr[gram_ids], lengths) + offsets
+        flat = np.repeat(line_ids - lo, lengths) * self.n + self.col_rows[positions]
+        block = np.bincount(flat, weights=np.repeat(weights, lengths) * self.col_vals[positions],
+                            minlength=(hi - lo) * self.n)
+        out[lo:hi] = block.reshape(hi - lo, self.n)
+
+    def coverage_matrix(self, line_lists: Sequence[Iterable[str]], threshold: float = DEFAULT_THRESHOLD) -> np.ndarray:
+        """(items × bids) mask: rows some line of the bid scores at least `threshold` against."""
+        out = np.zeros((self.n, len(line_lists)), dtype=bool)
+        bids = [normalize_lines(raw) for raw in line_lists]
+        unique = list(dict.fromkeys(line for lines in bids for line in lines))
+        if not unique or not self.n:
+            return out
+        hits = self.scores(unique) >= threshold
+        position = {line: i for i, line in enumerate(unique)}
+        for b, lines in enumerate(bids):
+            if lines:
+                out[:, b] = hits[[position[l] for l in lines]].any(axis=0)
+        return out
+
+    def best_matches(self, line: str, k: int = 5) -> list[tuple[int, float]]:
+        """The `k` highest-scoring item rows for one line, best first."""
+        scores = self.scores([line])[0]
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [(int(r), float(scores[r])) for r in top if scores[r] > 0]
@@ -0,0 +1,50 @@
+"""
+Trade registry.
+
+The trades the dashboard shows come from data rather than a hardcoded list:
+the configured trades first (a ``trades.json`` file, or the four original
+defaults when there is none), then any trade that appears only in the loaded
+scope or in entered bids, in the order it first appears. A scope row is never
+hidden because its trade was not configured.
+
+``trades.json`` is either a JSON list of trade names or ``{"trades": [...]}``;
+set ``LEVELER_TRADES`` to read it from elsewhere.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+
+DEFAULT_TRADES = ["Drywall", "MEP", "Interiors", "Site Work"]
+TRADES_FILE = "trades.json"
+
+
+class TradeConfigError(ValueError):
+    """The trade config file is not a list of trade names."""
+
+
+def load_trades(path: str | Path | None = None) -> list[str]:
+    """
+    Configured trades from `path` (default: ``$LEVELER_TRADES`` or
+    ``trades.json`` in the working directory); the defaults if there is no file.
+    """
+    path = Path(path or os.environ.get("LEVELER_TRADES") or TRADES_FILE)
+    if not path.is_file():
+        return list(DEFAULT_TRADES)
+    try:
+        config = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as e:
+        raise TradeConfigError(f"{path}: {e}") from None
+    trades = config.get("trades") if isinstance(config, dict) else config
+    if not isinstance(trades, list) or not all(isinstance(t, str) and t.strip() for t in trades):
+        raise TradeConfigError(f"{path}: expected a list of trade names")
+    return resolve_trades([t.strip() for t in trades])
+
+
+def resolve_trades(configured: Iterable[str], *sources: Iterable[str]) -> list[str]:
+    """Configured trades, then unseen trades from each source, deduplicated in order."""
+    trades = dict.fromkeys(configured)
+    for source in sources:
+        trades.update(dict.fromkeys(str(t) for t in source))
+    return list(trades)
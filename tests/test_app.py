@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from leveler.ingest import read_scope_csv
+from leveler.persist import ProjectDB
+
+ROOT = Path(__file__).resolve().parent.parent
+MASTER_SCOPE = (ROOT / "master_scope.csv").read_bytes()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setenv("LEVELER_DB", str(tmp_path / "leveler.db"))
+    st.cache_resource.clear()
+    yield ProjectDB()
+    st.cache_resource.clear()
+
+
+def app() -> AppTest:
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=60)
+    return at.run()
+
+
+def test_opening_a_project_keeps_its_scope_after_an_upload(db):
+    scope, _ = read_scope_csv(ROOT / "master_scope.csv")
+    scope = scope.iloc[:1]
+    project = db.create_project("Saved")
+    db.save_trade(project, scope["Trade"].iloc[0], scope)
+
+    at = app()
+    at.file_uploader[0].set_value(("master_scope.csv", MASTER_SCOPE, "text/csv")).run()
+    assert len(at.session_state.scope_store.frame) > 1
+
+    at.selectbox(key="project_choice").set_value(project).run()
+    at.run()
+    assert len(at.session_state.scope_store.frame) == 1
+    assert len(db.load_scope(project)) == 1
+
+
+def test_removing_a_bidder_is_not_undone_on_rerun(db):
+    at = app()
+    trade = at.session_state.bids.trades[0]
+    before = at.session_state.bids.subs(trade)
+    at.button(key=f"remove_sub_{trade}").click().run()
+    at.run()
+    after = at.session_state.bids.subs(trade)
+    assert len(after) == len(before) - 1
+    assert set(after) < set(before)
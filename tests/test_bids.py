@@ -0,0 +1,20 @@
+import pytest
+
+from leveler.bids import BidFormatError, parse_bids
+
+
+def test_unkeyed_subs_skip_explicit_keys():
+    package = parse_bids([
+        {"trade": "Drywall", "sub": "2", "name": "Acme"},
+        {"trade": "Drywall", "name": "Bolt"},
+        {"trade": "Drywall", "name": "Crest"},
+        {"trade": "Drywall", "sub": "1", "name": "Dyna"},
+        {"trade": "MEP", "name": "Echo"},
+    ])
+    assert {k: b["name"] for k, b in package["Drywall"].items()} == {"2": "Acme", "3": "Bolt", "4": "Crest", "1": "Dyna"}
+    assert list(package["MEP"]) == ["1"]
+
+
+def test_duplicate_explicit_sub_is_rejected():
+    with pytest.raises(BidFormatError, match="duplicate sub '2'"):
+        parse_bids([{"trade": "Drywall", "sub": "2"}, {"trade": "Drywall", "sub": "2"}])
@@ -0,0 +1,55 @@
+from io import BytesIO, StringIO
+
+import pytest
+
+from leveler.ingest import BadRow, ScopeSchemaError, read_scope_csv
+
+HEADER = "Trade,Item,Unit,Quantity,Unit_Cost,Budget_Total,Description\n"
+ROWS = [
+    "Drywall,a,SF,1,1,10,x\n",
+    "Drywall,b,SF,1,1,20,\"x, y\"\n",
+    "Drywall,c,SF,1,1,30,x\n",
+    "Drywall,d,SF,1,1,40,x,EXTRA,MORE\n",  # line 5
+    "Drywall,e,SF,1,1,50,x\n",
+    "Drywall,f,SF,1,1,60,\"q,r\",z\n",  # line 7
+    "Drywall,g,SF,1,1,70,x\n",
+]
+CSV = HEADER + "".join(ROWS)
+EXPECTED_BAD = [BadRow(5, "expected 7 fields, saw 9"), BadRow(7, "expected 7 fields, saw 8")]
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 4, 50_000])
+def test_overlong_rows_reported_in_any_chunk(chunksize):
+    df, bad = read_scope_csv(StringIO(CSV), chunksize=chunksize)
+    assert bad == EXPECTED_BAD
+    assert df["Item"].tolist() == ["a", "b", "c", "e", "g"]
+    assert df["Budget_Total"].tolist() == [10.0, 20.0, 30.0, 50.0, 70.0]
+
+
+def test_binary_upload_is_read_and_rewound():
+    source = BytesIO(CSV.encode())
+    df, bad = read_scope_csv(source, chunksize=2)
+    assert bad == EXPECTED_BAD
+    assert len(df) == 5
+
+
+def test_line_numbers_after_skipped_rows():
+    text = HEADER + ROWS[3] + "Drywall,h,SF,1,1,,x\n" + ROWS[0]
+    df, bad = read_scope_csv(StringIO(text), chunksize=1)
+    assert bad == [BadRow(2, "expected 7 fields, saw 9"), BadRow(3, "Budget_Total is missing or not a number")]
+    assert df["Item"].tolist() == ["a"]
+
+
+def test_header_is_checked_before_any_rows_are_read():
+    source = StringIO("Trade,Item,Unit\n" + "Drywall,a,SF\n" * 10)
+    with pytest.raises(ScopeSchemaError, match="Budget_Total"):
+        read_scope_csv(source, chunksize=1)
+    assert source.tell() == 0
+
+
+def test_header_only_and_byte_order_mark():
+    df, bad = read_scope_csv(BytesIO(HEADER.encode()))
+    assert len(df) == 0 and bad == []
+    df, bad = read_scope_csv(BytesIO(b"\xef\xbb\xbf" + CSV.encode()), chunksize=3)
+    assert bad == EXPECTED_BAD
+    assert df["Trade"].tolist() == ["Drywall"] * 5
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from leveler.cache import GapCache
+from leveler.engine import level_trade
+from leveler.profiling import PATH_SEPARATOR, Profiler, activate, deactivate
+
+SCOPE = pd.DataFrame({
+    "Trade": ["Drywall"] * 3,
+    "Item": ["Metal stud framing", "Type X GWB", "Acoustic insulation"],
+    "Budget_Total": [100.0, 200.0, 300.0],
+})
+BIDS = {
+    "A": {"name": "", "total": 1.0, "inclusions": ["metal stud"], "exclusions": []},
+    "B": {"name": "", "total": 1.0, "inclusions": ["gwb"], "exclusions": ["acoustic"]},
+}
+
+
+def test_level_trade_records_stages_per_sub():
+    profiler = Profiler()
+    token = activate(profiler)
+    try:
+        level_trade(SCOPE, BIDS, trade="Drywall", cache=GapCache())
+    finally:
+        deactivate(token)
+    names = {PATH_SEPARATOR.join(path): stats for path, stats in profiler.stats.items()}
+    for parent in ("cache lookup", "gap costs"):
+        for key in BIDS:
+            assert names[f"{parent}{PATH_SEPARATOR}sub {key}"].calls == 1
+    assert names[f"cache lookup{PATH_SEPARATOR}sub B"].items == 2
+    assert names["gap scan"].items == 2